@@ -0,0 +1,187 @@
+"""
+Compressed archive of raw API responses with random access.
+
+An archive is a '.ndjson.zst' file of independent zstd frames, one per archived record, each holding one NDJSON line,
+plus an NDJSON index ('<archive>.idx') giving the (sport, timestamp, event) key, offset and size of every frame. A
+concatenation of zstd frames is itself a valid zstd stream, so the archive can be scanned sequentially by any zstd
+reader (including pysportsbet.readers and ev.data) at disk speed, while a single snapshot is read by seeking to its
+frame and decompressing it alone.
+
+Frames are appended and synced before their index line, so a crash never indexes a partial frame; an unindexed tail
+left by a crash is truncated the next time the archive is opened for writing.
+"""
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+from pysportsbet import readers
+
+# Suffix of the index file next to an archive
+INDEX_SUFFIX = ".idx"
+
+# zstd compression level of new frames
+COMPRESSION_LEVEL = 10
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Archives require the 'zstandard' package: pip install zstandard")
+    return zstandard
+
+
+def record_event(record):
+    """
+    Return the event id of a historical event odds response, or None for any other record.
+    """
+    data = record.get("data") if isinstance(record, dict) else None
+    return data.get("id") if isinstance(data, dict) else None
+
+
+class Archive(object):
+    """
+    Append-only zstd archive of historical responses keyed by (sport, timestamp, event).
+
+    Args:
+        path (str): Path of the archive, conventionally ending in '.ndjson.zst'. Created on the first append.
+        level (int): zstd compression level of appended frames.
+    """
+
+    def __init__(self, path, level=COMPRESSION_LEVEL):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.level = level
+        # (offset, size) of every frame keyed by (sport, timestamp, event)
+        self.frames = {}
+        self._keys = None
+        self._prefixes = None
+        self._end = 0
+        self._lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line truncated by a crash; its frame is cut off below
+                        continue
+                    key = (entry["sport"], entry["timestamp"], entry["event"])
+                    self.frames[key] = (entry["offset"], entry["size"])
+                    self._end = max(self._end, entry["offset"] + entry["size"])
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def append(self, sport, record, event=None, split_events=False):
+        """
+        Archive a record in its own frame, unless its key is archived already.
+
+        Args:
+            sport (str): Sport key.
+            record (dict): Historical odds, events or event odds response with a 'timestamp'.
+            event (str): Event id of the key. Defaults to the id of an event odds response, or None.
+            split_events (bool): Archive every event of a historical odds response in its own frame, keyed by its id,
+                so single events can be read without decompressing the whole snapshot.
+
+        Returns:
+            int: Number of frames written.
+        """
+        if split_events and isinstance(record.get("data"), list):
+            return sum(self.append(sport, dict(record, data=item), event=item["id"]) for item in record["data"])
+
+        key = (sport, record["timestamp"], event if event is not None else record_event(record))
+        if key in self.frames:
+            return 0
+        frame = _zstandard().ZstdCompressor(level=self.level).compress(
+            (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+        with self._lock:
+            if key in self.frames:
+                return 0
+            with open(self.path, "ab") as f:
+                if f.tell() > self._end:
+                    f.truncate(self._end)
+                    f.seek(self._end)
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            entry = {"sport": key[0], "timestamp": key[1], "event": key[2], "offset": self._end, "size": len(frame)}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.frames[key] = (self._end, len(frame))
+            self._end += len(frame)
+            self._keys = None
+        return 1
+
+    def keys(self, sport=None, start=None, end=None):
+        """
+        Return the keys of the archived records in (sport, timestamp, event) order.
+
+        Args:
+            sport (str): Only keys of this sport if set.
+            start (str): Earliest timestamp (inclusive) if set; requires sport.
+            end (str): Latest timestamp (inclusive) if set; requires sport.
+
+        Returns:
+            list: (sport, timestamp, event) tuples.
+        """
+        if self._keys is None:
+            self._keys = sorted(self.frames, key=lambda key: (key[0], key[1], key[2] or ""))
+            self._prefixes = [key[:2] for key in self._keys]
+        if sport is None:
+            return list(self._keys)
+        first = bisect_left(self._prefixes, (sport, start or ""))
+        last = bisect_right(self._prefixes, (sport, end or chr(0x10FFFF)))
+        return self._keys[first:last]
+
+    def get(self, sport, timestamp, event=None):
+        """
+        Read one archived record, decompressing its frame only.
+
+        Raises:
+            KeyError: If the key is not archived.
+        """
+        offset, size = self.frames[(sport, timestamp, event)]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            frame = f.read(size)
+        return json.loads(_zstandard().ZstdDecompressor().decompress(frame))
+
+    def iter_records(self, sport=None, start=None, end=None):
+        """
+        Stream archived records.
+
+        Without filters every frame is read in the order it was appended, as one sequential pass over the file. With
+        filters only the matching frames are read, in (sport, timestamp, event) order.
+
+        Yields:
+            dict: Archived records.
+        """
+        if sport is None and start is None and end is None:
+            spans = sorted(self.frames.values())
+        else:
+            spans = [self.frames[key] for key in self.keys(sport, start, end)]
+        if not spans:
+            return
+        decompressor = _zstandard().ZstdDecompressor()
+        with open(self.path, "rb", buffering=readers.READ_SIZE) as f:
+            for offset, size in spans:
+                if f.tell() != offset:
+                    f.seek(offset)
+                yield json.loads(decompressor.decompress(f.read(size)))
+
+    def iter_events(self, sport=None, start=None, end=None):
+        """
+        Stream the events with odds of archived records, ready for the EV pipeline.
+
+        Yields:
+            dict: Events from Odds API odds responses.
+        """
+        for record in self.iter_records(sport, start, end):
+            yield from readers.record_events(record)
@@ -0,0 +1,265 @@
+"""
+As-of price index over collected snapshots.
+
+Answers "what was the price of (event, book, market, outcome) at time t" without re-fetching historical snapshots.
+Rows are sorted by key and time into flat numpy arrays, with one contiguous segment per key. A point lookup is a dict
+lookup plus a binary search in the key's segment; a batched lookup encodes the key and the rank of the time of every
+query among the index times into one integer and resolves all of them with a single ``numpy.searchsorted``. Ranks keep
+the full nanosecond order, so a returned quote is never later than its query.
+
+Outcomes are keyed like delta.outcome_keys: by name and description, with the point only part of the key in markets
+listing the same name more than once at one time (alternate lines). Lookups of other markets ignore the point, so a
+moved spread or total still finds its previous price.
+"""
+import numpy
+import pandas
+
+from pysportsbet import devig
+
+# Columns identifying one outcome of one market of one bookmaker; the point only counts for alternate lines
+KEY_COLUMNS = ["id", "book_key", "market", "name", "description", "point"]
+
+# Column of KEY_COLUMNS only kept in the key of alternate lines
+LINE_COLUMN = "point"
+
+# Columns returned by lookups
+VALUE_COLUMNS = ["price", "point"]
+
+
+def to_ns(values):
+    """
+    Convert timestamps (ISO 8601 strings, datetimes or datetime64) to int64 nanoseconds since the epoch, in UTC.
+    """
+    times = pandas.to_datetime(pandas.Series(values))
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    return times.to_numpy(dtype="datetime64[ns]").astype(numpy.int64)
+
+
+def key_part(value):
+    """
+    Convert one key value to the string stored in the index: '' if missing, numbers as floats so 3 matches 3.0.
+    """
+    if value is None or (isinstance(value, float) and numpy.isnan(value)):
+        return ""
+    if isinstance(value, (int, float, numpy.number)) and not isinstance(value, bool):
+        return str(float(value))
+    return str(value)
+
+
+def key_frame(df, columns):
+    """
+    Convert the key columns of a Dataframe to the strings stored in the index, see key_part.
+    """
+    keys = pandas.DataFrame(index=df.index)
+    for column in columns:
+        values = df[column] if column in df else pandas.Series(None, index=df.index, dtype=object)
+        if pandas.api.types.is_numeric_dtype(values) and not pandas.api.types.is_bool_dtype(values):
+            keys[column] = values.astype(float).astype(str).where(values.notna(), "")
+        else:
+            keys[column] = values.map(key_part)
+    return keys
+
+
+def scalar_ns(value):
+    """
+    Convert a single timestamp to int64 nanoseconds since the epoch, in UTC.
+    """
+    timestamp = pandas.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp.value
+
+
+def _plain(values):
+    # Object arrays would need pickling; store them as floats, or strings if not numeric
+    if values.dtype != object:
+        return values
+    try:
+        return values.astype(float)
+    except (TypeError, ValueError):
+        return numpy.array(["" if value is None else str(value) for value in values])
+
+
+class AsOfIndex(object):
+    """
+    Sorted per-key time arrays answering as-of lookups.
+
+    Build one with AsOfIndex.from_frame or AsOfIndex.load.
+
+    Args:
+        keys (pandas.DataFrame): One row per key, in code order.
+        offsets (numpy.ndarray): Start of every key's segment, plus the total length.
+        times (numpy.ndarray): int64 nanosecond times, sorted within every segment.
+        values (dict): Arrays of VALUE_COLUMNS aligned with times.
+    """
+
+    def __init__(self, keys, offsets, times, values):
+        self.keys = keys.reset_index(drop=True)
+        self.key_columns = list(keys.columns)
+        self.offsets = offsets
+        self.times = times
+        self.values = values
+        self._codes = None
+
+    @property
+    def codes(self):
+        """
+        Code of every key, built on the first point lookup.
+        """
+        if self._codes is None:
+            self._codes = {key: code for code, key in enumerate(self.keys.itertuples(index=False, name=None))}
+        return self._codes
+
+    @classmethod
+    def from_frame(cls, df, time_column="snapshot", key_columns=None, value_columns=None):
+        """
+        Build an index from flattened outcome rows, e.g. HistoricalStore.query or delta.price_changes output.
+
+        Args:
+            df (pandas.DataFrame): One row per outcome quote.
+            time_column (str): Column holding the time a quote was seen.
+            key_columns (list): Columns identifying an outcome. Defaults to KEY_COLUMNS. A LINE_COLUMN among them is
+                only kept for markets listing the same outcome more than once at one time.
+            value_columns (list): Columns returned by lookups. Defaults to VALUE_COLUMNS.
+
+        Returns:
+            AsOfIndex: Index over the rows. Of several quotes of a key at the same time, the last one wins.
+        """
+        key_columns = key_columns or KEY_COLUMNS
+        value_columns = value_columns or VALUE_COLUMNS
+        keys = key_frame(df, key_columns)
+        times = to_ns(df[time_column])
+        if LINE_COLUMN in key_columns:
+            # Alternate lines: a market listing the same outcome more than once in one snapshot
+            market_columns = [column for column in key_columns if column not in (LINE_COLUMN, "name", "description")]
+            outcome_columns = [column for column in key_columns if column != LINE_COLUMN]
+            repeated = keys[outcome_columns].assign(_time=times).duplicated(keep=False)
+            alternate = keys[market_columns].merge(
+                keys.loc[repeated, market_columns].drop_duplicates().assign(_alternate=True), how="left",
+                on=market_columns)["_alternate"].fillna(False).to_numpy(dtype=bool)
+            keys[LINE_COLUMN] = keys[LINE_COLUMN].where(alternate, "")
+        codes, n_keys = devig.group_codes(keys, key_columns)
+
+        order = numpy.lexsort((times, codes))
+        codes, times = codes[order], times[order]
+        # Keep the last quote of every (key, time)
+        last = numpy.ones(len(order), dtype=bool)
+        last[:-1] = (codes[1:] != codes[:-1]) | (times[1:] != times[:-1])
+        order, codes, times = order[last], codes[last], times[last]
+
+        offsets = numpy.searchsorted(codes, numpy.arange(n_keys + 1))
+        key_table = keys.iloc[order[offsets[:-1]]]
+        values = {column: df[column].to_numpy()[order] for column in value_columns}
+        return cls(key_table, offsets, times, values)
+
+    def __len__(self):
+        return len(self.times)
+
+    def code(self, key):
+        """
+        Return the code of a key, or None if it is not in the index.
+
+        Args:
+            key (tuple): Values of the key columns, e.g. (event id, book, market, outcome name, description, point).
+                Trailing columns may be left out; the point is ignored unless it is an alternate line.
+        """
+        parts = [key_part(part) for part in key] + [""] * (len(self.key_columns) - len(key))
+        code = self.codes.get(tuple(parts))
+        if code is None and LINE_COLUMN in self.key_columns:
+            parts[self.key_columns.index(LINE_COLUMN)] = ""
+            code = self.codes.get(tuple(parts))
+        return code
+
+    def lookup(self, key, when):
+        """
+        Return the latest quote of a key at or before a time.
+
+        Args:
+            key (tuple): Values of the key columns, see AsOfIndex.code.
+            when (str): Time of the lookup, as an ISO 8601 string, datetime, numpy.datetime64 or int64
+                nanoseconds.
+
+        Returns:
+            dict: Values of the quote and its 'as_of' time, or None if the key was not quoted by then.
+        """
+        code = self.code(key)
+        if code is None:
+            return None
+        start, end = self.offsets[code], self.offsets[code + 1]
+        when_ns = when if isinstance(when, (int, numpy.integer)) else scalar_ns(when)
+        position = start + numpy.searchsorted(self.times[start:end], when_ns, side="right") - 1
+        if position < start:
+            return None
+        result = {column: values[position] for column, values in self.values.items()}
+        result["as_of"] = pandas.Timestamp(self.times[position])
+        return result
+
+    def lookup_many(self, queries, time_column="time", tolerance=None):
+        """
+        Resolve as-of lookups for many queries at once, like pandas.merge_asof(direction='backward') by key.
+
+        Args:
+            queries (pandas.DataFrame): Rows with the key columns and a time column, in any order. Missing key
+                columns count as missing values; the point is ignored unless it is an alternate line.
+            time_column (str): Column holding the time of every query.
+            tolerance (pandas.Timedelta): Maximum age of a quote. Unlimited if None.
+
+        Returns:
+            pandas.DataFrame: VALUE_COLUMNS and 'as_of' for every query, aligned with its index. Missing where no
+                quote qualifies.
+        """
+        result = pandas.DataFrame(index=queries.index, columns=list(self.values) + ["as_of"], dtype=float)
+        if not len(self.times):
+            return result
+
+        keys = key_frame(queries, self.key_columns).reset_index(drop=True)
+        table = self.keys.assign(_code=numpy.arange(len(self.keys)))
+        codes = keys.merge(table, how="left", on=self.key_columns)["_code"].to_numpy()
+        if LINE_COLUMN in self.key_columns:
+            # Outside alternate lines the index keys carry no point
+            codes = numpy.where(numpy.isnan(codes), keys.assign(**{LINE_COLUMN: ""}).merge(
+                table, how="left", on=self.key_columns)["_code"].to_numpy(), codes)
+        found = ~numpy.isnan(codes)
+        codes = numpy.where(found, codes, 0).astype(numpy.int64)
+        query_ns = to_ns(queries[time_column])
+
+        # Encode (key, time rank) as one sortable integer; index times are in order within every key. An index time
+        # of rank r sorts as r + 1 and a query as the number of index times at or before it, so side='right' finds
+        # the last quote at or before the query at full resolution
+        distinct = numpy.unique(self.times)
+        bits = int(len(distinct)).bit_length() + 1
+        index_codes = numpy.repeat(numpy.arange(len(self.offsets) - 1), numpy.diff(self.offsets))
+        composite = (index_codes << bits) | (numpy.searchsorted(distinct, self.times) + 1)
+        ranks = numpy.searchsorted(distinct, query_ns, side="right")
+        position = numpy.searchsorted(composite, (codes << bits) | ranks, side="right") - 1
+
+        valid = found & (position >= 0)
+        position = numpy.where(valid, position, 0)
+        valid &= index_codes[position] == codes
+        as_of = self.times[position]
+        if tolerance is not None:
+            valid &= query_ns - as_of <= pandas.Timedelta(tolerance).value
+
+        for column, values in self.values.items():
+            result[column] = pandas.Series(values[position], index=queries.index).where(valid)
+        result["as_of"] = pandas.Series(as_of.astype("datetime64[ns]"), index=queries.index).where(valid)
+        return result
+
+    def save(self, path):
+        """
+        Save the index to a .npz file.
+        """
+        arrays = {f"key_{column}": self.keys[column].to_numpy(dtype=str) for column in self.key_columns}
+        arrays.update({f"value_{column}": _plain(values) for column, values in self.values.items()})
+        numpy.savez(path, offsets=self.offsets, times=self.times, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with AsOfIndex.save.
+        """
+        with numpy.load(path) as data:
+            keys = pandas.DataFrame({name[4:]: data[name] for name in data.files if name.startswith("key_")})
+            values = {name[6:]: data[name] for name in data.files if name.startswith("value_")}
+            return cls(keys, data["offsets"], data["times"], values)
@@ -0,0 +1,518 @@
+"""
+Concurrent, resumable backfill of historical odds.
+
+A backfill is planned as a list of requests, each with a stable key, before anything is fetched. Requests run on a
+thread pool behind a quota limiter, and every response is appended to an NDJSON checkpoint as soon as it arrives.
+Re-running the same backfill skips every key already in the checkpoint, so a crash or an exhausted quota only costs
+the requests that were in flight.
+
+Checkpoint lines are the API responses themselves plus a 'key' field, so a checkpoint file can be passed straight
+to ev.data(filename=...) or pysportsbet.readers.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from pysportsbet import timestamps
+
+HOST = "https://api.the-odds-api.com"
+
+# HTTP status codes worth retrying after a pause
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class QuotaExhausted(Exception):
+    """Raised when a backfill would spend credits beyond its budget."""
+
+
+class QuotaLimiter(object):
+    """
+    Thread-safe limiter pacing requests and tracking the usage quota reported by the API.
+
+    Args:
+        requests_per_second (float): Maximum request rate across all threads.
+        min_remaining (int): Stop once the API reports fewer remaining credits than this.
+        max_credits (int): Stop once this backfill has spent this many credits. Unlimited if None.
+    """
+
+    def __init__(self, requests_per_second=5, min_remaining=0, max_credits=None):
+        self.interval = 1 / requests_per_second
+        self.min_remaining = min_remaining
+        self.max_credits = max_credits
+        self.credits_spent = 0
+        self.requests_remaining = None
+        self.requests_used = None
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """
+        Block until the next request may be sent.
+
+        Args:
+            cost (int): Expected credit cost of the request.
+
+        Raises:
+            QuotaExhausted: If the request would exceed the credit budget.
+        """
+        with self._lock:
+            if self.requests_remaining is not None and self.requests_remaining - cost < self.min_remaining:
+                raise QuotaExhausted(f"{self.requests_remaining} credits remaining, keeping {self.min_remaining}")
+            if self.max_credits is not None and self.credits_spent + cost > self.max_credits:
+                raise QuotaExhausted(f"{self.credits_spent} of {self.max_credits} credits spent")
+            self.credits_spent += cost
+            now = time.monotonic()
+            wait_for = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+    def update(self, headers):
+        """
+        Record the usage quota from the headers of a response.
+
+        Args:
+            headers (dict): Response headers.
+        """
+        with self._lock:
+            if headers.get("x-requests-remaining") is not None:
+                remaining = int(float(headers["x-requests-remaining"]))
+                self.requests_remaining = remaining if self.requests_remaining is None \
+                    else min(self.requests_remaining, remaining)
+            if headers.get("x-requests-used") is not None:
+                self.requests_used = max(self.requests_used or 0, int(float(headers["x-requests-used"])))
+
+    def meta_data(self):
+        """
+        Return the usage quota as metadata rows for spreadsheet output.
+        """
+        return [
+            ["Requests Used", self.requests_used],
+            ["Requests Remaining", self.requests_remaining],
+        ]
+
+
+class Checkpoint(object):
+    """
+    Append-only NDJSON record of completed backfill requests.
+
+    Only the keys of completed requests are kept in memory; responses are read back from disk on demand.
+
+    Args:
+        path (str): Path of the checkpoint file. Created if missing, resumed if present.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            for record in self.iter_records():
+                self.keys.add(record["key"])
+
+    def done(self, key):
+        """
+        Check whether a request has already been completed.
+        """
+        return key in self.keys
+
+    def record(self, key, response):
+        """
+        Durably append the response of a completed request.
+
+        Args:
+            key (str): Key of the request.
+            response (dict): JSON response of the request.
+        """
+        line = json.dumps({"key": key, **response}, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.keys.add(key)
+
+    def iter_records(self, prefix=None):
+        """
+        Read back the completed responses in the order they were recorded.
+
+        Args:
+            prefix (str): Only yield records whose key starts with this prefix.
+
+        Yields:
+            dict: Recorded responses, each with its 'key'.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                # A crash mid-write can leave a truncated last line; that request is simply fetched again
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if prefix is None or record["key"].startswith(prefix):
+                    yield record
+
+    def iter_sorted(self, prefix=None, reverse=False):
+        """
+        Read back the completed responses in key order, holding only their keys and file offsets in memory.
+
+        Args:
+            prefix (str): Only yield records whose key starts with this prefix.
+            reverse (bool): Yield the records in descending key order.
+
+        Yields:
+            dict: Recorded responses, each with its 'key'.
+        """
+        if not os.path.exists(self.path):
+            return
+        offsets = []
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                # The key is the first field of every record
+                if line.startswith(b'{"key":'):
+                    try:
+                        key = json.JSONDecoder().raw_decode(line[7:].decode("utf-8"))[0]
+                    except ValueError:
+                        key = None
+                    if isinstance(key, str) and (prefix is None or key.startswith(prefix)):
+                        offsets.append((key, offset))
+                offset += len(line)
+            offsets.sort(reverse=reverse)
+            for _, offset in offsets:
+                f.seek(offset)
+                try:
+                    yield json.loads(f.readline())
+                except json.JSONDecodeError:
+                    continue
+
+
+class BackfillRequest(object):
+    """
+    A single planned GET request.
+
+    Args:
+        key (str): Stable key identifying the request across runs.
+        endpoint (str): API endpoint, e.g. '/v4/historical/sports/baseball_mlb/odds'.
+        params (dict): Query parameters, without the API key.
+        cost (int): Expected credit cost of the request.
+    """
+
+    def __init__(self, key, endpoint, params, cost=1):
+        self.key = key
+        self.endpoint = endpoint
+        self.params = params
+        self.cost = cost
+
+    def __repr__(self):
+        return f"BackfillRequest({self.key!r})"
+
+
+def fetch(api_key, request, retries=3, backoff=2.0):
+    """
+    Send a planned request, retrying rate-limited and server errors.
+
+    Args:
+        api_key (str): The Odds API key.
+        request (BackfillRequest): The request to send.
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Seconds to wait before the first retry, doubled after every retry.
+
+    Returns:
+        requests.Response: The successful response.
+    """
+    for attempt in range(retries + 1):
+        response = requests.get(HOST + request.endpoint, params={"apiKey": api_key, **request.params})
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            response.raise_for_status()
+            return response
+        time.sleep(backoff * 2 ** attempt)
+
+
+def run(api_key, planned, checkpoint, limiter=None, workers=8):
+    """
+    Execute planned requests concurrently, skipping those already in the checkpoint.
+
+    Args:
+        api_key (str): The Odds API key.
+        planned (list): BackfillRequest objects in priority order.
+        checkpoint (Checkpoint): Checkpoint receiving every response.
+        limiter (QuotaLimiter): Limiter pacing the requests. Defaults to QuotaLimiter().
+        workers (int): Number of concurrent requests.
+
+    Returns:
+        dict: Counts of 'fetched', 'skipped' and 'failed' requests and whether the quota was 'exhausted'.
+    """
+    limiter = limiter or QuotaLimiter()
+    todo = [request for request in planned if not checkpoint.done(request.key)]
+    stats = {"fetched": 0, "skipped": len(planned) - len(todo), "failed": 0, "exhausted": False}
+
+    def execute(request):
+        limiter.acquire(request.cost)
+        response = fetch(api_key, request)
+        limiter.update(response.headers)
+        checkpoint.record(request.key, response.json())
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        queue = iter(todo)
+        while True:
+            # Keep the pool busy without queueing the whole plan, so an exhausted quota stops submissions promptly
+            while not stats["exhausted"] and len(pending) < workers * 2:
+                request = next(queue, None)
+                if request is None:
+                    break
+                future = executor.submit(execute, request)
+                future.request = request
+                pending.add(future)
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                error = future.exception()
+                if error is None:
+                    stats["fetched"] += 1
+                elif isinstance(error, QuotaExhausted):
+                    if not stats["exhausted"]:
+                        print(f"Stopping backfill: {error}")
+                    stats["exhausted"] = True
+                else:
+                    stats["failed"] += 1
+                    print(f"Failed {future.request.key}: {error}")
+
+    print(f"Backfill fetched {stats['fetched']}, skipped {stats['skipped']}, failed {stats['failed']} requests")
+    return stats
+
+
+def plan_timestamps(from_date, to_date, interval_mins, planner=None, held=()):
+    """
+    List the snapshot timestamps to request from to_date back to (but excluding) from_date.
+
+    Args:
+        from_date (str): Start of the range in ISO 8601 format ending in 'Z'.
+        to_date (str): End of the range in ISO 8601 format ending in 'Z'.
+        interval_mins (int): Minutes between snapshots.
+        planner (timestamps.SnapshotPlanner): Planner aligning the timestamps to the snapshot grid. Without
+            observations, timestamps are stepped back from to_date by interval_mins.
+        held (iterable): Timestamps of snapshots already held, which are skipped.
+
+    Returns:
+        list: ISO 8601 timestamps, latest first.
+    """
+    planner = planner or timestamps.SnapshotPlanner()
+    return planner.plan(from_date, to_date, interval_mins, held=held)
+
+
+def observe_checkpoint(planner, checkpoint, prefix):
+    """
+    Teach a planner the snapshots recorded in a checkpoint.
+
+    Args:
+        planner (timestamps.SnapshotPlanner): Planner to teach.
+        checkpoint (Checkpoint): Checkpoint of earlier runs.
+        prefix (str): Key prefix of the records to learn from.
+
+    Returns:
+        set: Snapshot timestamps of the records.
+    """
+    held = set()
+    for record in checkpoint.iter_records(prefix=prefix):
+        planner.observe(record)
+        if record.get("timestamp"):
+            held.add(record["timestamp"])
+    return held
+
+
+def learn_cadence(api_key, sport_key, to_date, planner, checkpoint, limiter, workers=8):
+    """
+    Make sure a planner knows the snapshot grid around to_date, probing with a one-credit events request if not.
+    """
+    if planner.cadence_at(timestamps.parse(to_date)) is not None:
+        return
+    run(api_key, plan_events(sport_key, [to_date]), checkpoint, limiter=limiter, workers=workers)
+    observe_checkpoint(planner, checkpoint, f"events|{sport_key}|{to_date}")
+
+
+def odds_params(regions, bookmakers, markets, odds_format, timestamp):
+    """
+    Build the query parameters of a historical odds request.
+    """
+    params = {"markets": markets, "oddsFormat": odds_format, "date": timestamp}
+    if bookmakers:
+        params["bookmakers"] = bookmakers
+    else:
+        params["regions"] = regions
+    return params
+
+
+def request_scope(regions, bookmakers, markets):
+    """
+    Describe the bookmakers and markets of an odds request, e.g. 'regions=us;markets=h2h,spreads'.
+
+    Part of the checkpoint key of every odds request, so a run for other markets or bookmakers never resumes from
+    responses that do not cover them.
+    """
+    books = f"bookmakers={','.join(sorted(bookmakers.split(',')))}" if bookmakers else \
+        f"regions={','.join(sorted(regions.split(',')))}"
+    return f"{books};markets={','.join(sorted(markets.split(',')))}"
+
+
+def odds_cost(regions, bookmakers, markets):
+    """
+    Estimate the credit cost of a historical odds request: 10 x markets x regions (every 10 bookmakers count as one
+    region).
+    """
+    num_regions = -(-len(bookmakers.split(",")) // 10) if bookmakers else len(regions.split(","))
+    return 10 * len(markets.split(",")) * num_regions
+
+
+def plan_odds(sport_key, regions, bookmakers, markets, odds_format, snapshots):
+    """
+    Plan one historical featured-markets odds request per snapshot timestamp.
+
+    Returns:
+        list: BackfillRequest objects keyed 'odds|<sport>|<scope>|<timestamp>', see request_scope().
+    """
+    cost = odds_cost(regions, bookmakers, markets)
+    scope = request_scope(regions, bookmakers, markets)
+    return [
+        BackfillRequest(f"odds|{sport_key}|{scope}|{timestamp}", f"/v4/historical/sports/{sport_key}/odds",
+                        odds_params(regions, bookmakers, markets, odds_format, timestamp), cost)
+        for timestamp in snapshots
+    ]
+
+
+def plan_events(sport_key, snapshots):
+    """
+    Plan one historical events request per snapshot timestamp.
+
+    Returns:
+        list: BackfillRequest objects keyed 'events|<sport>|<timestamp>'.
+    """
+    return [
+        BackfillRequest(f"events|{sport_key}|{timestamp}", f"/v4/historical/sports/{sport_key}/events",
+                        {"date": timestamp}, 1)
+        for timestamp in snapshots
+    ]
+
+
+def plan_event_odds(sport_key, regions, bookmakers, markets, odds_format, checkpoint, held=()):
+    """
+    Plan one historical event odds request per (timestamp, event) found by the events requests in a checkpoint.
+
+    Args:
+        held (iterable): (timestamp, event id) pairs already held, which are skipped.
+
+    Returns:
+        list: BackfillRequest objects keyed 'event-odds|<sport>|<scope>|<timestamp>|<event id>', see request_scope().
+    """
+    cost = odds_cost(regions, bookmakers, markets)
+    scope = request_scope(regions, bookmakers, markets)
+    planned = []
+    seen = set(held)
+    for record in checkpoint.iter_records(prefix=f"events|{sport_key}|"):
+        # Request the snapshot the events were listed at, so two requested times resolving to the same snapshot
+        # do not fetch the same event odds twice
+        timestamp = record.get("timestamp") or record["key"].split("|")[2]
+        for event in record.get("data", []):
+            if (timestamp, event["id"]) in seen:
+                continue
+            seen.add((timestamp, event["id"]))
+            planned.append(BackfillRequest(
+                f"event-odds|{sport_key}|{scope}|{timestamp}|{event['id']}",
+                f"/v4/historical/sports/{sport_key}/events/{event['id']}/odds",
+                odds_params(regions, bookmakers, markets, odds_format, timestamp), cost))
+    return planned
+
+
+def sync_store(store, checkpoint, prefix, sport_key, regions, bookmakers, markets):
+    """
+    Copy checkpointed responses into a historical store, skipping snapshots it already holds.
+
+    Args:
+        store (store.HistoricalStore): Store receiving the snapshots.
+        checkpoint (Checkpoint): Checkpoint holding the responses.
+        prefix (str): Key prefix of the records to copy, 'odds|<sport>|<scope>|' or 'event-odds|<sport>|<scope>|'.
+
+    Returns:
+        int: Number of snapshots added.
+    """
+    added = 0
+    for record in checkpoint.iter_records(prefix=prefix):
+        if not record.get("timestamp"):
+            continue
+        event_id = record["key"].split("|")[4] if record["key"].startswith("event-odds|") else None
+        if not store.has(sport_key, markets, regions, bookmakers, record["timestamp"], event_id=event_id):
+            store.add(sport_key, markets, regions, bookmakers, record, event_id=event_id)
+            added += 1
+    return added
+
+
+def backfill_odds(api_key, sport_key, regions, bookmakers, markets, odds_format, from_date, to_date, interval_mins,
+                  checkpoint, limiter=None, workers=8, store=None):
+    """
+    Backfill historical featured-markets odds for a sport over a date range.
+
+    Requests are aligned to the snapshot grid, probed once if no earlier run has revealed it, and snapshots already
+    in the checkpoint or the store are never requested again. New snapshots are added to the store.
+
+    Args:
+        store (store.HistoricalStore): Historical store consulted before fetching and updated afterwards.
+
+    Returns:
+        dict: Run statistics, see run().
+    """
+    limiter = limiter or QuotaLimiter()
+    planner = timestamps.SnapshotPlanner()
+    prefix = f"odds|{sport_key}|{request_scope(regions, bookmakers, markets)}|"
+    held = observe_checkpoint(planner, checkpoint, prefix)
+    observe_checkpoint(planner, checkpoint, f"events|{sport_key}|")
+    if store is not None:
+        for timestamp in store.held(sport_key, markets, regions, bookmakers):
+            planner.add(timestamps.parse(timestamp))
+            held.add(timestamp)
+    learn_cadence(api_key, sport_key, to_date, planner, checkpoint, limiter, workers=workers)
+    snapshots = plan_timestamps(from_date, to_date, interval_mins, planner=planner, held=held)
+    planned = plan_odds(sport_key, regions, bookmakers, markets, odds_format, snapshots)
+    stats = run(api_key, planned, checkpoint, limiter=limiter, workers=workers)
+    if store is not None:
+        sync_store(store, checkpoint, prefix, sport_key, regions, bookmakers, markets)
+    return stats
+
+
+def backfill_event_odds(api_key, sport_key, regions, bookmakers, markets, odds_format, from_date, to_date,
+                        interval_mins, checkpoint, limiter=None, workers=8, store=None):
+    """
+    Backfill historical odds of any market for every event of a sport over a date range.
+
+    Events of every timestamp are discovered first; the (timestamp, event) odds requests are then planned from the
+    checkpointed events and executed, skipping those already held by the store.
+
+    Args:
+        store (store.HistoricalStore): Historical store consulted before fetching and updated afterwards.
+
+    Returns:
+        dict: Run statistics of the event odds requests, see run().
+    """
+    limiter = limiter or QuotaLimiter()
+    planner = timestamps.SnapshotPlanner()
+    observe_checkpoint(planner, checkpoint, f"events|{sport_key}|")
+    learn_cadence(api_key, sport_key, to_date, planner, checkpoint, limiter, workers=workers)
+    held = observe_checkpoint(planner, checkpoint, f"events|{sport_key}|")
+    snapshots = plan_timestamps(from_date, to_date, interval_mins, planner=planner, held=held)
+    stats = run(api_key, plan_events(sport_key, snapshots), checkpoint, limiter=limiter, workers=workers)
+    if stats["exhausted"]:
+        return stats
+    held_events = store.held_events(sport_key, markets, regions, bookmakers) if store is not None else ()
+    planned = plan_event_odds(sport_key, regions, bookmakers, markets, odds_format, checkpoint, held=held_events)
+    stats = run(api_key, planned, checkpoint, limiter=limiter, workers=workers)
+    if store is not None:
+        sync_store(store, checkpoint, f"event-odds|{sport_key}|{request_scope(regions, bookmakers, markets)}|",
+                   sport_key, regions, bookmakers, markets)
+    return stats
@@ -0,0 +1,230 @@
+"""
+Adaptive polling cadence by time to commence and live status.
+
+Events are sorted into tiers: live games (commenced and not completed according to scores), games starting within
+the hour, later today, this week, and later. Every tier is polled on its own interval, with only the events it
+covers requested: live games by eventIds, the others by a commenceTimeFrom/commenceTimeTo window relative to now, so
+the windows also discover newly listed events (the nearest one also games already in play on a cold start). When the
+credits all tiers would spend in an hour exceed a budget, every interval is stretched by the same factor so the
+schedule fits it.
+"""
+from datetime import datetime, timedelta, timezone
+
+from pysportsbet import backfill, timestamps
+
+# Seconds between polls of every tier, fastest first
+TIERS = (
+    ("live", 20),
+    ("next_hour", 60),
+    ("today", 600),
+    ("this_week", 3600),
+    ("later", 6 * 3600),
+)
+
+# Hours after commence_time a game missing from scores is no longer polled as live
+MAX_GAME_HOURS = 6
+
+# Commence time windows of the pre-game tiers, in seconds from now; None leaves the window open. The nearest window
+# reaches back MAX_GAME_HOURS, so games already in play when polling starts are discovered and join the live tier
+WINDOWS = {
+    "next_hour": (-MAX_GAME_HOURS * 3600, 3600),
+    "today": (3600, 24 * 3600),
+    "this_week": (24 * 3600, 7 * 24 * 3600),
+    "later": (7 * 24 * 3600, None),
+}
+
+# Usage quota cost of a scores request with daysFrom
+SCORES_COST = 2
+
+# Seconds a tier may be polled ahead of its interval, absorbing the granularity of the polling tick
+TOLERANCE_SECS = 1
+
+
+def live_cost(regions, bookmakers, markets):
+    """
+    Return the usage quota cost of a live odds request: markets x regions, every 10 bookmakers counting as a region.
+    """
+    return backfill.odds_cost(regions, bookmakers, markets) // 10
+
+
+class CadencePolicy(object):
+    """
+    Tiers of the events of one sport and the interval each tier is polled at.
+
+    Args:
+        cost (int): Usage quota cost of one odds request, see live_cost().
+        credits_per_hour (float): Credits the whole schedule may spend per hour. Unlimited if None.
+        tiers (tuple): (tier, seconds) pairs, see TIERS.
+    """
+
+    def __init__(self, cost, credits_per_hour=None, tiers=TIERS):
+        self.cost = cost
+        self.credits_per_hour = credits_per_hour
+        self.tiers = dict(tiers)
+        # Commence times of the known, not completed events keyed by event id
+        self.commence = {}
+        self.completed = set()
+
+    def observe_odds(self, events):
+        """
+        Record the commence times of the events of an odds response.
+        """
+        for event in events:
+            if event["id"] not in self.completed:
+                self.commence[event["id"]] = event["commence_time"]
+
+    def observe_scores(self, scores):
+        """
+        Record the events a scores response reports completed; they are no longer polled.
+        """
+        for event in scores:
+            if event.get("completed"):
+                self.completed.add(event["id"])
+                self.commence.pop(event["id"], None)
+
+    def live(self, now):
+        """
+        Return the ids of the events in play at a time, sorted.
+        """
+        now_ts = timestamps.format_timestamp(now)
+        oldest = timestamps.format_timestamp(now - timedelta(hours=MAX_GAME_HOURS))
+        return sorted(event_id for event_id, commence_time in self.commence.items()
+                      if oldest <= commence_time <= now_ts)
+
+    def intervals(self, now):
+        """
+        Return the interval of every tier to poll at a time, fitted to the credit budget.
+
+        The live tier, and the scores polled alongside it, only count while games are in play.
+
+        Returns:
+            dict: Seconds between polls keyed by tier, and by 'scores' while games are in play.
+        """
+        intervals = {tier: seconds for tier, seconds in self.tiers.items() if tier != "live" or self.live(now)}
+        if "live" in intervals:
+            intervals["scores"] = intervals["live"]
+        hourly = self.hourly_cost(intervals)
+        if self.credits_per_hour is not None and hourly > self.credits_per_hour:
+            stretch = hourly / self.credits_per_hour
+            intervals = {tier: seconds * stretch for tier, seconds in intervals.items()}
+        return intervals
+
+    def hourly_cost(self, intervals):
+        """
+        Return the credits a set of tier intervals spends per hour.
+        """
+        return sum((SCORES_COST if tier == "scores" else self.cost) * 3600 / seconds
+                   for tier, seconds in intervals.items())
+
+    def params(self, tier, now):
+        """
+        Return the query parameters selecting the events of a tier.
+
+        Returns:
+            dict: eventIds for live games and scores, commenceTimeFrom/commenceTimeTo for the other tiers.
+        """
+        if tier in ("live", "scores"):
+            return {"eventIds": ",".join(self.live(now))}
+        start, end = WINDOWS[tier]
+        params = {"commenceTimeFrom": timestamps.format_timestamp(now + timedelta(seconds=start))}
+        if end is not None:
+            params["commenceTimeTo"] = timestamps.format_timestamp(now + timedelta(seconds=end))
+        return params
+
+    def covers(self, tier, event_id, params):
+        """
+        Check whether an event was requested by the parameters of a tier.
+        """
+        if "eventIds" in params:
+            return event_id in params["eventIds"].split(",")
+        commence_time = self.commence.get(event_id)
+        return commence_time is not None and params["commenceTimeFrom"] <= commence_time and (
+            "commenceTimeTo" not in params or commence_time < params["commenceTimeTo"])
+
+
+class AdaptivePoller(object):
+    """
+    Polls the odds of one sport tier by tier, keeping the latest odds of every event.
+
+    Call poll() on a short, regular tick (e.g. from a scheduler job); every call fetches the tiers that are due.
+
+    Args:
+        api_key (str): The Odds API key.
+        sport_key (str): Sport key.
+        regions (str): Comma-separated list of regions.
+        bookmakers (str): Comma-separated list of bookmakers, used instead of regions if set.
+        markets (str): Comma-separated list of markets.
+        odds_format (str): 'american' or 'decimal'.
+        credits_per_hour (float): Credits the schedule may spend per hour. Unlimited if None.
+        limiter (backfill.QuotaLimiter): Limiter pacing requests and tracking the usage quota.
+    """
+
+    def __init__(self, api_key, sport_key, regions, bookmakers, markets, odds_format, credits_per_hour=None,
+                 limiter=None):
+        self.api_key = api_key
+        self.sport_key = sport_key
+        self.regions = regions
+        self.bookmakers = bookmakers
+        self.markets = markets
+        self.odds_format = odds_format
+        self.policy = CadencePolicy(live_cost(regions, bookmakers, markets), credits_per_hour)
+        self.limiter = limiter or backfill.QuotaLimiter()
+        # Latest odds of every event keyed by event id
+        self.events = {}
+        # Time of the last poll of every tier
+        self.last_poll = {}
+
+    def due(self, now):
+        """
+        Return the tiers due at a time.
+        """
+        return [tier for tier, seconds in self.policy.intervals(now).items()
+                if tier not in self.last_poll
+                or (now - self.last_poll[tier]).total_seconds() >= seconds - TOLERANCE_SECS]
+
+    def request(self, tier, params):
+        if tier == "scores":
+            endpoint, cost = f"/v4/sports/{self.sport_key}/scores", SCORES_COST
+            params = dict(params, daysFrom=1)
+        else:
+            endpoint, cost = f"/v4/sports/{self.sport_key}/odds", self.policy.cost
+            params = dict(params, markets=self.markets, oddsFormat=self.odds_format)
+            params.update({"bookmakers": self.bookmakers} if self.bookmakers else {"regions": self.regions})
+        self.limiter.acquire(cost)
+        response = backfill.fetch(self.api_key, backfill.BackfillRequest(tier, endpoint, params, cost))
+        self.limiter.update(response.headers)
+        return response.json()
+
+    def poll(self, now=None):
+        """
+        Fetch every tier that is due.
+
+        Events a tier requested but no longer returns (suspended or taken off the board) are dropped, and games
+        reported completed stop being polled.
+
+        Args:
+            now (datetime.datetime): Current time. Defaults to the current UTC time.
+
+        Returns:
+            list: The tiers fetched.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        polled = []
+        for tier in self.due(now):
+            params = self.policy.params(tier, now)
+            data = self.request(tier, params)
+            self.last_poll[tier] = now
+            polled.append(tier)
+            if tier == "scores":
+                self.policy.observe_scores(data)
+                for event in data:
+                    if event.get("completed"):
+                        self.events.pop(event["id"], None)
+                continue
+            returned = {event["id"] for event in data}
+            for event_id in [event_id for event_id in self.events
+                             if event_id not in returned and self.policy.covers(tier, event_id, params)]:
+                del self.events[event_id]
+            self.policy.observe_odds(data)
+            self.events.update((event["id"], event) for event in data)
+        return polled
@@ -0,0 +1,129 @@
+"""
+Change feed of live odds between polls.
+
+The detector keeps the last known price and point of every outcome in a hash map keyed by event, then
+(bookmaker, market), then outcome, and turns each poll into an ordered list of change records: outcomes that are
+new, whose price or point moved, or that were suspended or removed. Markets whose last_update did not change are
+carried over without looking at their outcomes, so the work done per poll grows with market activity rather than
+with the size of the board.
+
+Outcomes are identified like in the delta log (see delta.outcome_keys): by name and description, with the point
+only added for alternate lines, so a moved spread or total is reported as a point move rather than as one outcome
+removed and another added.
+"""
+import json
+from datetime import datetime, timezone
+
+from pysportsbet import delta, timestamps
+
+# Types of change records
+NEW = "new"
+PRICE = "price"
+POINT = "point"
+REMOVED = "removed"
+
+
+class ChangeDetector(object):
+    """
+    Last known state of every outcome, and the changes of every poll against it.
+    """
+
+    def __init__(self):
+        # {event id: {(book, market): (last_update, {outcome key: (name, description, price, point)})}}
+        self.state = {}
+        self.sports = {}
+
+    def __len__(self):
+        return sum(len(outcomes) for markets in self.state.values() for _, outcomes in markets.values())
+
+    def update(self, events, timestamp=None, scope=None):
+        """
+        Compare a poll against the last known state, record it and return the changes.
+
+        Args:
+            events (list): Events of an odds response.
+            timestamp (str): Time of the poll in ISO 8601 format ending in 'Z'. Defaults to the current time.
+            scope (iterable): Ids of the events the poll requested, e.g. the events of one adaptive tier. Known
+                outcomes of these events missing from the poll are reported removed. All known events if None.
+
+        Returns:
+            list: Change records with 'type' (new, price, point or removed), 'timestamp', 'last_update',
+                'sport_key', 'id', 'book', 'market', 'name', 'description', 'price', 'point', 'previous_price' and
+                'previous_point', in the order of the response followed by removals.
+        """
+        timestamp = timestamp or timestamps.format_timestamp(
+            datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0))
+        changes = []
+        seen = {}
+        for event in events:
+            event_id = event["id"]
+            self.sports[event_id] = event.get("sport_key")
+            known_markets = self.state.get(event_id, {})
+            markets = seen.setdefault(event_id, {})
+            for bookmaker in event.get("bookmakers", []):
+                for market in bookmaker.get("markets", []):
+                    key = (bookmaker["key"], market["key"])
+                    last_update = market.get("last_update", bookmaker.get("last_update"))
+                    known = known_markets.get(key)
+                    if known is not None and known[0] == last_update and last_update is not None:
+                        markets[key] = known
+                        continue
+                    known_outcomes = known[1] if known is not None else {}
+                    outcomes = {}
+                    for outcome_key, outcome in zip(delta.outcome_keys(market["outcomes"]), market["outcomes"]):
+                        value = (outcome["name"], outcome.get("description"), outcome["price"], outcome.get("point"))
+                        outcomes[outcome_key] = value
+                        previous = known_outcomes.get(outcome_key)
+                        if previous is None:
+                            kind = NEW
+                        elif previous[2] != value[2]:
+                            kind = PRICE
+                        elif previous[3] != value[3]:
+                            kind = POINT
+                        else:
+                            continue
+                        changes.append(self._record(kind, timestamp, last_update, event_id, key, value, previous))
+                    for outcome_key, previous in known_outcomes.items():
+                        if outcome_key not in outcomes:
+                            changes.append(self._record(REMOVED, timestamp, last_update, event_id, key, previous,
+                                                        previous))
+                    markets[key] = (last_update, outcomes)
+
+        # Markets missing from a returned event are removed; so are whole events of the scope that were not returned
+        scope = set(self.state if scope is None else scope) | set(seen)
+        for event_id in sorted(scope):
+            known_markets = self.state.get(event_id, {})
+            markets = seen.get(event_id, {})
+            for key, (_, outcomes) in known_markets.items():
+                if key not in markets:
+                    for previous in outcomes.values():
+                        changes.append(self._record(REMOVED, timestamp, None, event_id, key, previous, previous))
+            if event_id not in seen:
+                self.state.pop(event_id, None)
+                self.sports.pop(event_id, None)
+        self.state.update(seen)
+        return changes
+
+    def _record(self, kind, timestamp, last_update, event_id, key, value, previous):
+        return {
+            "type": kind, "timestamp": timestamp, "last_update": last_update,
+            "sport_key": self.sports.get(event_id), "id": event_id, "book": key[0], "market": key[1],
+            "name": value[0], "description": value[1],
+            "price": value[2] if kind != REMOVED else None, "point": value[3] if kind != REMOVED else None,
+            "previous_price": previous[2] if kind != NEW else None,
+            "previous_point": previous[3] if kind != NEW else None,
+        }
+
+
+def write_changes(changes, path):
+    """
+    Append change records to an NDJSON file.
+
+    Args:
+        changes (list): Change records from ChangeDetector.update().
+        path (str): NDJSON file, created if missing.
+    """
+    if not changes:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(change) + "\n" for change in changes)
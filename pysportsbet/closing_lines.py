@@ -0,0 +1,197 @@
+"""
+Batched collection of closing lines.
+
+Events are discovered through the event catalog, which only lists days it has not swept before, and grouped by
+commence_time in a dict. Closing odds are then requested at every event's commence_time: one historical odds request
+per commence_time (with eventIds) for featured markets, or one historical event odds request per event for any other
+market. Requests run concurrently through the
+backfill engine, so they share its quota limiter and its checkpoint: events collected by an earlier run for the same
+markets and bookmakers are never requested again, and only newly collected lines are written to the Parquet output.
+"""
+import os
+
+from pysportsbet import backfill, event_catalog, store
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Writing closing lines to Parquet requires the 'pyarrow' package: pip install pyarrow")
+    return pyarrow
+
+
+def discover_events(api_key, sport_key, from_date, to_date, interval_mins, checkpoint, limiter=None, workers=8,
+                    catalog=None):
+    """
+    List the events commencing between two dates, keeping the latest commence_time seen for every event.
+
+    Days already swept by the catalog cost no /events calls.
+
+    Args:
+        interval_mins (int): Minutes between listings within a day, at most one day.
+        catalog (event_catalog.EventCatalog): Event catalog to consult and update. A new in-memory one if None.
+
+    Returns:
+        dict: Commence times keyed by event id.
+    """
+    catalog = catalog if catalog is not None else event_catalog.EventCatalog()
+    catalog.sweep(api_key, sport_key, from_date, to_date, checkpoint, limiter=limiter, workers=workers,
+                  interval_mins=min(interval_mins, event_catalog.DAY_MINS))
+    return {event["id"]: event["commence_time"] for event in catalog.between(sport_key, from_date, to_date)}
+
+
+def group_by_commence(commence_times):
+    """
+    Group event ids by commence time.
+
+    Args:
+        commence_times (dict): Commence times keyed by event id.
+
+    Returns:
+        dict: Lists of event ids keyed by commence time.
+    """
+    groups = {}
+    for event_id, commence_time in commence_times.items():
+        groups.setdefault(commence_time, []).append(event_id)
+    return groups
+
+
+def key_prefix(sport_key, regions, bookmakers, markets, featured=False):
+    """
+    Return the checkpoint key prefix of the closing-line requests of a sport, markets and bookmakers.
+
+    Featured-market responses (a list of events) and event odds responses (one event) are told apart by the first
+    field, 'closing-odds' or 'closing-event-odds', so they can share a checkpoint.
+
+    Returns:
+        str: Prefix such as 'closing-odds|<sport>|<scope>|', see backfill.request_scope().
+    """
+    kind = "closing-odds" if featured else "closing-event-odds"
+    return f"{kind}|{sport_key}|{backfill.request_scope(regions, bookmakers, markets)}|"
+
+
+def plan_featured(sport_key, regions, bookmakers, markets, odds_format, groups, done=()):
+    """
+    Plan one historical odds request per commence time, for the events commencing then not covered yet.
+
+    The event ids a request covers are the last field of its key, so an event listed after its commence time was
+    collected only costs a request for itself instead of refetching the whole group.
+
+    Args:
+        groups (dict): Lists of event ids keyed by commence time, see group_by_commence().
+        done (iterable): Keys of the completed requests, e.g. Checkpoint.keys.
+
+    Returns:
+        list: BackfillRequest objects keyed '<prefix><commence time>|<event ids>', see key_prefix().
+    """
+    cost = backfill.odds_cost(regions, bookmakers, markets)
+    prefix = key_prefix(sport_key, regions, bookmakers, markets, featured=True)
+    covered = {}
+    for key in done:
+        if key.startswith(prefix):
+            commence_time, event_ids = key[len(prefix):].split("|")
+            covered.setdefault(commence_time, set()).update(event_ids.split(","))
+    planned = []
+    for commence_time, event_ids in sorted(groups.items()):
+        event_ids = sorted(set(event_ids) - covered.get(commence_time, set()))
+        if not event_ids:
+            continue
+        params = backfill.odds_params(regions, bookmakers, markets, odds_format, commence_time)
+        params["eventIds"] = ",".join(event_ids)
+        planned.append(backfill.BackfillRequest(f"{prefix}{commence_time}|{','.join(event_ids)}",
+                                                f"/v4/historical/sports/{sport_key}/odds", params, cost))
+    return planned
+
+
+def plan_any_market(sport_key, regions, bookmakers, markets, odds_format, groups):
+    """
+    Plan one historical event odds request per event, at its commence time.
+
+    Returns:
+        list: BackfillRequest objects keyed '<prefix><commence time>|<event id>', see key_prefix().
+    """
+    cost = backfill.odds_cost(regions, bookmakers, markets)
+    prefix = key_prefix(sport_key, regions, bookmakers, markets)
+    return [
+        backfill.BackfillRequest(f"{prefix}{commence_time}|{event_id}",
+                                 f"/v4/historical/sports/{sport_key}/events/{event_id}/odds",
+                                 backfill.odds_params(regions, bookmakers, markets, odds_format, commence_time), cost)
+        for commence_time, event_ids in sorted(groups.items()) for event_id in event_ids
+    ]
+
+
+def write_part(records, output_dir):
+    """
+    Write the closing lines of checkpointed responses to a new Parquet part file.
+
+    Args:
+        records (list): Historical odds or event odds responses.
+        output_dir (str): Directory of the Parquet dataset.
+
+    Returns:
+        str: Path of the part file, or None if the records held no odds.
+    """
+    frames = []
+    for record in records:
+        data = record.get("data") or []
+        frames.append(store.flatten([data] if isinstance(data, dict) else data, record["timestamp"]))
+    rows = sum(len(frame) for frame in frames)
+    if not rows:
+        return None
+
+    pyarrow = _pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+    existing = [name for name in os.listdir(output_dir) if name.startswith("part-")]
+    path = os.path.join(output_dir, f"part-{len(existing):05d}.parquet")
+    with pyarrow.parquet.ParquetWriter(path, store.schema(pyarrow)) as writer:
+        for frame in frames:
+            if len(frame):
+                writer.write_table(pyarrow.Table.from_pandas(frame, schema=store.schema(pyarrow),
+                                                             preserve_index=False))
+    return path
+
+
+def collect(api_key, sport_key, regions, bookmakers, markets, odds_format, from_date, to_date, interval_mins,
+            checkpoint, output_dir=None, featured=False, limiter=None, workers=8, catalog=None):
+    """
+    Collect the closing lines of every event commencing between two dates.
+
+    Args:
+        api_key (str): The Odds API key.
+        sport_key (str): Sport key (e.g., 'baseball_mlb').
+        regions (str): Comma-separated list of regions.
+        bookmakers (str): Comma-separated list of bookmakers, used instead of regions if set.
+        markets (str): Comma-separated list of markets.
+        odds_format (str): 'american' or 'decimal'.
+        from_date (str): Earliest commence time in ISO 8601 format ending in 'Z'.
+        to_date (str): Latest commence time in ISO 8601 format ending in 'Z'.
+        interval_mins (int): Minutes between event listings within a day.
+        checkpoint (backfill.Checkpoint): Checkpoint shared across runs.
+        output_dir (str): Parquet dataset receiving the newly collected lines. Not written if None.
+        featured (bool): Whether markets are featured markets, which are fetched per commence time instead of per
+            event.
+        limiter (backfill.QuotaLimiter): Limiter pacing the requests.
+        workers (int): Number of concurrent requests.
+        catalog (event_catalog.EventCatalog): Event catalog consulted before listing events.
+
+    Returns:
+        dict: Run statistics of the odds requests, see backfill.run().
+    """
+    limiter = limiter or backfill.QuotaLimiter()
+    commence_times = discover_events(api_key, sport_key, from_date, to_date, interval_mins, checkpoint,
+                                     limiter=limiter, workers=workers, catalog=catalog)
+    groups = group_by_commence(commence_times)
+    if featured:
+        planned = plan_featured(sport_key, regions, bookmakers, markets, odds_format, groups, done=checkpoint.keys)
+    else:
+        planned = plan_any_market(sport_key, regions, bookmakers, markets, odds_format, groups)
+
+    done_before = set(checkpoint.keys)
+    stats = backfill.run(api_key, planned, checkpoint, limiter=limiter, workers=workers)
+    if output_dir is not None:
+        prefix = key_prefix(sport_key, regions, bookmakers, markets, featured=featured)
+        new_records = [record for record in checkpoint.iter_records(prefix=prefix) if record["key"] not in done_before]
+        write_part(new_records, output_dir)
+    return stats
@@ -0,0 +1,130 @@
+"""
+Closing line value (CLV) of placed bets.
+
+Bets are graded against collected closing lines (see pysportsbet.closing_lines) in one vectorized pass: the closing
+markets are devigged with the same math as the EV pipeline (ev.processed_data), every bet is joined to the fair
+closing probability of its outcome, and CLV is the expected value of the bet's price at that probability.
+"""
+import numpy
+import pandas
+
+from pysportsbet import ev
+
+# Columns a batch of bets must have; 'description' (the player of a player prop) is optional
+BET_COLUMNS = ["id", "book_key", "market", "name", "point", "price", "placed_at"]
+
+# Columns identifying an outcome across bookmakers
+OUTCOME_KEYS = ["id", "market", "name", "description", "point"]
+
+# Columns identifying a market to devig, so the Over/Under of each player of a prop market is devigged on its own
+MARKET_KEYS = ["id", "book_key", "market", "description"]
+
+# Columns the closing lines must have for ev.processed_data; 'description' is optional
+CLOSING_COLUMNS = ["id", "sport_key", "sport_title", "commence_time", "home_team", "away_team", "book_key", "market",
+                   "name", "description", "point", "price"]
+
+
+def american_to_decimal(price):
+    """
+    Convert American odds to decimal odds.
+    """
+    price = numpy.asarray(price, dtype=float)
+    return numpy.where(price > 0, 1 + price / 100, 1 + 100 / numpy.abs(price))
+
+
+def devig_closing(closing, devig_method="multiplicative"):
+    """
+    Devig closing lines.
+
+    Args:
+        closing (pandas.DataFrame): Flattened closing lines in American odds, e.g. the Parquet output of
+            closing_lines.collect. Of several snapshots of a market the latest one is used.
+        devig_method (str): Devig method feeding fair_win_dec.
+
+    Returns:
+        pandas.DataFrame: One row per closing outcome with the columns of ev.processed_data.
+    """
+    df = closing if "description" in closing.columns else closing.assign(description=None)
+    if "snapshot" in df.columns:
+        df = df.sort_values("snapshot", kind="stable")
+        latest = df.groupby(["id", "book_key", "market"])["snapshot"].transform("max")
+        df = df.loc[df["snapshot"] == latest]
+        df = df.drop_duplicates(["id", "book_key", "market", "name", "description", "point"], keep="last")
+    df = df[CLOSING_COLUMNS].rename(columns={"name": "position", "price": "line"}).reset_index(drop=True)
+    df["point"] = df["point"].astype(float)
+    df = ev.processed_data(df, devig_method=devig_method, market_keys=MARKET_KEYS)
+    return df.rename(columns={"position": "name", "line": "close_line"})
+
+
+def grade_bets(bets, closing, devig_method="multiplicative", close_book=None):
+    """
+    Compute the closing line value of a batch of bets.
+
+    Args:
+        bets (pandas.DataFrame): Bets with the columns in BET_COLUMNS; price in American odds and placed_at a
+            timestamp. point is NaN for markets without points.
+        closing (pandas.DataFrame): Flattened closing lines in American odds.
+        devig_method (str): Devig method feeding the fair closing probability.
+        close_book (str): Bookmaker whose close is the reference, e.g. 'pinnacle'. 'avg' uses the average fair
+            probability across bookmakers; None uses the close of the bet's own bookmaker.
+
+    Returns:
+        pandas.DataFrame: The bets with close_line (except for 'avg'), close_decimal, close_fair_win_dec, clv_pct
+            (expected value in percent of the stake at the fair closing probability), beat_close (price better than
+            the raw closing price) and beat_fair_close (positive CLV). Bets placed after commence_time or without a
+            matching close get NaN.
+    """
+    missing = [column for column in BET_COLUMNS if column not in bets.columns]
+    if missing:
+        raise ValueError(f"Bets are missing columns: {', '.join(missing)}")
+
+    close = devig_closing(closing, devig_method=devig_method)
+    close = close[OUTCOME_KEYS + ["book_key", "commence_time", "close_line", "fair_win_dec"]]
+    close = close.assign(close_decimal=american_to_decimal(close["close_line"]))
+    if close_book == "avg":
+        # American odds cannot be averaged across the +/-100 gap, so the average close is in decimal odds only
+        keys = OUTCOME_KEYS + ["commence_time"]
+        close = close.groupby(keys, dropna=False, as_index=False)[["close_decimal", "fair_win_dec"]].mean()
+        on = OUTCOME_KEYS
+    elif close_book is not None:
+        close = close.loc[close["book_key"] == close_book].drop(columns="book_key")
+        on = OUTCOME_KEYS
+    else:
+        on = OUTCOME_KEYS + ["book_key"]
+
+    graded = bets if "description" in bets.columns else bets.assign(description=None)
+    graded = graded.copy()
+    graded["point"] = graded["point"].astype(float)
+    graded = graded.merge(close.rename(columns={"fair_win_dec": "close_fair_win_dec"}), how="left", on=on,
+                          validate="m:1")
+
+    placed_at = pandas.to_datetime(graded["placed_at"], utc=True).dt.tz_localize(None)
+    commence_time = pandas.to_datetime(graded["commence_time"], utc=True).dt.tz_localize(None)
+    valid = graded["close_fair_win_dec"].notna() & (placed_at <= commence_time)
+
+    bet_decimal = american_to_decimal(graded["price"])
+    close_decimal = graded["close_decimal"].to_numpy()
+    graded["clv_pct"] = numpy.where(valid, (bet_decimal * graded["close_fair_win_dec"] - 1) * 100, numpy.nan)
+    graded["beat_close"] = pandas.Series(bet_decimal > close_decimal, index=graded.index).where(valid)
+    graded["beat_fair_close"] = pandas.Series(graded["clv_pct"] > 0, index=graded.index).where(valid)
+    return graded
+
+
+def summarize(graded, by=None):
+    """
+    Summarize graded bets.
+
+    Args:
+        graded (pandas.DataFrame): Output of grade_bets.
+        by (list): Columns to group by, e.g. ['book_key'] or ['market']. One overall row if None.
+
+    Returns:
+        pandas.DataFrame: Number of bets, graded bets, mean clv_pct and beat-the-close rates.
+    """
+    df = graded.assign(graded=graded["clv_pct"].notna(), beat_close=graded["beat_close"].astype(float),
+                       beat_fair_close=graded["beat_fair_close"].astype(float))
+    aggregations = dict(bets=("clv_pct", "size"), graded=("graded", "sum"), clv_pct=("clv_pct", "mean"),
+                        beat_close_rate=("beat_close", "mean"), beat_fair_close_rate=("beat_fair_close", "mean"))
+    if by is None:
+        return df.assign(_all="all").groupby("_all").agg(**aggregations).reset_index(drop=True)
+    return df.groupby(by, dropna=False).agg(**aggregations).reset_index()
@@ -0,0 +1,359 @@
+"""
+Date-sharded historical collection across processes and machines.
+
+A backfill's date range is split into shards recorded in a SQLite work queue. Any number of worker processes, on one
+machine or several sharing a filesystem, claim shards with a lease, backfill them with the concurrent backfill engine
+and mark them done. A worker renews its lease while it backfills a shard, so a shard taking longer than the lease is
+not claimed twice, and a shard whose worker dies is reclaimed once its lease expires. A shard with failed requests goes
+back to the queue behind the others with an exponential backoff, and is marked failed after MAX_ATTEMPTS claims.
+Workers draw credits from a quota
+budget held in the same database, so all of them together never exceed it, and every worker writes its snapshots
+into one shared HistoricalStore, recording them in a manifest of its own.
+
+The queue uses SQLite's rollback journal rather than WAL, which needs shared memory and does not work over network
+filesystems; machines sharing a queue still need a filesystem with working POSIX locks.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from pysportsbet import backfill, store, timestamps
+
+# Seconds a claimed shard stays leased to its worker
+LEASE_SECS = 3600
+
+# Leases are renewed after this fraction of their length, leaving time for a slow renewal
+RENEW_FRACTION = 1 / 3
+
+# Claims of a shard before it is marked failed
+MAX_ATTEMPTS = 3
+
+# Seconds a shard with failed requests waits before its first retry, doubled on every further attempt
+RETRY_SECS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    sport TEXT NOT NULL,
+    from_date TEXT NOT NULL,
+    to_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    leased_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (sport, from_date, to_date)
+);
+CREATE TABLE IF NOT EXISTS quota (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    budget INTEGER,
+    spent INTEGER NOT NULL DEFAULT 0,
+    remaining INTEGER,
+    min_remaining INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class WorkQueue(object):
+    """
+    SQLite-backed queue of backfill shards and the shared quota budget.
+
+    Args:
+        path (str): SQLite database file, created if missing.
+        timeout (float): Seconds to wait for a lock held by another worker.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        # WAL needs shared memory between the processes, which network filesystems do not provide
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute("INSERT OR IGNORE INTO quota (id) VALUES (1)")
+
+    def close(self):
+        self.connection.close()
+
+    def add_shards(self, sport_key, from_date, to_date, shard_hours=24):
+        """
+        Split a date range into shards and queue the ones not queued yet.
+
+        Args:
+            sport_key (str): Sport key.
+            from_date (str): Start of the range in ISO 8601 format ending in 'Z' (exclusive, like backfills).
+            to_date (str): End of the range in ISO 8601 format ending in 'Z'.
+            shard_hours (int): Hours per shard.
+
+        Returns:
+            int: Number of shards added.
+        """
+        start, end = timestamps.parse(from_date), timestamps.parse(to_date)
+        shards = []
+        while start < end:
+            stop = min(start + timedelta(hours=shard_hours), end)
+            shards.append((sport_key, timestamps.format_timestamp(start), timestamps.format_timestamp(stop)))
+            start = stop
+        before = self.connection.total_changes
+        self.connection.executemany("INSERT OR IGNORE INTO shards (sport, from_date, to_date) VALUES (?, ?, ?)", shards)
+        return self.connection.total_changes - before
+
+    def set_budget(self, budget=None, min_remaining=0):
+        """
+        Set the credits all workers may spend together, and the remaining usage quota to keep.
+        """
+        self.connection.execute("UPDATE quota SET budget = ?, min_remaining = ? WHERE id = 1", (budget, min_remaining))
+
+    def claim(self, worker, lease_secs=LEASE_SECS):
+        """
+        Lease the next pending shard, or a running shard whose lease expired.
+
+        Shards claimed fewer times come first, latest first among them; shards waiting for a retry are skipped.
+
+        Args:
+            worker (str): Name of the claiming worker.
+            lease_secs (float): Seconds until the shard may be claimed by another worker.
+
+        Returns:
+            dict: The claimed shard ('id', 'sport', 'from_date', 'to_date'), or None if no shard is available.
+        """
+        now = time.time()
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            row = cursor.execute(
+                "SELECT id, sport, from_date, to_date FROM shards "
+                "WHERE (status = 'pending' AND COALESCE(leased_until, 0) <= ?) "
+                "OR (status = 'running' AND leased_until < ?) "
+                "ORDER BY attempts, to_date DESC LIMIT 1", (now, now)).fetchone()
+            if row is not None:
+                cursor.execute("UPDATE shards SET status = 'running', worker = ?, leased_until = ?, "
+                               "attempts = attempts + 1 WHERE id = ?", (worker, now + lease_secs, row[0]))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return dict(zip(["id", "sport", "from_date", "to_date"], row))
+
+    def renew(self, shard_id, worker, lease_secs=LEASE_SECS):
+        """
+        Extend the lease of a shard the worker is running.
+
+        Returns:
+            bool: Whether the lease was extended; False if the shard was finished or claimed by another worker.
+        """
+        cursor = self.connection.execute(
+            "UPDATE shards SET leased_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease_secs, shard_id, worker))
+        return cursor.rowcount == 1
+
+    def finish(self, shard_id, status="done"):
+        """
+        Mark a claimed shard 'done', 'pending' (to be retried) or 'failed'.
+        """
+        self.connection.execute("UPDATE shards SET status = ?, leased_until = NULL WHERE id = ?", (status, shard_id))
+
+    def retry(self, shard_id, max_attempts=MAX_ATTEMPTS, retry_secs=RETRY_SECS):
+        """
+        Return a shard with failed requests to the queue, or mark it failed once it was claimed max_attempts times.
+
+        A pending shard's leased_until holds the time it may be claimed again: retry_secs after the first attempt,
+        doubled on every further one.
+
+        Returns:
+            str: The new status, 'pending' or 'failed'.
+        """
+        self.connection.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "leased_until = ? * (1 << (attempts - 1)) + ? WHERE id = ?",
+            (max_attempts, retry_secs, time.time(), shard_id))
+        return self.connection.execute("SELECT status FROM shards WHERE id = ?", (shard_id,)).fetchone()[0]
+
+    def release(self, shard_id):
+        """
+        Return a claimed shard to the queue without counting the attempt, e.g. when the budget ran out.
+        """
+        self.connection.execute("UPDATE shards SET status = 'pending', leased_until = NULL, attempts = attempts - 1 "
+                                "WHERE id = ?", (shard_id,))
+
+    def counts(self):
+        """
+        Count the shards of every status.
+        """
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+
+    def reserve(self, cost):
+        """
+        Atomically draw credits from the shared budget.
+
+        Returns:
+            bool: Whether the credits were granted.
+        """
+        cursor = self.connection.execute(
+            "UPDATE quota SET spent = spent + ? WHERE id = 1 "
+            "AND (budget IS NULL OR spent + ? <= budget) "
+            "AND (remaining IS NULL OR remaining - ? >= min_remaining)", (cost, cost, cost))
+        return cursor.rowcount == 1
+
+    def report_remaining(self, remaining):
+        """
+        Record the remaining usage quota reported by the API, keeping the lowest report.
+        """
+        self.connection.execute("UPDATE quota SET remaining = MIN(COALESCE(remaining, ?), ?) WHERE id = 1",
+                                (remaining, remaining))
+
+
+class SharedQuotaLimiter(backfill.QuotaLimiter):
+    """
+    Quota limiter drawing credits from a WorkQueue's budget shared by every worker.
+
+    Each worker still paces its own requests at requests_per_second.
+    """
+
+    def __init__(self, queue, requests_per_second=5):
+        super().__init__(requests_per_second)
+        self.queue = queue
+
+    def acquire(self, cost=1):
+        with self._lock:
+            granted = self.queue.reserve(cost)
+        if not granted:
+            raise backfill.QuotaExhausted("Shared credit budget exhausted")
+        super().acquire(cost)
+
+    def update(self, headers):
+        super().update(headers)
+        if self.requests_remaining is not None:
+            with self._lock:
+                self.queue.report_remaining(self.requests_remaining)
+
+
+class LeaseRenewer(object):
+    """
+    Context manager renewing the lease of a claimed shard from a background thread while its worker runs it.
+
+    Args:
+        queue_path (str): SQLite work queue.
+        shard_id (int): Id of the claimed shard.
+        worker (str): Name of the worker holding the shard.
+        lease_secs (float): Seconds every renewal extends the lease by.
+    """
+
+    def __init__(self, queue_path, shard_id, worker, lease_secs=LEASE_SECS):
+        self.queue_path = queue_path
+        self.shard_id = shard_id
+        self.worker = worker
+        self.lease_secs = lease_secs
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        queue = WorkQueue(self.queue_path)
+        try:
+            while not self._stop.wait(self.lease_secs * RENEW_FRACTION):
+                if not queue.renew(self.shard_id, self.worker, self.lease_secs):
+                    print(f"Worker {self.worker} lost the lease of shard {self.shard_id}")
+                    break
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def work(queue_path, api_key, regions, bookmakers, markets, odds_format, interval_mins, store_dir, checkpoint_dir,
+         workers=8, requests_per_second=5, worker=None, lease_secs=LEASE_SECS):
+    """
+    Claim and backfill shards until none is left or the shared budget runs out.
+
+    Args:
+        queue_path (str): SQLite work queue.
+        api_key (str): The Odds API key.
+        regions (str): Comma-separated list of regions.
+        bookmakers (str): Comma-separated list of bookmakers, used instead of regions if set.
+        markets (str): Comma-separated list of markets.
+        odds_format (str): 'american' or 'decimal'.
+        interval_mins (int): Minutes between snapshots.
+        store_dir (str): HistoricalStore shared by all workers.
+        checkpoint_dir (str): Directory of the per-shard checkpoints.
+        workers (int): Concurrent requests within this worker.
+        requests_per_second (float): Request rate of this worker.
+        worker (str): Name of this worker. Defaults to host name and process id.
+        lease_secs (float): Seconds a shard stays leased without renewal; leases are renewed while it runs.
+
+    Returns:
+        int: Number of shards completed by this worker.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(queue_path)
+    limiter = SharedQuotaLimiter(queue, requests_per_second)
+    historical = store.HistoricalStore(store_dir, writer=worker)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    completed = 0
+    try:
+        while True:
+            shard = queue.claim(worker, lease_secs=lease_secs)
+            if shard is None:
+                break
+            name = f"{shard['sport']}-{shard['from_date']}-{shard['to_date']}".replace(":", "")
+            checkpoint = backfill.Checkpoint(os.path.join(checkpoint_dir, name + ".ndjson"))
+            with LeaseRenewer(queue_path, shard["id"], worker, lease_secs=lease_secs):
+                stats = backfill.backfill_odds(api_key, shard["sport"], regions, bookmakers, markets, odds_format,
+                                               shard["from_date"], shard["to_date"], interval_mins, checkpoint,
+                                               limiter=limiter, workers=workers, store=historical)
+            if stats["exhausted"]:
+                queue.release(shard["id"])
+                break
+            if stats["failed"]:
+                queue.retry(shard["id"])
+            else:
+                queue.finish(shard["id"])
+                completed += 1
+    finally:
+        queue.close()
+    print(f"Worker {worker} completed {completed} shards")
+    return completed
+
+
+def collect(queue_path, api_key, sport_key, regions, bookmakers, markets, odds_format, from_date, to_date,
+            interval_mins, store_dir, checkpoint_dir, processes=None, shard_hours=24, budget=None, min_remaining=0,
+            workers=8, requests_per_second=5):
+    """
+    Queue a date range and backfill it with a pool of local worker processes.
+
+    More machines can join by calling work() with the same queue, store and checkpoint paths.
+
+    Args:
+        processes (int): Number of worker processes. Defaults to the number of CPUs.
+        shard_hours (int): Hours per shard.
+        budget (int): Credits all workers may spend together. Unlimited if None.
+        min_remaining (int): Remaining usage quota to keep.
+
+    Returns:
+        dict: Number of shards of every status.
+    """
+    queue = WorkQueue(queue_path)
+    queue.add_shards(sport_key, from_date, to_date, shard_hours=shard_hours)
+    queue.set_budget(budget, min_remaining)
+    queue.close()
+
+    processes = processes or os.cpu_count() or 1
+    args = (queue_path, api_key, regions, bookmakers, markets, odds_format, interval_mins, store_dir, checkpoint_dir,
+            workers, requests_per_second)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for future in [executor.submit(work, *args) for _ in range(processes)]:
+            future.result()
+
+    queue = WorkQueue(queue_path)
+    counts = queue.counts()
+    queue.close()
+    return counts
@@ -0,0 +1,361 @@
+"""
+Delta-encoded storage of consecutive historical snapshots.
+
+Consecutive snapshots are mostly identical: between two 5-minute snapshots only a handful of markets move. A delta
+log keeps one keyframe per event (the event as first seen, with every bookmaker) and afterwards only the
+(event, book, market) entries whose last_update or outcomes changed, plus records for markets and events that
+disappear. Any snapshot can be reconstructed by replaying the log up to its timestamp, and the log itself is a
+compact history of price changes.
+
+Every KEYFRAME_SNAPSHOTS snapshots the log starts a new segment: a 'reset' record followed by a keyframe of every
+event, which replays without anything written before it. A '<log>.index.json' sidecar lists the snapshot and file
+offset of every segment (in gzip logs every segment is its own gzip member), so reconstruct() seeks to the nearest
+segment instead of replaying the log from the start.
+
+The log is NDJSON, optionally gzip compressed (.gz), with one record per line:
+
+    {"type": "keyframe", "snapshot": ..., "event": {...}}
+    {"type": "market", "snapshot": ..., "id": ..., "book": ..., "book_title": ..., "book_last_update": ...,
+     "market": {...}}
+    {"type": "book", "snapshot": ..., "id": ..., "book": ..., "book_title": ..., "book_last_update": ...}
+    {"type": "remove", "snapshot": ..., "id": ..., "book": ..., "market": ...}
+    {"type": "drop", "snapshot": ..., "id": ...}
+    {"type": "snapshot", "snapshot": ...}
+    {"type": "reset", "snapshot": ...}
+
+Every encoded snapshot ends with a 'snapshot' record, so snapshots without any change are still reconstructable.
+"""
+import gzip
+import json
+import os
+from bisect import bisect_right
+
+import pandas
+
+from pysportsbet import readers
+
+# Snapshots per log segment; every segment starts with a keyframe of every event (a day of 5-minute snapshots)
+KEYFRAME_SNAPSHOTS = 288
+
+# Suffix of the sidecar listing the snapshot and file offset of every segment
+INDEX_SUFFIX = ".index.json"
+
+
+def outcome_keys(outcomes):
+    """
+    Key the outcomes of a market.
+
+    Outcomes are keyed by name and description; the point is only added when a market lists the same name more than
+    once (alternate lines), so a moved spread or total still matches its previous price.
+
+    Args:
+        outcomes (list): Outcomes of one market.
+
+    Returns:
+        list: Hashable keys, one per outcome.
+    """
+    names = [(outcome["name"], outcome.get("description")) for outcome in outcomes]
+    if len(set(names)) == len(names):
+        return names
+    return [name + (outcome.get("point"),) for name, outcome in zip(names, outcomes)]
+
+
+class EventState(object):
+    """
+    Reconstructed state of one event: its fields and the latest market of every (book, market).
+    """
+
+    def __init__(self, event):
+        self.fields = {key: value for key, value in event.items() if key != "bookmakers"}
+        # Bookmaker fields keyed by book, markets keyed by (book, market), both in order of appearance
+        self.books = {}
+        self.markets = {}
+        for bookmaker in event.get("bookmakers", []):
+            self.set_book(bookmaker["key"], bookmaker.get("title"), bookmaker.get("last_update"))
+            for market in bookmaker.get("markets", []):
+                self.markets[(bookmaker["key"], market["key"])] = market
+
+    def set_book(self, book, title, last_update):
+        self.books[book] = {"key": book, "title": title, "last_update": last_update}
+
+    def to_event(self):
+        """
+        Rebuild the event in the shape of an Odds API odds response.
+        """
+        bookmakers = {book: dict(fields, markets=[]) for book, fields in self.books.items()}
+        for (book, _), market in self.markets.items():
+            bookmakers[book]["markets"].append(market)
+        return dict(self.fields, bookmakers=[bookmaker for bookmaker in bookmakers.values() if bookmaker["markets"]])
+
+
+class DeltaEncoder(object):
+    """
+    Turns a sequence of snapshots into delta records.
+    """
+
+    def __init__(self):
+        self.events = {}
+
+    def encode(self, response):
+        """
+        Encode one snapshot against the previous ones.
+
+        Args:
+            response (dict): Historical odds response with 'timestamp' and 'data'. Snapshots must be encoded in
+                timestamp order.
+
+        Returns:
+            list: Delta records, ending with a 'snapshot' record.
+        """
+        snapshot = response["timestamp"]
+        data = response.get("data") or []
+        records = []
+        seen = set()
+        for event in [data] if isinstance(data, dict) else data:
+            seen.add(event["id"])
+            state = self.events.get(event["id"])
+            fields = {key: value for key, value in event.items() if key != "bookmakers"}
+            if state is None or state.fields != fields:
+                # New events, and events whose details (e.g. commence_time) changed, get a fresh keyframe
+                self.events[event["id"]] = EventState(event)
+                records.append({"type": "keyframe", "snapshot": snapshot, "event": event})
+                continue
+            records.extend(self.encode_event(snapshot, state, event))
+
+        for event_id in [event_id for event_id in self.events if event_id not in seen]:
+            del self.events[event_id]
+            records.append({"type": "drop", "snapshot": snapshot, "id": event_id})
+        records.append({"type": "snapshot", "snapshot": snapshot})
+        return records
+
+    def encode_event(self, snapshot, state, event):
+        records = []
+        event_id = event["id"]
+        present = set()
+        for bookmaker in event.get("bookmakers", []):
+            book = bookmaker["key"]
+            book_fields = {"key": book, "title": bookmaker.get("title"), "last_update": bookmaker.get("last_update")}
+            changed_book = state.books.get(book) != book_fields
+            state.books[book] = book_fields
+            header = {"id": event_id, "book": book, "book_title": book_fields["title"],
+                      "book_last_update": book_fields["last_update"]}
+            for market in bookmaker.get("markets", []):
+                present.add((book, market["key"]))
+                previous = state.markets.get((book, market["key"]))
+                if previous is not None and previous.get("last_update") == market.get("last_update") \
+                        and previous == market:
+                    continue
+                state.markets[(book, market["key"])] = market
+                records.append(dict({"type": "market", "snapshot": snapshot, "market": market}, **header))
+                changed_book = False
+            if changed_book:
+                records.append(dict({"type": "book", "snapshot": snapshot}, **header))
+
+        for book, market_key in [key for key in state.markets if key not in present]:
+            del state.markets[(book, market_key)]
+            records.append({"type": "remove", "snapshot": snapshot, "id": event_id, "book": book,
+                            "market": market_key})
+        return records
+
+
+class DeltaDecoder(object):
+    """
+    Replays delta records into snapshots.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self.timestamp = None
+
+    def apply(self, record):
+        """
+        Apply one delta record to the reconstructed state.
+        """
+        kind = record["type"]
+        self.timestamp = record["snapshot"]
+        if kind == "reset":
+            self.events = {}
+        elif kind == "keyframe":
+            self.events[record["event"]["id"]] = EventState(record["event"])
+        elif kind == "drop":
+            self.events.pop(record["id"], None)
+        elif kind in ("market", "book"):
+            state = self.events[record["id"]]
+            state.set_book(record["book"], record["book_title"], record["book_last_update"])
+            if kind == "market":
+                state.markets[(record["book"], record["market"]["key"])] = record["market"]
+        elif kind == "remove":
+            self.events[record["id"]].markets.pop((record["book"], record["market"]), None)
+
+    def snapshot(self):
+        """
+        Return the current state as a historical odds response.
+        """
+        return {"timestamp": self.timestamp, "data": [state.to_event() for state in self.events.values()]}
+
+
+def count_markets(event):
+    """
+    Count the (book, market) entries of an event.
+    """
+    return sum(len(bookmaker.get("markets", [])) for bookmaker in event.get("bookmakers", []))
+
+
+def write_deltas(snapshots, path, keyframe_snapshots=KEYFRAME_SNAPSHOTS):
+    """
+    Delta-encode snapshots into a new log, with its segment index sidecar.
+
+    Args:
+        snapshots (iterable): Historical odds responses in timestamp order.
+        path (str): Path of the log ending in '.ndjson' or '.jsonl', plus '.gz' to compress it.
+        keyframe_snapshots (int): Snapshots per segment.
+
+    Returns:
+        dict: Number of 'snapshots', 'records' and 'markets' written against the 'full_markets' a full copy holds.
+    """
+    encoder = DeltaEncoder()
+    stats = {"snapshots": 0, "records": 0, "markets": 0, "full_markets": 0}
+    index = []
+    compressed = path.endswith(".gz")
+    with open(path, "wb") as raw:
+        stream = None
+        for response in snapshots:
+            records = []
+            if stats["snapshots"] % keyframe_snapshots == 0:
+                if compressed and stream is not None:
+                    stream.close()
+                index.append([response["timestamp"], raw.tell()])
+                stream = gzip.GzipFile(fileobj=raw, mode="wb") if compressed else raw
+                # Forget the encoded state, so every event of the snapshot gets a keyframe
+                encoder.events = {}
+                records.append({"type": "reset", "snapshot": response["timestamp"]})
+            records.extend(encoder.encode(response))
+            stats["snapshots"] += 1
+            stats["records"] += len(records)
+            stats["full_markets"] += sum(len(state.markets) for state in encoder.events.values())
+            stats["markets"] += sum(
+                count_markets(record["event"]) if record["type"] == "keyframe" else record["type"] == "market"
+                for record in records)
+            stream.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode())
+        if compressed and stream is not None:
+            stream.close()
+
+    temporary = path + INDEX_SUFFIX + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(temporary, path + INDEX_SUFFIX)
+    return stats
+
+
+def iter_log(path, offset=0):
+    """
+    Read the records of a delta log from a file offset, e.g. the start of a segment.
+
+    Yields:
+        dict: Delta records.
+    """
+    with open(path, "rb") as raw:
+        raw.seek(offset)
+        stream = gzip.GzipFile(fileobj=raw, mode="rb") if path.endswith(".gz") else raw
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_snapshots(path):
+    """
+    Reconstruct every snapshot stored in a delta log, in order.
+
+    Yields:
+        dict: Historical odds responses with 'timestamp' and 'data'.
+    """
+    decoder = DeltaDecoder()
+    for record in readers.iter_records(path):
+        decoder.apply(record)
+        if record["type"] == "snapshot":
+            yield decoder.snapshot()
+
+
+def segment_offset(path, timestamp):
+    """
+    Return the file offset of the last segment starting at or before a timestamp.
+
+    Returns:
+        int: Offset to replay from; 0 if the log has no index sidecar, None if the log starts after the timestamp.
+    """
+    if not os.path.exists(path + INDEX_SUFFIX):
+        return 0
+    with open(path + INDEX_SUFFIX, encoding="utf-8") as f:
+        index = json.load(f)
+    position = bisect_right([snapshot for snapshot, _ in index], timestamp) - 1
+    return index[position][1] if position >= 0 else None
+
+
+def reconstruct(path, timestamp):
+    """
+    Reconstruct the latest snapshot at or before a timestamp, replaying from the nearest segment.
+
+    Args:
+        path (str): Delta log.
+        timestamp (str): ISO 8601 timestamp ending in 'Z'.
+
+    Returns:
+        dict: Historical odds response, or None if the log starts after the timestamp.
+    """
+    offset = segment_offset(path, timestamp)
+    if offset is None:
+        return None
+    decoder = DeltaDecoder()
+    result = None
+    for record in iter_log(path, offset):
+        if record["snapshot"] > timestamp:
+            break
+        decoder.apply(record)
+        if record["type"] == "snapshot":
+            result = decoder.snapshot()
+    return result
+
+
+def price_changes(path):
+    """
+    Export the price change log of a delta log: one row per outcome whose price or point changed.
+
+    The first quote of every outcome is included with an empty previous_price.
+
+    Args:
+        path (str): Delta log.
+
+    Returns:
+        pandas.DataFrame: Rows of snapshot, id, book_key, market, last_update, name, description, point, price,
+            previous_point and previous_price.
+    """
+    latest = {}
+    rows = []
+
+    def market_rows(snapshot, event_id, book, market):
+        outcomes = market.get("outcomes", [])
+        for key, outcome in zip(outcome_keys(outcomes), outcomes):
+            full_key = (event_id, book, market["key"]) + key
+            previous = latest.get(full_key)
+            current = (outcome.get("point"), outcome["price"])
+            if previous == current:
+                continue
+            latest[full_key] = current
+            rows.append((snapshot, event_id, book, market["key"], market.get("last_update"), outcome["name"],
+                         outcome.get("description"), current[0], current[1],
+                         previous[0] if previous else None, previous[1] if previous else None))
+
+    for record in readers.iter_records(path):
+        if record["type"] == "keyframe":
+            event = record["event"]
+            for bookmaker in event.get("bookmakers", []):
+                for market in bookmaker.get("markets", []):
+                    market_rows(record["snapshot"], event["id"], bookmaker["key"], market)
+        elif record["type"] == "market":
+            market_rows(record["snapshot"], record["id"], record["book"], record["market"])
+
+    return pandas.DataFrame(rows, columns=[
+        "snapshot", "id", "book_key", "market", "last_update", "name", "description", "point", "price",
+        "previous_point", "previous_price",
+    ])
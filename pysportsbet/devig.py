@@ -0,0 +1,192 @@
+"""
+Vectorized devigging of bookmaker markets.
+
+Every method works on the implied win probabilities of all outcomes of all markets at once. Markets are identified
+by integer group codes, so per-market sums are a single ``numpy.bincount`` and the root-finding methods (power and
+Shin) iterate on every market simultaneously instead of solving one market at a time.
+"""
+import numpy
+import pandas
+
+# Devig methods in the order their columns are added to a Dataframe
+DEVIG_METHODS = ["multiplicative", "additive", "power", "shin", "worst_case"]
+
+# Default keys identifying a single market of a single bookmaker
+MARKET_KEYS = ["id", "book_key", "market"]
+
+
+def group_codes(df, keys=None):
+    """
+    Assign an integer code to every market in a Dataframe.
+
+    Args:
+        df (pandas.DataFrame): Dataframe with one row per outcome.
+        keys (list): Columns identifying a market. Defaults to MARKET_KEYS.
+
+    Returns:
+        tuple: Array of group codes (one per row) and the number of groups.
+    """
+    codes = df.groupby(keys or MARKET_KEYS, sort=False, dropna=False).ngroup().to_numpy()
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    return codes, n_groups
+
+
+def _group_sum(values, codes, n_groups):
+    return numpy.bincount(codes, weights=values, minlength=n_groups)
+
+
+def multiplicative(implied, codes, n_groups):
+    """
+    Scale every implied probability by the market's overround.
+
+    Args:
+        implied (numpy.ndarray): Implied win probabilities including the vig.
+        codes (numpy.ndarray): Market group code of every outcome.
+        n_groups (int): Number of markets.
+
+    Returns:
+        numpy.ndarray: Fair win probabilities.
+    """
+    return implied / _group_sum(implied, codes, n_groups)[codes]
+
+
+def additive(implied, codes, n_groups):
+    """
+    Subtract an equal share of the overround from every outcome of a market.
+
+    Args:
+        implied (numpy.ndarray): Implied win probabilities including the vig.
+        codes (numpy.ndarray): Market group code of every outcome.
+        n_groups (int): Number of markets.
+
+    Returns:
+        numpy.ndarray: Fair win probabilities. Heavy longshots can come out negative.
+    """
+    overround = _group_sum(implied, codes, n_groups) - 1
+    num_outcomes = numpy.bincount(codes, minlength=n_groups)
+    return implied - (overround / num_outcomes)[codes]
+
+
+def power(implied, codes, n_groups, tol=1e-12, max_iter=100):
+    """
+    Find the exponent k of every market such that the implied probabilities raised to k sum to one.
+
+    Newton's method is run on all markets at once. Sum(q^k) - 1 is convex and decreasing in k, so starting from k = 1
+    the iterates approach the root monotonically for overround markets.
+
+    Args:
+        implied (numpy.ndarray): Implied win probabilities including the vig.
+        codes (numpy.ndarray): Market group code of every outcome.
+        n_groups (int): Number of markets.
+        tol (float): Stop once every market's probabilities sum to one within this tolerance.
+        max_iter (int): Maximum number of Newton iterations.
+
+    Returns:
+        numpy.ndarray: Fair win probabilities.
+    """
+    log_implied = numpy.log(implied)
+    k = numpy.ones(n_groups)
+    active = numpy.bincount(codes, minlength=n_groups) > 1
+    for _ in range(max_iter):
+        powered = numpy.exp(k[codes] * log_implied)
+        error = _group_sum(powered, codes, n_groups) - 1
+        if not numpy.any(active & (numpy.abs(error) > tol)):
+            break
+        slope = _group_sum(powered * log_implied, codes, n_groups)
+        step = numpy.divide(error, slope, out=numpy.zeros(n_groups), where=active & (slope != 0))
+        k = numpy.maximum(k - step, 1e-6)
+
+    fair = numpy.exp(k[codes] * log_implied)
+    # Single-outcome markets have no root, fall back to the multiplicative result
+    return numpy.where(active[codes], fair, multiplicative(implied, codes, n_groups))
+
+
+def shin(implied, codes, n_groups, iterations=60):
+    """
+    Solve Shin's insider-trading model for the proportion of insider money z of every market.
+
+    Bisection on z in [0, 1) is run on all markets at once; the sum of Shin probabilities is decreasing in z, so
+    every market halves its bracket on each iteration.
+
+    Args:
+        implied (numpy.ndarray): Implied win probabilities including the vig.
+        codes (numpy.ndarray): Market group code of every outcome.
+        n_groups (int): Number of markets.
+        iterations (int): Number of bisection steps.
+
+    Returns:
+        numpy.ndarray: Fair win probabilities.
+    """
+    booksum = _group_sum(implied, codes, n_groups)
+    scaled_sq = implied ** 2 / booksum[codes]
+
+    def probabilities(z):
+        z_row = z[codes]
+        return (numpy.sqrt(z_row ** 2 + 4 * (1 - z_row) * scaled_sq) - z_row) / (2 * (1 - z_row))
+
+    low = numpy.zeros(n_groups)
+    high = numpy.full(n_groups, 1 - 1e-9)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        too_high = _group_sum(probabilities(mid), codes, n_groups) > 1
+        low = numpy.where(too_high, mid, low)
+        high = numpy.where(too_high, high, mid)
+
+    fair = probabilities((low + high) / 2)
+    fair = fair / _group_sum(fair, codes, n_groups)[codes]
+    # Markets without an overround (or with a single outcome) have no insider share to solve for
+    solvable = (booksum > 1) & (numpy.bincount(codes, minlength=n_groups) > 1)
+    return numpy.where(solvable[codes], fair, multiplicative(implied, codes, n_groups))
+
+
+def worst_case(fair_by_method):
+    """
+    Take the lowest fair win probability of every outcome across several methods.
+
+    Estimates that are not positive (additive devigging of heavy longshots) are no probability at all and are left
+    out, so EV and Kelly sizing never see a negative win probability.
+
+    Args:
+        fair_by_method (dict): Fair win probabilities keyed by method name; at least one must be positive for every
+            outcome, as multiplicative devigging always is.
+
+    Returns:
+        numpy.ndarray: The most conservative fair win probability of every outcome, within (0, 1].
+    """
+    fair = numpy.vstack(list(fair_by_method.values()))
+    return numpy.where(fair > 0, fair, numpy.inf).min(axis=0)
+
+
+def devig(df, implied_col="vig_win_dec", keys=None, methods=None):
+    """
+    Compute fair win probabilities with several devig methods in one pass over all markets.
+
+    Args:
+        df (pandas.DataFrame): Dataframe with one row per outcome.
+        implied_col (str): Column holding the implied win probabilities including the vig.
+        keys (list): Columns identifying a market. Defaults to MARKET_KEYS.
+        methods (list): Devig methods to compute. Defaults to DEVIG_METHODS.
+
+    Returns:
+        pandas.DataFrame: One 'fair_win_dec_<method>' column per method, aligned with the index of df.
+    """
+    methods = methods or DEVIG_METHODS
+    unknown = [method for method in methods if method not in DEVIG_METHODS]
+    if unknown:
+        raise ValueError(f"Invalid devig method(s): {unknown}. Valid methods are: {DEVIG_METHODS}")
+
+    implied = df[implied_col].to_numpy(dtype=float)
+    codes, n_groups = group_codes(df, keys)
+    solvers = {"multiplicative": multiplicative, "additive": additive, "power": power, "shin": shin}
+
+    fair = {}
+    for method in methods:
+        if method != "worst_case":
+            fair[method] = solvers[method](implied, codes, n_groups)
+    if "worst_case" in methods:
+        # The worst case is taken over every other method, whether or not they were requested
+        others = {name: fair[name] if name in fair else solver(implied, codes, n_groups)
+                  for name, solver in solvers.items()}
+        fair["worst_case"] = worst_case(others)
+
+    return pandas.DataFrame({f"fair_win_dec_{method}": fair[method] for method in methods}, index=df.index)
@@ -2,430 +2,478 @@
 import pandas
 import numpy
 import requests
-import json
 import datetime
 import dateutil.parser
 import pytz
 from typing import Optional, Union
 
+from pysportsbet import devig, parallel, readers
+
 
 # ATTENTION!
 # PULLING ALL ODDS FROM ONE MARKET (us, eu, etc.) TAKES ~150-350 API REQUESTS
 
-# Main function
-# Takes an Odds API key or filename as well as a variety of optional parameters to calculate expected value (EV) percentage(s) and filter and sort the betting odds of upcoming sporting events
-def data(api_key: Optional[str] = None, sports: Optional[list[str]] = None,
-         regions: Optional[list[str]] = ['us'],
-         markets: Optional[list[str]] = ['h2h', 'spreads', 'totals'], ev_type: Optional[str] = 'both',
-         recommended: Optional[bool] = False, days_from_now: Optional[Union[int, float]] = None,
-         books: Optional[list[str]] = None, min_odds: Optional[Union[int, float]] = None,
-         max_odds: Optional[Union[int, float]] = None, max_width: Optional[Union[int, float]] = None,
-         max_vig_pct: Optional[Union[int, float]] = None, min_ev_pct: Optional[Union[int, float]] = None,
-         min_num_books: Optional[Union[int, float]] = None, pref_ev_filter: Optional[str] = 'both',
-         sortby: Optional[str] = 'default', ascending: Optional[bool] = False, pref_ev_sort: Optional[str] = 'avg',
-         expanded: Optional[bool] = False, filename: Optional[str] = None) -> pandas.DataFrame:
-    # Returns a list of sports from the API
-    def get_sports(api_key):
-        sports_response = requests.get(
-            'https://api.the-odds-api.com/v4/sports',
+
+# Returns a list of sports from the API
+def get_sports(api_key):
+    sports_response = requests.get(
+        'https://api.the-odds-api.com/v4/sports',
+        params={
+            'api_key': api_key
+        }
+    )
+
+    if sports_response.status_code != 200:
+        print(
+            f'Failed to get sports: status_code {sports_response.status_code}, response body {sports_response.text}')
+        return
+
+    else:
+        sports_list = [sport['key'] for sport in sports_response.json() if not sport['has_outrights']]
+
+    return sports_list
+
+
+# Pulls data from the API into a JSON object
+def api_to_json(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals']):
+    if sports is None:
+        sports = get_sports(api_key=api_key)
+    regions_string = ','.join(regions)
+    markets_string = ','.join(markets)
+
+    all_odds_json = []
+
+    for sport in sports:
+
+        odds_response = requests.get(
+            f'https://api.the-odds-api.com/v4/sports/{sport}/odds',
             params={
-                'api_key': api_key
+                'api_key': api_key,
+                'regions': regions_string,
+                'markets': markets_string,
+                'oddsFormat': 'american',
+                'dateFormat': 'iso',
             }
         )
 
-        if sports_response.status_code != 200:
+        if odds_response.status_code != 200:
             print(
-                f'Failed to get sports: status_code {sports_response.status_code}, response body {sports_response.text}')
-            return
+                f'Failed to get odds: status_code {odds_response.status_code}, response body {odds_response.text}')
 
         else:
-            sports_list = [sport['key'] for sport in sports_response.json() if not sport['has_outrights']]
+            odds_json = odds_response.json()
+            all_odds_json.extend(odds_json)
+
+            # Check the usage quota
+            print('Remaining requests', odds_response.headers['x-requests-remaining'])
+            print('Used requests', odds_response.headers['x-requests-used'])
+
+    return all_odds_json
+
+
+# Reads all events from a JSON/NDJSON file (optionally gzip or zstd compressed) or a directory of them into a JSON object
+def file_to_json(filename):
+    odds_json = list(readers.iter_events(filename))
+
+    return odds_json
+
+
+# Converts the JSON object to a Dataframe
+def json_to_df(odds_json):
+    # Put the json in a dataframe
+    df_ori = pandas.DataFrame(odds_json)
+
+    return df_ori
+
+
+# Takes API parameters and returns the resulting Dataframe
+def api_to_df(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals']):
+    json_data = api_to_json(api_key=api_key, sports=sports, regions=regions, markets=markets)
+    df_data = json_to_df(json_data)
+    return df_data
+
+
+# Reads data from a JSON file and converts it to a Dataframe
+def file_to_df(filename):
+    json_data = file_to_json(filename)
+    df_data = json_to_df(json_data)
+    return df_data
+
+
+# Unpacks a Dataframe that was derived from JSON into it's most robust, redundant form
+def unpacked_data(df_ori):
+    # Unpack each of the bookmakers the 'bookmakers' column into its own row
+    # Make new dataframe of bookmakers where each bookmaker has its own column
+    df_bookmakers = pandas.DataFrame(list(df_ori['bookmakers']))
+
+    # Concactenate df and df2 together
+    df = pandas.concat([df_ori, df_bookmakers], axis=1, join='inner')
+
+    # Unpivot the table using the melt() function (take the bookmaker columns and combine them into multiple rows in the same single column)
+    df = pandas.melt(df, id_vars=df_ori.columns, value_name='bookmaker')
+    df.drop(columns=['variable', 'bookmakers'], inplace=True)
+    df.sort_values(['commence_time', 'id'], inplace=True)
+    df.dropna(inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    # Now, unpack the json in the bookmaker column
+    df_ori = df
+    df_bookmakers = pandas.DataFrame(list(df_ori['bookmaker']))
+    df = pandas.concat([df_ori, df_bookmakers], axis=1, join='inner')
+    df.drop(columns=['bookmaker'], inplace=True)
+    df.rename(columns={'key': 'book_key', 'title': 'book_title'}, inplace=True)
+
+    # Now, do the same unpacking, concat, and melting with the markets column
+    df_ori = df
+    df_markets = pandas.DataFrame(list(df_ori['markets']))
+    df = pandas.concat([df_ori, df_markets], axis=1, join='inner')
+
+    df = pandas.melt(df, id_vars=df_ori.columns, value_name='market')
+    df.drop(columns=['variable', 'markets'], inplace=True)
+    df.sort_values(['commence_time', 'id', 'book_key'], inplace=True)
+    df.dropna(inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    # Unpack the json in market column
+    df_ori = df
+    # Markets carry their own last_update, keep it apart from the bookmaker's
+    df_market = pandas.DataFrame(list(df_ori['market'])).rename(columns={'last_update': 'market_last_update'})
+    df = pandas.concat([df_ori, df_market], axis=1, join='inner')
+    df.drop(columns=['market'], inplace=True)
+    df.rename(columns={'key': 'market'}, inplace=True)
+
+    # Delete all lay markets
+    df = df.loc[~df['market'].isin(['h2h_lay', 'outright_lay'])]
+    df.reset_index(drop=True, inplace=True)
+
+    # Unpack the 'outcomes' column
+    df_ori = df
+    df_outcomes = pandas.DataFrame(list(df_ori['outcomes']))
+    df = pandas.concat([df_ori, df_outcomes], axis=1, join='inner')
+
+    # Melt the resulting columns
+    df = pandas.melt(df, id_vars=df_ori.columns, value_name='outcome')
+    df.drop(columns=['outcomes', 'variable'], inplace=True)
+    df.sort_values(['commence_time', 'id', 'book_key', 'market'], inplace=True)
+    df.dropna(inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    # Unpack outcome column
+    df_ori = df
+    df_outcome = pandas.DataFrame(list(df_ori['outcome']))
+    df = pandas.concat([df_ori, df_outcome], axis=1, join='inner')
+    df.drop(columns=['outcome'], inplace=True)
+    df.rename(columns={'name': 'position', 'price': 'line'}, inplace=True)
+
+    # Payloads with only h2h markets carry no points, but the point is part of every market key downstream
+    if 'point' not in df.columns:
+        df['point'] = numpy.nan
+
+    return df
 
-        return sports_list
 
-    # Pulls data from the API into a JSON object
-    def api_to_json(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals']):
-        if sports is None:
-            sports = get_sports(api_key=api_key)
-        regions_string = ','.join(regions)
-        markets_string = ','.join(markets)
-
-        all_odds_json = []
-
-        for sport in sports:
-
-            odds_response = requests.get(
-                f'https://api.the-odds-api.com/v4/sports/{sport}/odds',
-                params={
-                    'api_key': api_key,
-                    'regions': regions_string,
-                    'markets': markets_string,
-                    'oddsFormat': 'american',
-                    'dateFormat': 'iso',
-                }
-            )
-
-            if odds_response.status_code != 200:
-                print(
-                    f'Failed to get odds: status_code {odds_response.status_code}, response body {odds_response.text}')
-
-            else:
-                odds_json = odds_response.json()
-                all_odds_json.extend(odds_json)
-
-                # Check the usage quota
-                print('Remaining requests', odds_response.headers['x-requests-remaining'])
-                print('Used requests', odds_response.headers['x-requests-used'])
-
-        return odds_json
-
-    # Reads data from a JSON file into a JSON object
-    def file_to_json(filename):
-        odds_json = json.load(open(filename))
-
-        return odds_json
-
-    # Converts the JSON object to a Dataframe
-    def json_to_df(odds_json):
-        # Put the json in a dataframe
-        df_ori = pandas.DataFrame(odds_json)
-
-        return df_ori
-
-    # Takes API parameters and returns the resulting Dataframe
-    def api_to_df(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals']):
-        json_data = api_to_json(api_key=api_key, sports=sports, regions=regions, markets=markets)
-        df_data = json_to_df(json_data)
-        return df_data
-
-    # Reads data from a JSON file and converts it to a Dataframe
-    def file_to_df(filename):
-        json_data = file_to_json(filename)
-        df_data = json_to_df(json_data)
-        return df_data
-
-    # Unpacks a Dataframe that was derived from JSON into it's most robust, redundant form
-    def unpacked_data(df_ori):
-        # Unpack each of the bookmakers the 'bookmakers' column into its own row
-        # Make new dataframe of bookmakers where each bookmaker has its own column
-        df_bookmakers = pandas.DataFrame(list(df_ori['bookmakers']))
-
-        # Concactenate df and df2 together
-        df = pandas.concat([df_ori, df_bookmakers], axis=1, join='inner')
-
-        # Unpivot the table using the melt() function (take the bookmaker columns and combine them into multiple rows in the same single column)
-        df = pandas.melt(df, id_vars=df_ori.columns, value_name='bookmaker')
-        df.drop(columns=['variable', 'bookmakers'], inplace=True)
-        df.sort_values(['commence_time', 'id'], inplace=True)
-        df.dropna(inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-        # Now, unpack the json in the bookmaker column
-        df_ori = df
-        df_bookmakers = pandas.DataFrame(list(df_ori['bookmaker']))
-        df = pandas.concat([df_ori, df_bookmakers], axis=1, join='inner')
-        df.drop(columns=['bookmaker'], inplace=True)
-        df.rename(columns={'key': 'book_key', 'title': 'book_title'}, inplace=True)
-
-        # Now, do the same unpacking, concat, and melting with the markets column
-        df_ori = df
-        df_markets = pandas.DataFrame(list(df_ori['markets']))
-        df = pandas.concat([df_ori, df_markets], axis=1, join='inner')
-
-        df = pandas.melt(df, id_vars=df_ori.columns, value_name='market')
-        df.drop(columns=['variable', 'markets'], inplace=True)
-        df.sort_values(['commence_time', 'id', 'book_key'], inplace=True)
-        df.dropna(inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-        # Unpack the json in market column
-        df_ori = df
-        df_market = pandas.DataFrame(list(df_ori['market']))
-        df = pandas.concat([df_ori, df_market], axis=1, join='inner')
-        df.drop(columns=['market'], inplace=True)
-        df.rename(columns={'key': 'market'}, inplace=True)
-
-        # Delete all lay markets
-        df = df.loc[~df['market'].isin(['h2h_lay', 'outright_lay'])]
-        df.reset_index(drop=True, inplace=True)
-
-        # Unpack the 'outcomes' column
-        df_ori = df
-        df_outcomes = pandas.DataFrame(list(df_ori['outcomes']))
-        df = pandas.concat([df_ori, df_outcomes], axis=1, join='inner')
-        print(df)
-
-        # Melt the resulting columns
-        df = pandas.melt(df, id_vars=df_ori.columns, value_name='outcome')
-        df.drop(columns=['outcomes', 'variable'], inplace=True)
-        df.sort_values(['commence_time', 'id', 'book_key', 'market'], inplace=True)
-        df.dropna(inplace=True)
-        df.reset_index(drop=True, inplace=True)
-
-        # Unpack outcome column
-        df_ori = df
-        df_outcome = pandas.DataFrame(list(df_ori['outcome']))
-        df = pandas.concat([df_ori, df_outcome], axis=1, join='inner')
-        df.drop(columns=['outcome'], inplace=True)
-        df.rename(columns={'name': 'position', 'price': 'line'}, inplace=True)
-
-        return df
-
-    # Expands an unpacked Dataframe by calculating additional columns
-    def processed_data(df):
-        # Calculate the number of possible outcomes for the market
-        df['num_outcomes'] = df.groupby(by=['id', 'book_key', 'market'])['line'].transform('count')
-        # Calculate the market width only for markets with 2 outcomes
-        df['above_below'] = numpy.where(df['num_outcomes'] != 2, numpy.nan,
-                                        numpy.where(df['line'] > 0, df['line'] - 100, df['line'] + 100))
-        df['width'] = numpy.where(df['num_outcomes'] != 2, numpy.nan,
-                                  (-1) * (df.groupby(by=['id', 'book_key', 'market'])['above_below'].transform('sum')))
-
-        # Calculate the number of books that carry each market
-        key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
-                      'point']
-        df['num_books'] = df.groupby(by=key_fields, dropna=False)['book_key'].transform('count')
-
-        # Calculate the implied win dec, fair implied win dec, fair line, amount to win from the real line, amount to win from the fair line, and vig pct
-        df['vig_win_dec'] = numpy.where(df['line'] > 0, 100 / (df['line'] + 100),
-                                        abs(df['line']) / (abs(df['line']) + 100))
-        df['fair_win_dec'] = df['vig_win_dec'] / df.groupby(by=['id', 'book_key', 'market'])['vig_win_dec'].transform(
-            'sum')
-        df['fair_line'] = numpy.where(df['fair_win_dec'] < 0.5, (100 / df['fair_win_dec']) - 100,
-                                      ((df['fair_win_dec'] * 100) / (1 - df['fair_win_dec'])) * (-1))
-        df['amount_to_win_line'] = numpy.where(df['line'] > 0, df['line'], (100 / abs(df['line'])) * 100)
-        df['amount_to_win_fair'] = numpy.where(df['fair_line'] > 0, df['fair_line'], (100 / abs(df['fair_line'])) * 100)
-        # Vig pct to be used for multi-outcome games where market width cannot be calculated
-        df['vig_dec'] = df.groupby(by=['id', 'book_key', 'market'])['vig_win_dec'].transform('sum') - \
-                        df.groupby(by=['id', 'book_key', 'market'])['fair_win_dec'].transform('sum')
-        df['vig_pct'] = df['vig_dec'] * 100
-
-        return df
-
-    # Takes API parameters and returns a fully unpacked and processed Dataframe
-    def api_to_processed_df(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'],
-                            markets=['h2h', 'spreads', 'totals']):
-        raw_df = api_to_df(api_key=api_key, sports=sports, regions=regions, markets=markets)
-        unpacked_df = unpacked_data(raw_df)
-        processed_df = processed_data(unpacked_df)
-        return processed_df
-
-    # Reads data from a JSON file and converts it to a fully unpacked and processed Dataframe
-    def file_to_processed_df(filename):
-        raw_df = file_to_df(filename)
-        unpacked_df = unpacked_data(raw_df)
-        processed_df = processed_data(unpacked_df)
-        return processed_df
-
-    # Groups and aggregates a processed Dataframe to find the average odds of each position of each market of each game
-    def av_odds(df):
-        key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
-                      'point']
-
-        # Aggregate by mean
-        df = df.groupby(key_fields, dropna=False).mean()
-        df.sort_values(['commence_time', 'id', 'market'], inplace=True)
-        return df
-
-    # Extracts the pinnacle odds from processed odds (function will return an empty df if eu odds are not part of input df)
-    def extract_pinnacle(odds):
-        pinnacle_odds = odds.loc[odds['book_key'] == 'pinnacle']
-        pinnacle_odds.reset_index(drop=True, inplace=True)
-        return pinnacle_odds
-
-    # Calculates the expected value with regard to the average odds, takes just book_odds as parameter as average odds are calculated directly from book odds
-    def avg_ev(book_odds):
-        # Calculate average odds
-        average_odds = av_odds(book_odds)
-
-        # Key fields for merging
-        key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
-                      'point', 'num_outcomes', 'num_books']
-
-        # Merge book odds with the average odds
-        avg_merge = book_odds.merge(average_odds, how='inner', on=key_fields, suffixes=['_book', '_avg'],
-                                    validate='m:1')
-
-        # Calculate ev data
-        avg_merge['ev_pct_avg'] = (avg_merge['fair_win_dec_avg'] * avg_merge['amount_to_win_line_book']) - (
-                    (1 - avg_merge['fair_win_dec_avg']) * 100)
-        avg_merge['kelly_dec_avg'] = avg_merge['fair_win_dec_avg'] - (
-                    (1 - avg_merge['fair_win_dec_avg']) / (avg_merge['amount_to_win_line_book'] / 100))
-        avg_merge['kelly_pct_avg'] = avg_merge['kelly_dec_avg'] * 100
-
-        return avg_merge
-
-    # Calculates the expected value with regard to pinnacle odds, takes both book odds and pinnacle odds as parameters as book_odds may not necessarily have pinnacle odds within it
-    def pinnacle_ev(book_odds, pinnacle_odds):
-        # Key fields for merging
-        key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
-                      'point', 'num_outcomes']
-
-        # Fields that are not keys but should not be duplicated when merging Pinnacle
-        drop_fields = ['book_key', 'book_title', 'num_books']
-
-        # Merge book odds with the pinnacle odds
-        pinnacle_merge = book_odds.merge(pinnacle_odds.drop(columns=drop_fields), how='inner', on=key_fields,
-                                         suffixes=['_book', '_pinnacle'], validate='m:1')
-
-        # Calculate ev data
-        pinnacle_merge['ev_pct_pinnacle'] = (pinnacle_merge['fair_win_dec_pinnacle'] * pinnacle_merge[
-            'amount_to_win_line_book']) - ((1 - pinnacle_merge['fair_win_dec_pinnacle']) * 100)
-        pinnacle_merge['kelly_dec_pinnacle'] = pinnacle_merge['fair_win_dec_pinnacle'] - (
-                    (1 - pinnacle_merge['fair_win_dec_pinnacle']) / (pinnacle_merge['amount_to_win_line_book'] / 100))
-        pinnacle_merge['kelly_pct_pinnacle'] = pinnacle_merge['kelly_dec_pinnacle'] * 100
-
-        return pinnacle_merge
-
-    # Merge the avg ev and pinnacle ev dataframes into one
-    def merge_ev(avg_merge, pinnacle_merge):
-        # Key fields for merging
-        key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'book_key',
-                      'book_title', 'market', 'position', 'line_book', 'point', 'num_outcomes', 'above_below_book',
-                      'width_book', 'vig_win_dec_book', 'fair_win_dec_book', 'fair_line_book',
-                      'amount_to_win_line_book', 'amount_to_win_fair_book', 'vig_dec_book', 'vig_pct_book']
-
-        # Merge the dataframes (left merge because there are more averages than pinnacle odds and we don't want to lose those)
-        final_merge = avg_merge.merge(pinnacle_merge.drop(columns=['num_books']), how='left', on=key_fields,
-                                      suffixes=['_avg', '_pinnacle'])
-
-        return final_merge
-
-    # Takes API parameters and the desired type of expected value and returns a complete Dataframe with ev fields
-    def api_to_ev(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals'],
-                  ev_type='both'):
-        book_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=regions, markets=markets)
-
-        if ev_type == 'avg':
-            ev = avg_ev(book_odds=book_odds)
-        elif ev_type == 'pinnacle':
-            if 'eu' not in regions:
-                eu_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=['eu'], markets=markets)
-                pinnacle_odds = extract_pinnacle(eu_odds)
-                ev = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-            else:
-                pinnacle_odds = extract_pinnacle(book_odds)
-                ev = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-        else:  # assumed to be 'both'
-            average = avg_ev(book_odds=book_odds)
-            if 'eu' not in regions:
-                eu_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=['eu'], markets=markets)
-                pinnacle_odds = extract_pinnacle(eu_odds)
-                pinnacle = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-            else:
-                pinnacle_odds = extract_pinnacle(book_odds)
-                pinnacle = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-            ev = merge_ev(avg_merge=average, pinnacle_merge=pinnacle)
-
-        return ev
-
-    # Reads data from a JSON file and returns a complete Dataframe with ev fields (if ev_type 'pinnacle' is selected and file does not contain eu odds, df will be empty)
-    def file_to_ev(filename, ev_type='both'):
-        book_odds = file_to_processed_df(filename)
-        if ev_type == 'avg':
-            ev = avg_ev(book_odds=book_odds)
-        elif ev_type == 'pinnacle':
+# Expands an unpacked Dataframe by calculating additional columns (fair_win_dec is taken from the chosen devig method)
+# market_keys identify a market, defaulting to devig.MARKET_KEYS; player props also need 'description' (the player)
+def processed_data(df, devig_method='multiplicative', market_keys=None):
+    market_keys = market_keys or devig.MARKET_KEYS
+    # Calculate the number of possible outcomes for the market
+    df['num_outcomes'] = df.groupby(by=market_keys, dropna=False)['line'].transform('count')
+    # Calculate the market width only for markets with 2 outcomes
+    df['above_below'] = numpy.where(df['num_outcomes'] != 2, numpy.nan,
+                                    numpy.where(df['line'] > 0, df['line'] - 100, df['line'] + 100))
+    df['width'] = numpy.where(df['num_outcomes'] != 2, numpy.nan,
+                              (-1) * (df.groupby(by=market_keys, dropna=False)['above_below'].transform('sum')))
+
+    # Calculate the number of books that carry each market
+    key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
+                  'point'] + [key for key in market_keys if key not in devig.MARKET_KEYS]
+    df['num_books'] = df.groupby(by=key_fields, dropna=False)['book_key'].transform('count')
+
+    # Calculate the implied win dec, fair implied win dec, fair line, amount to win from the real line, amount to win from the fair line, and vig pct
+    df['vig_win_dec'] = numpy.where(df['line'] > 0, 100 / (df['line'] + 100),
+                                    abs(df['line']) / (abs(df['line']) + 100))
+    # Devig every market with all methods side by side in one vectorized pass
+    df = df.join(devig.devig(df, implied_col='vig_win_dec', keys=market_keys))
+    df['fair_win_dec'] = df['fair_win_dec_' + devig_method]
+    df['fair_line'] = numpy.where(df['fair_win_dec'] < 0.5, (100 / df['fair_win_dec']) - 100,
+                                  ((df['fair_win_dec'] * 100) / (1 - df['fair_win_dec'])) * (-1))
+    df['amount_to_win_line'] = numpy.where(df['line'] > 0, df['line'], (100 / abs(df['line'])) * 100)
+    df['amount_to_win_fair'] = numpy.where(df['fair_line'] > 0, df['fair_line'], (100 / abs(df['fair_line'])) * 100)
+    # Vig pct to be used for multi-outcome games where market width cannot be calculated
+    df['vig_dec'] = df.groupby(by=market_keys, dropna=False)['vig_win_dec'].transform('sum') - \
+                    df.groupby(by=market_keys, dropna=False)['fair_win_dec'].transform('sum')
+    df['vig_pct'] = df['vig_dec'] * 100
+
+    return df
+
+
+# Takes API parameters and returns a fully unpacked and processed Dataframe
+def api_to_processed_df(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'],
+                        markets=['h2h', 'spreads', 'totals'], devig_method='multiplicative'):
+    raw_df = api_to_df(api_key=api_key, sports=sports, regions=regions, markets=markets)
+    unpacked_df = unpacked_data(raw_df)
+    processed_df = processed_data(unpacked_df, devig_method=devig_method)
+    return processed_df
+
+
+# Reads data from a JSON file and converts it to a fully unpacked and processed Dataframe
+def file_to_processed_df(filename, devig_method='multiplicative'):
+    raw_df = file_to_df(filename)
+    unpacked_df = unpacked_data(raw_df)
+    processed_df = processed_data(unpacked_df, devig_method=devig_method)
+    return processed_df
+
+
+# Converts a JSON object to a fully unpacked and processed Dataframe
+def json_to_processed_df(odds_json, devig_method='multiplicative'):
+    raw_df = json_to_df(odds_json)
+    unpacked_df = unpacked_data(raw_df)
+    processed_df = processed_data(unpacked_df, devig_method=devig_method)
+    return processed_df
+
+
+# Groups and aggregates a processed Dataframe to find the average odds of each position of each market of each game
+def av_odds(df):
+    key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
+                  'point']
+
+    # Aggregate by mean
+    df = df.groupby(key_fields, dropna=False).mean(numeric_only=True)
+    df.sort_values(['commence_time', 'id', 'market'], inplace=True)
+    return df
+
+
+# Extracts the pinnacle odds from processed odds (function will return an empty df if eu odds are not part of input df)
+def extract_pinnacle(odds):
+    pinnacle_odds = odds.loc[odds['book_key'] == 'pinnacle']
+    pinnacle_odds.reset_index(drop=True, inplace=True)
+    return pinnacle_odds
+
+
+# Calculates the expected value with regard to the average odds, takes just book_odds as parameter as average odds are calculated directly from book odds
+def avg_ev(book_odds):
+    # Calculate average odds
+    average_odds = av_odds(book_odds)
+
+    # Key fields for merging
+    key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
+                  'point', 'num_outcomes', 'num_books']
+
+    # Merge book odds with the average odds
+    avg_merge = book_odds.merge(average_odds, how='inner', on=key_fields, suffixes=['_book', '_avg'],
+                                validate='m:1')
+
+    # Calculate ev data
+    avg_merge['ev_pct_avg'] = (avg_merge['fair_win_dec_avg'] * avg_merge['amount_to_win_line_book']) - (
+                (1 - avg_merge['fair_win_dec_avg']) * 100)
+    avg_merge['kelly_dec_avg'] = avg_merge['fair_win_dec_avg'] - (
+                (1 - avg_merge['fair_win_dec_avg']) / (avg_merge['amount_to_win_line_book'] / 100))
+    avg_merge['kelly_pct_avg'] = avg_merge['kelly_dec_avg'] * 100
+
+    return avg_merge
+
+
+# Calculates the expected value with regard to pinnacle odds, takes both book odds and pinnacle odds as parameters as book_odds may not necessarily have pinnacle odds within it
+def pinnacle_ev(book_odds, pinnacle_odds):
+    # Key fields for merging
+    key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'market', 'position',
+                  'point', 'num_outcomes']
+
+    # Fields that are not keys but should not be duplicated when merging Pinnacle
+    drop_fields = ['book_key', 'book_title', 'num_books']
+
+    # Merge book odds with the pinnacle odds
+    pinnacle_merge = book_odds.merge(pinnacle_odds.drop(columns=drop_fields), how='inner', on=key_fields,
+                                     suffixes=['_book', '_pinnacle'], validate='m:1')
+
+    # Calculate ev data
+    pinnacle_merge['ev_pct_pinnacle'] = (pinnacle_merge['fair_win_dec_pinnacle'] * pinnacle_merge[
+        'amount_to_win_line_book']) - ((1 - pinnacle_merge['fair_win_dec_pinnacle']) * 100)
+    pinnacle_merge['kelly_dec_pinnacle'] = pinnacle_merge['fair_win_dec_pinnacle'] - (
+                (1 - pinnacle_merge['fair_win_dec_pinnacle']) / (pinnacle_merge['amount_to_win_line_book'] / 100))
+    pinnacle_merge['kelly_pct_pinnacle'] = pinnacle_merge['kelly_dec_pinnacle'] * 100
+
+    return pinnacle_merge
+
+
+# Merge the avg ev and pinnacle ev dataframes into one
+def merge_ev(avg_merge, pinnacle_merge):
+    # Key fields for merging
+    key_fields = ['id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team', 'book_key',
+                  'book_title', 'market', 'position', 'line_book', 'point', 'num_outcomes', 'above_below_book',
+                  'width_book', 'vig_win_dec_book', 'fair_win_dec_book', 'fair_line_book',
+                  'amount_to_win_line_book', 'amount_to_win_fair_book', 'vig_dec_book', 'vig_pct_book']
+    key_fields.extend([f'fair_win_dec_{method}_book' for method in devig.DEVIG_METHODS])
+
+    # Merge the dataframes (left merge because there are more averages than pinnacle odds and we don't want to lose those)
+    final_merge = avg_merge.merge(pinnacle_merge.drop(columns=['num_books']), how='left', on=key_fields,
+                                  suffixes=['_avg', '_pinnacle'])
+
+    return final_merge
+
+
+# Takes API parameters and the desired type of expected value and returns a complete Dataframe with ev fields
+def api_to_ev(api_key, sports=None, regions=['us', 'eu', 'uk', 'au'], markets=['h2h', 'spreads', 'totals'],
+              ev_type='both', devig_method='multiplicative'):
+    book_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=regions, markets=markets,
+                                    devig_method=devig_method)
+
+    if ev_type == 'avg':
+        ev = avg_ev(book_odds=book_odds)
+    elif ev_type == 'pinnacle':
+        if 'eu' not in regions:
+            eu_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=['eu'], markets=markets,
+                                          devig_method=devig_method)
+            pinnacle_odds = extract_pinnacle(eu_odds)
+            ev = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
+        else:
             pinnacle_odds = extract_pinnacle(book_odds)
             ev = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-        else:  # assumed to be 'both'
-            average = avg_ev(book_odds=book_odds)
+    else:  # assumed to be 'both'
+        average = avg_ev(book_odds=book_odds)
+        if 'eu' not in regions:
+            eu_odds = api_to_processed_df(api_key=api_key, sports=sports, regions=['eu'], markets=markets,
+                                          devig_method=devig_method)
+            pinnacle_odds = extract_pinnacle(eu_odds)
+            pinnacle = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
+        else:
             pinnacle_odds = extract_pinnacle(book_odds)
             pinnacle = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
-            ev = merge_ev(avg_merge=average, pinnacle_merge=pinnacle)
-
-        return ev
-
-    # Filters a Dataframe of ev odds based on several optional parameters
-    def filter_ev(odds, pref_ev_filter, sports=None, markets=None, days_from_now=None, books=None, min_odds=None,
-                  max_odds=None, max_width=None, max_vig_pct=None, min_ev_pct=None, min_num_books=None):
-        if sports is not None:
-            odds = odds.loc[odds['sport_key'].isin(sports)]
-        if markets is not None:
-            odds = odds.loc[odds['market'].isin(markets)]
-        if days_from_now is not None:
-            date = pytz.UTC.localize(datetime.datetime.now()) + datetime.timedelta(days=days_from_now)
-            odds = odds.loc[odds['commence_time'].apply(lambda t: dateutil.parser.isoparse(t)) <= date]
-        if books is not None:
-            odds = odds.loc[odds['book_key'].isin(books)]
-        if min_odds is not None:
-            odds = odds.loc[odds['line_book'] >= min_odds]
-        if max_odds is not None:
-            odds = odds.loc[odds['line_book'] <= max_odds]
-        if max_width is not None:
-            odds = odds.loc[odds['num_outcomes'] == 2]
-            if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
-                odds = odds.loc[odds['width_avg'] <= max_width]
-            if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
-                odds = odds.loc[odds['width_pinnacle'] <= max_width]
-        if max_vig_pct is not None:
-            if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
-                odds = odds.loc[odds['vig_pct_avg'] <= max_vig_pct]
-            if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
-                odds = odds.loc[odds['vig_pct_pinnacle'] <= max_vig_pct]
-        if min_ev_pct is not None:
-            if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
-                odds = odds.loc[odds['ev_pct_avg'] >= min_ev_pct]
-            if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
-                odds = odds.loc[odds['ev_pct_pinnacle'] >= min_ev_pct]
-        if min_num_books is not None:
-            odds = odds.loc[odds['num_books'] >= min_num_books]
-
-        odds.reset_index(drop=True, inplace=True)
-
-        return odds
-
-    # Sorts a Dataframe of ev odds by a field
-    def sort_ev(odds, sortby, ascending, pref_ev_sort='avg'):
-        if sortby == 'commence_time':
-            odds.sort_values(['commence_time'], ascending=ascending, inplace=True)
-        elif sortby == 'line':
-            odds.sort_values(['line_book'], ascending=ascending, inplace=True)
-        elif sortby == 'width':
-            if pref_ev_sort == 'avg':
-                odds.sort_values(['width_avg'], ascending=ascending, inplace=True)
-            if pref_ev_sort == 'pinnacle':
-                odds.sort_values(['width_pinnacle'], ascending=ascending, inplace=True)
-        elif sortby == 'ev_pct':
-            if pref_ev_sort == 'avg':
-                odds.sort_values(['ev_pct_avg'], ascending=ascending, inplace=True)
-            if pref_ev_sort == 'pinnacle':
-                odds.sort_values(['ev_pct_pinnacle'], ascending=ascending, inplace=True)
-        if sortby == 'kelly_pct':
-            if pref_ev_sort == 'avg':
-                odds.sort_values(['kelly_pct_avg'], ascending=ascending, inplace=True)
-            if pref_ev_sort == 'pinnacle':
-                odds.sort_values(['kelly_pct_pinnacle'], ascending=ascending, inplace=True)
-
-        if sortby == 'default':
-            odds.sort_values(['commence_time', 'id', 'book_key', 'market'], inplace=True)
-
-        odds.reset_index(drop=True, inplace=True)
-
-        return odds
-
-    # Simplify the dataframe into a more easily consumable format
-    def cleanup_ev(odds, ev_type):
-        fields_keep = ['sport_title', 'commence_time', 'home_team', 'away_team', 'book_title', 'market', 'position',
-                       'line_book', 'point', 'num_books']
-
-        if ev_type == 'both' or ev_type == 'avg':
-            add_fields = ['fair_line_avg', 'width_avg', 'vig_pct_avg', 'ev_pct_avg', 'kelly_pct_avg']
-            fields_keep.extend(add_fields)
-        if ev_type == 'both' or ev_type == 'pinnacle':
-            add_fields = ['fair_line_pinnacle', 'width_pinnacle', 'vig_pct_pinnacle', 'ev_pct_pinnacle',
-                          'kelly_pct_pinnacle']
-            fields_keep.extend(add_fields)
-
-        odds = odds[fields_keep]
-        odds = odds.round(2)
-        return odds
-
-    ########################################################################################################################################
-    #
-    # BEGIN data() main code body
-    #
-    ########################################################################################################################################
+        ev = merge_ev(avg_merge=average, pinnacle_merge=pinnacle)
+
+    return ev
 
+
+# Converts a JSON object to a complete Dataframe with ev fields (Pinnacle odds come from pinnacle_json if given, otherwise from odds_json itself)
+def json_to_ev(odds_json, ev_type='both', devig_method='multiplicative', pinnacle_json=None):
+    book_odds = json_to_processed_df(odds_json, devig_method=devig_method)
+    if ev_type != 'avg':
+        if pinnacle_json is None:
+            pinnacle_odds = extract_pinnacle(book_odds)
+        elif len(pinnacle_json) == 0:
+            pinnacle_odds = book_odds.iloc[0:0].reset_index(drop=True)
+        else:
+            pinnacle_odds = extract_pinnacle(json_to_processed_df(pinnacle_json, devig_method=devig_method))
+
+    if ev_type == 'avg':
+        ev = avg_ev(book_odds=book_odds)
+    elif ev_type == 'pinnacle':
+        ev = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
+    else:  # assumed to be 'both'
+        average = avg_ev(book_odds=book_odds)
+        pinnacle = pinnacle_ev(book_odds=book_odds, pinnacle_odds=pinnacle_odds)
+        ev = merge_ev(avg_merge=average, pinnacle_merge=pinnacle)
+
+    return ev
+
+
+# Reads data from a JSON file and returns a complete Dataframe with ev fields (if ev_type 'pinnacle' is selected and file does not contain eu odds, df will be empty)
+def file_to_ev(filename, ev_type='both', devig_method='multiplicative'):
+    return json_to_ev(file_to_json(filename), ev_type=ev_type, devig_method=devig_method)
+
+
+# Filters a Dataframe of ev odds based on several optional parameters
+def filter_ev(odds, pref_ev_filter, sports=None, markets=None, days_from_now=None, books=None, min_odds=None,
+              max_odds=None, max_width=None, max_vig_pct=None, min_ev_pct=None, min_num_books=None):
+    if sports is not None:
+        odds = odds.loc[odds['sport_key'].isin(sports)]
+    if markets is not None:
+        odds = odds.loc[odds['market'].isin(markets)]
+    if days_from_now is not None:
+        date = pytz.UTC.localize(datetime.datetime.now()) + datetime.timedelta(days=days_from_now)
+        odds = odds.loc[odds['commence_time'].apply(lambda t: dateutil.parser.isoparse(t)) <= date]
+    if books is not None:
+        odds = odds.loc[odds['book_key'].isin(books)]
+    if min_odds is not None:
+        odds = odds.loc[odds['line_book'] >= min_odds]
+    if max_odds is not None:
+        odds = odds.loc[odds['line_book'] <= max_odds]
+    if max_width is not None:
+        odds = odds.loc[odds['num_outcomes'] == 2]
+        if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
+            odds = odds.loc[odds['width_avg'] <= max_width]
+        if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
+            odds = odds.loc[odds['width_pinnacle'] <= max_width]
+    if max_vig_pct is not None:
+        if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
+            odds = odds.loc[odds['vig_pct_avg'] <= max_vig_pct]
+        if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
+            odds = odds.loc[odds['vig_pct_pinnacle'] <= max_vig_pct]
+    if min_ev_pct is not None:
+        if pref_ev_filter == 'both' or pref_ev_filter == 'avg':
+            odds = odds.loc[odds['ev_pct_avg'] >= min_ev_pct]
+        if pref_ev_filter == 'both' or pref_ev_filter == 'pinnacle':
+            odds = odds.loc[odds['ev_pct_pinnacle'] >= min_ev_pct]
+    if min_num_books is not None:
+        odds = odds.loc[odds['num_books'] >= min_num_books]
+
+    odds.reset_index(drop=True, inplace=True)
+
+    return odds
+
+
+# Sorts a Dataframe of ev odds by a field
+def sort_ev(odds, sortby, ascending, pref_ev_sort='avg'):
+    if sortby == 'commence_time':
+        odds.sort_values(['commence_time'], ascending=ascending, inplace=True)
+    elif sortby == 'line':
+        odds.sort_values(['line_book'], ascending=ascending, inplace=True)
+    elif sortby == 'width':
+        if pref_ev_sort == 'avg':
+            odds.sort_values(['width_avg'], ascending=ascending, inplace=True)
+        if pref_ev_sort == 'pinnacle':
+            odds.sort_values(['width_pinnacle'], ascending=ascending, inplace=True)
+    elif sortby == 'ev_pct':
+        if pref_ev_sort == 'avg':
+            odds.sort_values(['ev_pct_avg'], ascending=ascending, inplace=True)
+        if pref_ev_sort == 'pinnacle':
+            odds.sort_values(['ev_pct_pinnacle'], ascending=ascending, inplace=True)
+    if sortby == 'kelly_pct':
+        if pref_ev_sort == 'avg':
+            odds.sort_values(['kelly_pct_avg'], ascending=ascending, inplace=True)
+        if pref_ev_sort == 'pinnacle':
+            odds.sort_values(['kelly_pct_pinnacle'], ascending=ascending, inplace=True)
+
+    if sortby == 'default':
+        odds.sort_values(['commence_time', 'id', 'book_key', 'market'], inplace=True)
+
+    odds.reset_index(drop=True, inplace=True)
+
+    return odds
+
+
+# Simplify the dataframe into a more easily consumable format
+def cleanup_ev(odds, ev_type):
+    fields_keep = ['sport_title', 'commence_time', 'home_team', 'away_team', 'book_title', 'market', 'position',
+                   'line_book', 'point', 'num_books']
+
+    if ev_type == 'both' or ev_type == 'avg':
+        add_fields = ['fair_line_avg', 'width_avg', 'vig_pct_avg', 'ev_pct_avg', 'kelly_pct_avg']
+        fields_keep.extend(add_fields)
+    if ev_type == 'both' or ev_type == 'pinnacle':
+        add_fields = ['fair_line_pinnacle', 'width_pinnacle', 'vig_pct_pinnacle', 'ev_pct_pinnacle',
+                      'kelly_pct_pinnacle']
+        fields_keep.extend(add_fields)
+
+    odds = odds[fields_keep]
+    odds = odds.round(2)
+    return odds
+
+
+# Main function
+# Takes an Odds API key or filename as well as a variety of optional parameters to calculate expected value (EV) percentage(s) and filter and sort the betting odds of upcoming sporting events
+def data(api_key: Optional[str] = None, sports: Optional[list[str]] = None,
+         regions: Optional[list[str]] = ['us'],
+         markets: Optional[list[str]] = ['h2h', 'spreads', 'totals'], ev_type: Optional[str] = 'both',
+         recommended: Optional[bool] = False, days_from_now: Optional[Union[int, float]] = None,
+         books: Optional[list[str]] = None, min_odds: Optional[Union[int, float]] = None,
+         max_odds: Optional[Union[int, float]] = None, max_width: Optional[Union[int, float]] = None,
+         max_vig_pct: Optional[Union[int, float]] = None, min_ev_pct: Optional[Union[int, float]] = None,
+         min_num_books: Optional[Union[int, float]] = None, pref_ev_filter: Optional[str] = 'both',
+         sortby: Optional[str] = 'default', ascending: Optional[bool] = False, pref_ev_sort: Optional[str] = 'avg',
+         expanded: Optional[bool] = False, filename: Optional[str] = None,
+         devig_method: Optional[str] = 'multiplicative', workers: Optional[int] = None,
+         chunk_size: Optional[int] = 1000) -> pandas.DataFrame:
     # Check inputs for api call and/or filename
     if api_key is None and filename is None:
         raise SystemExit("Error: API key or filename must be specified\n")
@@ -461,11 +509,9 @@ def data(api_key: Optional[str] = None, sports: Optional[list[str]] = None,
     if ev_type not in ev_types:
         raise SystemExit("Error: ev_type must be one of: 'avg', 'pinnacle', 'both' or be left blank")
 
-    # Get ev data frame
-    if filename is not None:
-        df = file_to_ev(filename=filename, ev_type=ev_type)
-    else:
-        df = api_to_ev(api_key=api_key, sports=sports, regions=regions, markets=markets, ev_type=ev_type)
+    if devig_method not in devig.DEVIG_METHODS:
+        raise SystemExit(
+            f"Error: devig_method must be one of: {', '.join(devig.DEVIG_METHODS)} or be left blank")
 
     # If recommended is on, reassign everything to values to give recommended bets (except books because a user should still be able to customize which books are displayed)
     if type(recommended) != bool:
@@ -492,20 +538,6 @@ def data(api_key: Optional[str] = None, sports: Optional[list[str]] = None,
             print("parameter 'days_from_now' must be an integer >= 0. Filter parameter ignored")
             days_from_now = None
 
-    if books is not None:
-        if type(books) != list:
-            print(
-                "parameter 'books' must be a list of valid book keys. Refer to documentation for information on valid books. Filter parameter ignored")
-            books = None
-        else:
-            book_list = df['book_key'].unique().tolist()
-            for book in list(books):
-                if book not in book_list:
-                    books.remove(book)
-                    print(f'{book} is not a valid book. Data filtered by other specified books')
-            if len(books) == 0:
-                books = None
-
     if min_odds is not None and type(min_odds) != int and type(min_odds) != float:
         print("parameter 'min_odds' must be an integer or float. Filter parameter ignored")
         min_odds = None
@@ -549,10 +581,62 @@ def data(api_key: Optional[str] = None, sports: Optional[list[str]] = None,
     else:
         pref_ev_filter = ev_type
 
-    # Filter the df
-    df = filter_ev(df, pref_ev_filter, sports=sports, markets=markets, days_from_now=days_from_now, books=books,
-                   min_odds=min_odds, max_odds=max_odds, max_width=max_width, max_vig_pct=max_vig_pct,
-                   min_ev_pct=min_ev_pct, min_num_books=min_num_books)
+    if workers is not None and (type(workers) != int or workers < 1):
+        print("parameter 'workers' must be an integer >= 1. Odds are processed in a single process")
+        workers = None
+
+    if type(chunk_size) != int or chunk_size < 1:
+        print("parameter 'chunk_size' must be an integer >= 1. Value defaults to 1000")
+        chunk_size = 1000
+
+    filter_kwargs = dict(sports=sports, markets=markets, days_from_now=days_from_now, min_odds=min_odds,
+                         max_odds=max_odds, max_width=max_width, max_vig_pct=max_vig_pct, min_ev_pct=min_ev_pct,
+                         min_num_books=min_num_books)
+
+    # Get ev data frame
+    if filename is not None:
+        # Files are streamed in chunks of whole events; processing, consensus, Pinnacle EV and filtering run per chunk
+        books_seen = set()
+        frames = list(parallel.iter_ev(readers.iter_event_chunks(filename, chunk_size=chunk_size), ev_type=ev_type,
+                                       devig_method=devig_method, workers=workers,
+                                       filter_kwargs=dict(pref_ev_filter=pref_ev_filter, **filter_kwargs),
+                                       books_seen=books_seen))
+        if len(frames) == 0:
+            raise SystemExit(f"Error: no odds found in {filename}\n")
+        df = pandas.concat(frames, ignore_index=True)
+        book_list = list(books_seen)
+        filter_kwargs = {}
+    elif workers is not None:
+        # Processing, consensus, Pinnacle EV and filtering run on shards of whole events in a process pool
+        odds_json = api_to_json(api_key=api_key, sports=sports, regions=regions, markets=markets)
+        pinnacle_json = None
+        if ev_type != 'avg' and 'eu' not in regions:
+            pinnacle_json = api_to_json(api_key=api_key, sports=sports, regions=['eu'], markets=markets)
+        df = parallel.sharded_ev(odds_json, ev_type=ev_type, devig_method=devig_method, workers=workers,
+                                 pinnacle_json=pinnacle_json,
+                                 filter_kwargs=dict(pref_ev_filter=pref_ev_filter, **filter_kwargs))
+        book_list = parallel.book_keys(odds_json)
+        filter_kwargs = {}
+    else:
+        df = api_to_ev(api_key=api_key, sports=sports, regions=regions, markets=markets, ev_type=ev_type,
+                       devig_method=devig_method)
+        book_list = df['book_key'].unique().tolist()
+
+    if books is not None:
+        if type(books) != list:
+            print(
+                "parameter 'books' must be a list of valid book keys. Refer to documentation for information on valid books. Filter parameter ignored")
+            books = None
+        else:
+            for book in list(books):
+                if book not in book_list:
+                    books.remove(book)
+                    print(f'{book} is not a valid book. Data filtered by other specified books')
+            if len(books) == 0:
+                books = None
+
+    # Filter the df (chunks and shards are already filtered by everything but books)
+    df = filter_ev(df, pref_ev_filter, books=books, **filter_kwargs)
 
     # Check inputs for sorting
     sort_options = ['commence_time', 'line', 'width', 'ev_pct', 'kelly_pct', 'default']
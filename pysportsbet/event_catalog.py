@@ -0,0 +1,160 @@
+"""
+Cached catalog of historical events.
+
+Listing historical events at every interval step re-downloads overlapping event lists and costs credits on every run.
+The catalog remembers which (sport, day) listings have been swept, merges the events of every sweep keyed by event
+id, and keeps the commence_time of the latest listing so postponed games move to their new time. Range queries
+("events commencing between from and to") are answered from a sorted index with bisect, and only days never swept
+before cost /events calls. A day only counts as swept once it is over, so games listed later that day are not
+missed.
+"""
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+from pysportsbet import backfill, timestamps
+
+# Minutes between listings of one day
+DAY_MINS = 24 * 60
+
+
+class EventCatalog(object):
+    """
+    Historical events of any number of sports, with the days already swept.
+
+    Args:
+        path (str): JSON file persisting the catalog. Kept in memory only if None.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # Events keyed by sport then id, each with the 'listed_at' timestamp of the listing it comes from
+        self.events = {}
+        # Swept days ('YYYY-MM-DD') keyed by sport
+        self.days = {}
+        self._index = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.events = saved["events"]
+            self.days = {sport: set(days) for sport, days in saved["days"].items()}
+
+    def save(self):
+        """
+        Write the catalog to its file, atomically.
+        """
+        if not self.path:
+            return
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"events": self.events, "days": {sport: sorted(days) for sport, days in self.days.items()}}, f)
+        os.replace(temporary, self.path)
+
+    def merge(self, sport_key, listing):
+        """
+        Merge the events of a historical events response.
+
+        Events already known from a later listing are left alone, so the latest commence_time always wins.
+
+        Args:
+            sport_key (str): Sport key.
+            listing (dict): Historical events response with 'timestamp' and 'data'.
+        """
+        listed_at = listing.get("timestamp") or ""
+        events = self.events.setdefault(sport_key, {})
+        for event in listing.get("data", []):
+            known = events.get(event["id"])
+            if known is None or known["listed_at"] <= listed_at:
+                events[event["id"]] = dict(event, listed_at=listed_at)
+        self._index.pop(sport_key, None)
+
+    def swept(self, sport_key, day):
+        """
+        Check whether a day ('YYYY-MM-DD') of a sport has been swept.
+        """
+        return day in self.days.get(sport_key, set())
+
+    def sweep(self, api_key, sport_key, from_date, to_date, checkpoint, limiter=None, workers=8,
+              interval_mins=DAY_MINS, now=None):
+        """
+        List the events of every day between two dates that has not been swept yet.
+
+        Listings are clipped to the requested range: from the last listing at or before from_date (which still lists
+        the events commencing from then) to to_date. A day is only marked swept once it is over and all of its
+        listings were fetched; listings of a partly swept day are kept in the checkpoint, so a later sweep of it only
+        fetches the rest.
+
+        Args:
+            api_key (str): The Odds API key.
+            sport_key (str): Sport key.
+            from_date (str): Start of the range to sweep, in ISO 8601 format ending in 'Z'.
+            to_date (str): End of the range to sweep, in ISO 8601 format ending in 'Z'.
+            checkpoint (backfill.Checkpoint): Checkpoint receiving the listings.
+            limiter (backfill.QuotaLimiter): Limiter pacing the requests.
+            workers (int): Number of concurrent requests.
+            interval_mins (int): Minutes between listings within a day.
+            now (datetime.datetime): Current time. Defaults to the current UTC time.
+
+        Returns:
+            int: Number of days marked swept.
+        """
+        start = timestamps.parse(from_date)
+        end = timestamps.parse(to_date)
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Listings of every day still to sweep, and whether they cover the whole day
+        listings = {}
+        while day <= end:
+            if not self.swept(sport_key, day.date().isoformat()):
+                moments = [day + timedelta(minutes=minutes) for minutes in range(0, DAY_MINS, max(1, interval_mins))]
+                first = max((moment for moment in moments if moment <= start), default=moments[0])
+                clipped = [moment for moment in moments if first <= moment <= end]
+                listings[day.date().isoformat()] = (
+                    [timestamps.format_timestamp(moment) for moment in clipped],
+                    len(clipped) == len(moments) and day + timedelta(days=1) <= now)
+            day += timedelta(days=1)
+        if not listings:
+            return 0
+
+        planned = backfill.plan_events(sport_key, [timestamp for times, _ in listings.values() for timestamp in times])
+        backfill.run(api_key, planned, checkpoint, limiter=limiter, workers=workers)
+        wanted = {request.key for request in planned}
+        for record in checkpoint.iter_records(prefix=f"events|{sport_key}|"):
+            if record["key"] in wanted:
+                self.merge(sport_key, record)
+
+        swept = 0
+        for listed_day, (times, whole) in listings.items():
+            if whole and all(checkpoint.done(f"events|{sport_key}|{timestamp}") for timestamp in times):
+                self.days.setdefault(sport_key, set()).add(listed_day)
+                swept += 1
+        self.save()
+        return swept
+
+    def index(self, sport_key):
+        """
+        Return the sorted (commence_time, event id) index of a sport.
+        """
+        if sport_key not in self._index:
+            self._index[sport_key] = sorted(
+                (event["commence_time"], event_id) for event_id, event in self.events.get(sport_key, {}).items())
+        return self._index[sport_key]
+
+    def between(self, sport_key, from_date, to_date):
+        """
+        Return the events of a sport commencing between two times (inclusive), in commence_time order.
+
+        Args:
+            sport_key (str): Sport key.
+            from_date (str): Earliest commence time in ISO 8601 format ending in 'Z'.
+            to_date (str): Latest commence time in ISO 8601 format ending in 'Z'.
+
+        Returns:
+            list: Events with 'id', 'commence_time' and the other fields of the listing.
+        """
+        index = self.index(sport_key)
+        start = bisect_left(index, (from_date,))
+        end = bisect_right(index, (to_date, chr(0x10FFFF)))
+        events = self.events[sport_key] if index else {}
+        return [events[event_id] for _, event_id in index[start:end]]
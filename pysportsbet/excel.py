@@ -0,0 +1,137 @@
+"""
+Fast Excel output for live loops.
+
+Rewriting a whole sheet on every poll (delete every row, append every row, save) churns one openpyxl cell object per
+value and rewrites the whole file, which takes seconds once a slate is large. A LiveSheet instead keeps the row of
+every key (e.g. event, bookmaker and market) and the values last written to it, and only touches the cells whose
+value changed; rows whose key disappears are blanked and reused by the next new key. Saves go through a
+ThrottledSaver, which writes at most once per interval, to a temporary file renamed over the spreadsheet, so a reader
+never opens a half-written file.
+"""
+import heapq
+import os
+import time
+
+# Columns keying the rows of the live loops' format_* outputs
+ODDS_KEY_COLUMNS = (0, 2, 4)  # id, bookmaker, market
+SCORES_KEY_COLUMNS = (0,)  # id
+
+
+class LiveSheet(object):
+    """
+    A worksheet of metadata rows, a blank row, a header and keyed data rows, updated in place.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): Worksheet to write, assumed empty.
+        key_columns (tuple): Indices of the columns identifying a data row.
+        meta_rows (int): Number of metadata rows above the table.
+    """
+
+    def __init__(self, ws, key_columns, meta_rows=2):
+        self.ws = ws
+        self.key_columns = key_columns
+        self.meta_rows = meta_rows
+        self.header_row = meta_rows + 2
+        # Row number and last written values of every key
+        self.index = {}
+        self.values = {}
+        self.meta = [None] * meta_rows
+        self.header = None
+        self.next_row = self.header_row + 1
+        self.free = []
+
+    def _write_row(self, row_number, values, previous):
+        changed = 0
+        previous = previous or ()
+        for column in range(max(len(values), len(previous))):
+            value = values[column] if column < len(values) else None
+            if value != (previous[column] if column < len(previous) else None):
+                self.ws.cell(row=row_number, column=column + 1).value = value
+                changed += 1
+        return changed
+
+    def update(self, meta, rows):
+        """
+        Bring the sheet up to date with the latest poll.
+
+        Args:
+            meta (list): Metadata rows, at most meta_rows of them.
+            rows (list): Header row followed by data rows, as returned by the format_* functions.
+
+        Returns:
+            int: Number of cells written.
+        """
+        changed = 0
+        for position, values in enumerate(meta[:self.meta_rows]):
+            changed += self._write_row(position + 1, values, self.meta[position])
+            self.meta[position] = list(values)
+        if rows:
+            changed += self._write_row(self.header_row, rows[0], self.header)
+            self.header = list(rows[0])
+
+        seen = set()
+        for values in rows[1:]:
+            key = tuple(values[column] for column in self.key_columns)
+            seen.add(key)
+            row_number = self.index.get(key)
+            if row_number is None:
+                if self.free:
+                    row_number = heapq.heappop(self.free)
+                else:
+                    row_number, self.next_row = self.next_row, self.next_row + 1
+                self.index[key] = row_number
+            changed += self._write_row(row_number, values, self.values.get(key))
+            self.values[key] = list(values)
+
+        for key in [key for key in self.index if key not in seen]:
+            row_number = self.index.pop(key)
+            changed += self._write_row(row_number, [], self.values.pop(key))
+            heapq.heappush(self.free, row_number)
+        return changed
+
+
+class ThrottledSaver(object):
+    """
+    Saves a workbook at most once per interval, atomically.
+
+    Args:
+        wb (openpyxl.Workbook): Workbook to save.
+        path (str): Spreadsheet file.
+        min_interval (float): Minimum seconds between saves.
+    """
+
+    def __init__(self, wb, path, min_interval=5):
+        self.wb = wb
+        self.path = path
+        self.min_interval = min_interval
+        self.pending = False
+        self.last_save = None
+
+    def request(self):
+        """
+        Mark the workbook changed and save it if the last save is at least min_interval old.
+
+        Returns:
+            bool: Whether the workbook was saved.
+        """
+        self.pending = True
+        if self.last_save is not None and time.monotonic() - self.last_save < self.min_interval:
+            return False
+        return self.flush()
+
+    def flush(self):
+        """
+        Save pending changes now.
+
+        Returns:
+            bool: Whether the workbook was saved.
+        """
+        if not self.pending:
+            return False
+        root, extension = os.path.splitext(self.path)
+        temporary = f"{root}.tmp{extension}"
+        self.wb.save(temporary)
+        os.replace(temporary, self.path)
+        self.pending = False
+        self.last_save = time.monotonic()
+        return True
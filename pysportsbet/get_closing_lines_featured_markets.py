@@ -1,6 +1,4 @@
-import requests
-import openpyxl
-from datetime import datetime, timedelta
+from pysportsbet import backfill, closing_lines, event_catalog, sinks
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -13,7 +11,11 @@ BOOKMAKERS = "betonlineag"  # Optional: Specific bookmaker
 ODDS_FORMAT = "american"  # Format of the odds: 'american' or 'decimal'
 FROM_DATE = "2023-12-31T00:00:00Z"  # Start date for data retrieval
 TO_DATE = "2024-01-01T00:00:00Z"  # End date for data retrieval
-INTERVAL_MINS = 60 * 24  # Interval between historical snapshots
+INTERVAL_MINS = 60 * 24  # Interval between event listings within a day
+CHECKPOINT_FILE = "closing_lines_featured.ndjson"  # Responses fetched so far, never requested again
+OUTPUT_DIR = "closing_lines"  # Parquet dataset receiving the newly collected closing lines
+CATALOG_FILE = "event_catalog.json"  # Events listed so far, days already swept are not listed again
+WORKERS = 8  # Number of concurrent requests
 
 # Column headers for the Excel output
 HEADERS = [
@@ -23,47 +25,6 @@ HEADERS = [
 ]
 
 
-def fetch_events(api_key, sport_key, timestamp):
-    """
-    Fetch historical events from The Odds API.
-    """
-    url = f"https://api.the-odds-api.com/v4/historical/sports/{sport_key}/events"
-    params = {"apiKey": api_key, "date": timestamp}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
-
-
-def fetch_odds(api_key, sport_key, regions, bookmakers, markets, odds_format, timestamp, event_ids):
-    """
-    Fetch odds for specific events from The Odds API.
-    """
-    bookmakers_param = f"bookmakers={bookmakers}" if bookmakers else f"regions={regions}"
-    event_ids_param = f"&eventIds={','.join(event_ids)}" if event_ids else ""
-    url = f"https://api.the-odds-api.com/v4/historical/sports/{sport_key}/odds"
-    params = {
-        "apiKey": api_key,
-        bookmakers_param: bookmakers_param,
-        "markets": markets,
-        "oddsFormat": odds_format,
-        "date": timestamp,
-    }
-    response = requests.get(url + event_ids_param, params=params)
-    response.raise_for_status()
-    return response.json()
-
-
-def extract_commence_times(events, from_date, to_date):
-    """
-    Extract event commence times within a specified range.
-    """
-    event_commence_times = {}
-    for event in events:
-        if from_date <= event["commence_time"] <= to_date:
-            event_commence_times[event["id"]] = event["commence_time"]
-    return event_commence_times
-
-
 def format_event_output(response):
     """
     Format API response into rows suitable for Excel output.
@@ -97,43 +58,26 @@ def format_event_output(response):
 
 def main():
     """
-    Main function to query data and save it to an Excel spreadsheet.
+    Main function to collect closing lines and save them to an Excel spreadsheet, or the file or format given by
+    --sink.
     """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write headers
-    ws.append(HEADERS)
-
-    # Parse dates and initialize variables
-    from_datetime = datetime.fromisoformat(FROM_DATE[:-1])
-    to_datetime = datetime.fromisoformat(TO_DATE[:-1])
-    current_datetime = from_datetime
-    event_commence_times = {}
-
-    # Fetch events over the date range
-    while current_datetime <= to_datetime:
-        formatted_timestamp = current_datetime.isoformat() + "Z"
-        print(f"Gathering games {formatted_timestamp}")
-        events_response = fetch_events(API_KEY, SPORT_KEY, formatted_timestamp)
-        event_commence_times.update(
-            extract_commence_times(events_response.get("data", []), FROM_DATE, TO_DATE)
-        )
-        current_datetime += timedelta(minutes=INTERVAL_MINS)
-
-    # Group events by commence time
-    grouped_events = {}
-    for commence_time in set(event_commence_times.values()):
-        grouped_events[commence_time] = [
-            event_id for event_id, time in event_commence_times.items() if time == commence_time
-        ]
-
-    # Fetch odds and write to the spreadsheet
-    for commence_time, event_ids in grouped_events.items():
-        print(f"Querying closing lines for commence time {commence_time}")
-        odds_response = fetch_odds(API_KEY, SPORT_KEY, REGIONS, BOOKMAKERS, MARKETS, ODDS_FORMAT, commence_time,
-                                   event_ids)
-        formatted_rows = format_event_output(odds_response)
-        for row in formatted_rows:
-            ws.ap
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+    checkpoint = backfill.Checkpoint(CHECKPOINT_FILE)
+    closing_lines.collect(API_KEY, SPORT_KEY, REGIONS, BOOKMAKERS, MARKETS, ODDS_FORMAT, FROM_DATE, TO_DATE,
+                          INTERVAL_MINS, checkpoint, output_dir=OUTPUT_DIR, featured=True, workers=WORKERS,
+                          catalog=event_catalog.EventCatalog(CATALOG_FILE))
+
+    # Write the closing lines of every event commencing in the date range
+    def rows():
+        prefix = closing_lines.key_prefix(SPORT_KEY, REGIONS, BOOKMAKERS, MARKETS, featured=True)
+        for record in checkpoint.iter_records(prefix=prefix):
+            commence_time = record["key"].split("|")[3]
+            if FROM_DATE <= commence_time <= TO_DATE:
+                yield from format_event_output(record)
+
+    sinks.save_rows(output_file, HEADERS, rows(), sheet_name=SHEET_NAME)
+    print(f"Data saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
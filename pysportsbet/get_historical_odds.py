@@ -1,6 +1,4 @@
-import requests
-import openpyxl
-from datetime import datetime, timedelta
+from pysportsbet import backfill, sinks, store
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -14,6 +12,11 @@ ODDS_FORMAT = "american"  # Odds format: 'american' or 'decimal'
 FROM_DATE = "2023-09-10T00:00:00Z"  # Start date
 TO_DATE = "2023-09-10T12:00:00Z"  # End date
 INTERVAL_MINS = 60  # Interval between snapshots in minutes
+CHECKPOINT_FILE = "historical_odds.ndjson"  # Responses fetched so far, resumed on the next run
+STORE_DIR = "odds_store"  # Local Parquet store of every snapshot fetched, consulted before fetching
+WORKERS = 8  # Number of concurrent requests
+REQUESTS_PER_SECOND = 5  # Maximum request rate
+MIN_REQUESTS_REMAINING = 0  # Stop before the remaining usage quota drops below this
 
 HEADERS = [
     "timestamp", "id", "commence_time", "bookmaker", "last_update",
@@ -22,39 +25,6 @@ HEADERS = [
 ]
 
 
-def fetch_odds(api_key, sport_key, regions, bookmakers, markets, odds_format, timestamp):
-    """
-    Fetch historical odds data for a specific sport and timestamp.
-
-    Args:
-        api_key (str): The Odds API key.
-        sport_key (str): Sport key (e.g., 'baseball_mlb').
-        regions (str): Comma-separated list of regions (e.g., 'us').
-        bookmakers (str): Comma-separated list of bookmakers.
-        markets (str): Comma-separated list of markets.
-        odds_format (str): Format of the odds ('american' or 'decimal').
-        timestamp (str): Date and time of the snapshot (ISO 8601 format).
-
-    Returns:
-        dict: A dictionary containing metadata and response content.
-    """
-    bookmakers_param = f"bookmakers={bookmakers}" if bookmakers else f"regions={regions}"
-    url = f"https://api.the-odds-api.com/v4/historical/sports/{sport_key}/odds"
-    params = {
-        "apiKey": api_key,
-        bookmakers_param: bookmakers_param,
-        "markets": markets,
-        "oddsFormat": odds_format,
-        "date": timestamp
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return {
-        "metaData": format_response_meta_data(response.headers),
-        "responseContent": response.json()
-    }
-
-
 def format_event_output(response):
     """
     Format the API response into rows suitable for Excel output.
@@ -89,75 +59,30 @@ def format_event_output(response):
     return rows
 
 
-def format_response_meta_data(headers):
-    """
-    Extract metadata from response headers.
-
-    Args:
-        headers (dict): Response headers.
-
-    Returns:
-        list: A list of metadata rows.
-    """
-    return [
-        ["Requests Used", headers.get("x-requests-used")],
-        ["Requests Remaining", headers.get("x-requests-remaining")]
-    ]
-
-
 def main():
     """
-    Main function to fetch historical odds data and save it to an Excel file.
+    Main function to backfill historical odds data and save it to an Excel file, or the file or format given by --sink.
+
+    Responses are checkpointed to CHECKPOINT_FILE as they arrive, so an interrupted run resumes where it stopped, and
+    added to the store in STORE_DIR. The output holds every stored snapshot of the range, including those fetched by
+    earlier runs.
 
     Writes:
         Excel file specified in SPREADSHEET_FILE.
     """
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write headers
-    ws.append(HEADERS)
-
-    # Parse date strings into datetime objects
-    from_datetime = datetime.fromisoformat(FROM_DATE[:-1])
-    to_datetime = datetime.fromisoformat(TO_DATE[:-1])
-    current_datetime = to_datetime
-
-    # Initialize output row
-    output_row = 2
-
-    while current_datetime > from_datetime:
-        formatted_date = current_datetime.isoformat() + "Z"
-        print(f"Fetching odds for {formatted_date}")
-
-        # Fetch odds data
-        data = fetch_odds(API_KEY, SPORT_KEY, REGIONS, BOOKMAKERS, MARKETS, ODDS_FORMAT, formatted_date)
-
-        # Write metadata to Excel
-        for i, meta_row in enumerate(data["metaData"]):
-            ws.cell(row=i + 1, column=1, value=meta_row[0])
-            ws.cell(row=i + 1, column=2, value=meta_row[1])
-
-        # Write odds data to Excel
-        formatted_response = format_event_output(data["responseContent"])
-        for row in formatted_response:
-            ws.append(row)
-        output_row += len(formatted_response)
-
-        # Update the current timestamp
-        previous_timestamp = data["responseContent"].get("previous_timestamp")
-        if not previous_timestamp:
-            print("No earlier historical data available.")
-            break
-        current_datetime = min(
-            current_datetime - timedelta(minutes=INTERVAL_MINS),
-            datetime.fromisoformat(previous_timestamp[:-1])
-        )
-
-    # Save the workbook
-    wb.save(SPREADSHEET_FILE)
-    print(f"Data saved to {SPREADSHEET_FILE}")
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+    checkpoint = backfill.Checkpoint(CHECKPOINT_FILE)
+    historical = store.HistoricalStore(STORE_DIR)
+    limiter = backfill.QuotaLimiter(REQUESTS_PER_SECOND, min_remaining=MIN_REQUESTS_REMAINING)
+    backfill.backfill_odds(API_KEY, SPORT_KEY, REGIONS, BOOKMAKERS, MARKETS, ODDS_FORMAT, FROM_DATE, TO_DATE,
+                           INTERVAL_MINS, checkpoint, limiter=limiter, workers=WORKERS, store=historical)
+
+    # Write metadata and odds data, latest snapshot first
+    records = historical.responses(SPORT_KEY, MARKETS, REGIONS, BOOKMAKERS, start=FROM_DATE, end=TO_DATE,
+                                   reverse=True)
+    rows = (row for record in records for row in format_event_output(record))
+    sinks.save_rows(output_file, HEADERS, rows, meta=limiter.meta_data(), sheet_name=SHEET_NAME)
+    print(f"Data saved to {output_file}")
 
 
 if __name__ == "__main__":
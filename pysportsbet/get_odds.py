@@ -1,5 +1,6 @@
 import requests
-import openpyxl
+
+from pysportsbet import sinks
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -119,33 +120,20 @@ def format_response_meta_data(headers):
 
 def main():
     """
-    Main function to fetch odds and save them to an Excel file.
+    Main function to fetch odds and save them to an Excel file, or the file or format given by --sink.
 
     Writes:
         An Excel file with metaData and eventData saved to `SPREADSHEET_FILE`.
     """
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+
     # Fetch odds data
     data = fetch_odds(API_KEY, SPORT_KEY, MARKETS, REGIONS, BOOKMAKERS, ODDS_FORMAT, DATE_FORMAT)
 
-    # Initialize the Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write metadata
-    for row in data["metaData"]:
-        ws.append(row)
-
-    # Write an empty row as spacing
-    ws.append([])
-
-    # Write event data
-    for row in data["eventData"]:
-        ws.append(row)
-
-    # Save the workbook to a file
-    wb.save(SPREADSHEET_FILE)
-    print(f"Data saved to {SPREADSHEET_FILE}")
+    # Write metadata and event data; the first row of eventData is the header
+    header, *rows = data["eventData"]
+    sinks.save_rows(output_file, header, rows, meta=data["metaData"], sheet_name=SHEET_NAME)
+    print(f"Data saved to {output_file}")
 
 
 if __name__ == "__main__":
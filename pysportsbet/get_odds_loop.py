@@ -1,6 +1,9 @@
+import threading
+
 import requests
 import openpyxl
-import time
+
+from pysportsbet import cadence, changes, excel, hub, scheduler, sqlite_store
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -12,6 +15,14 @@ REGIONS = "us"  # Supported regions: us, uk, eu, au
 ODDS_FORMAT = "american"  # Odds format: 'american' or 'decimal'
 DATE_FORMAT = "iso"  # Date format: 'iso' or 'unix'
 UPDATES_PER_MINUTE = 12  # Number of updates per minute (e.g., 12 updates = every 5 seconds)
+JOBS = [(SPORT_KEY, MARKETS, REGIONS)]  # (sport, markets, regions) polled concurrently, each into its own sheet
+RUN_SECONDS = None  # Stop after this many seconds; run until interrupted if None
+CREDITS_PER_HOUR = None  # If set, poll every job adaptively by time to commence within this hourly credit budget
+POLL_TICK_SECONDS = 5  # Seconds between checks for due tiers when polling adaptively
+CHANGES_FILE = "odds_changes.ndjson"  # Feed of new, moved and removed prices of every poll; not written if None
+SAVE_INTERVAL_SECONDS = 5  # Minimum seconds between saves of the spreadsheet
+HUB_PORT = None  # If set, stream odds and changes as Server-Sent Events on this local port (GET /events)
+DATABASE_FILE = None  # If set, upsert every poll into this SQLite database (see sqlite_store)
 
 
 def fetch_odds(api_key, sport_key, markets, regions, odds_format, date_format):
@@ -27,7 +38,7 @@ def fetch_odds(api_key, sport_key, markets, regions, odds_format, date_format):
         date_format (str): Format of the date ('iso' or 'unix').
 
     Returns:
-        dict: A dictionary containing 'metaData' and 'eventData' for spreadsheet output.
+        dict: A dictionary containing 'metaData' and 'eventData' for spreadsheet output, and the raw 'events'.
     """
     url = (
         f"https://api.the-odds-api.com/v4/sports/{sport_key}/odds?"
@@ -35,9 +46,11 @@ def fetch_odds(api_key, sport_key, markets, regions, odds_format, date_format):
     )
     response = requests.get(url, headers={"content-type": "application/json"})
     response.raise_for_status()
+    events = response.json()
     return {
         "metaData": format_response_meta_data(response.headers),
-        "eventData": format_events(response.json()),
+        "eventData": format_events(events),
+        "events": events,
     }
 
 
@@ -106,45 +119,146 @@ def format_response_meta_data(headers):
     ]
 
 
-def main():
+def write_sheet(sheet, saver, lock, data):
     """
-    Main function to fetch odds data periodically and save them to an Excel file.
+    Update the changed cells of a job's sheet and save the workbook, at most once per `SAVE_INTERVAL_SECONDS`.
 
-    This function clears the spreadsheet and updates it with new odds data at intervals
-    determined by `UPDATES_PER_MINUTE`.
+    Args:
+        sheet (excel.LiveSheet): Sheet of the job.
+        saver (excel.ThrottledSaver): Saver of the workbook shared by all jobs.
+        lock (threading.Lock): Lock serializing writes to the workbook.
+        data (dict): 'metaData' and 'eventData' rows.
 
-    Writes:
-        An Excel file with metaData and eventData saved to `SPREADSHEET_FILE`.
+    Returns:
+        int: Number of cells written.
     """
-    # Initialize the Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
+    with lock:
+        changed = sheet.update(data["metaData"], data["eventData"])
+        # Changes held back by the throttle are saved by a later poll, even one without changes
+        if changed or saver.pending:
+            saver.request()
+    return changed
+
+
+def record_changes(detector, lock, events, odds_hub=None, odds_store=None):
+    """
+    Append the price changes since the previous poll of a job to `CHANGES_FILE`, publish them and store the poll.
+
+    Args:
+        detector (changes.ChangeDetector): Change detector of the job.
+        lock (threading.Lock): Lock serializing writes shared by all jobs.
+        events (list): Events of the job's latest poll.
+        odds_hub (hub.Hub): Hub receiving the events and their changes, if any.
+        odds_store (sqlite_store.OddsStore): Database receiving the events, if any.
+
+    Returns:
+        list: The change records.
+    """
+    feed = detector.update(events)
+    if odds_hub is not None:
+        odds_hub.publish_odds(events)
+        odds_hub.publish_changes(feed)
+    if odds_store is not None:
+        odds_store.add_odds(events)
+    if CHANGES_FILE:
+        with lock:
+            changes.write_changes(feed, CHANGES_FILE)
+    return feed
+
 
-    for _ in range(UPDATES_PER_MINUTE):
-        # Fetch odds data
-        data = fetch_odds(API_KEY, SPORT_KEY, MARKETS, REGIONS, ODDS_FORMAT, DATE_FORMAT)
+def update_sheet(sheet, saver, lock, detector, odds_hub, odds_store, sport_key, markets, regions):
+    """
+    Fetch the odds of one job, record their changes and update its sheet with them.
+
+    Args:
+        sheet (excel.LiveSheet): Sheet of the job.
+        saver (excel.ThrottledSaver): Saver of the workbook shared by all jobs.
+        lock (threading.Lock): Lock serializing writes to the workbook.
+        detector (changes.ChangeDetector): Change detector of the job.
+        odds_hub (hub.Hub): Hub receiving every poll, or None.
+        odds_store (sqlite_store.OddsStore): Database receiving every poll, or None.
+        sport_key (str): Sport key.
+        markets (str): Comma-separated list of betting markets.
+        regions (str): Comma-separated list of regions.
+    """
+    # Fetch odds data outside the lock so jobs fetch concurrently
+    data = fetch_odds(API_KEY, sport_key, markets, regions, ODDS_FORMAT, DATE_FORMAT)
+    feed = record_changes(detector, lock, data["events"], odds_hub, odds_store)
+    cells = write_sheet(sheet, saver, lock, data)
+    print(f"Updated {sport_key} odds: {len(feed)} changes, {cells} cells written to {SPREADSHEET_FILE}")
+
+
+def update_sheet_adaptive(sheet, saver, lock, detector, odds_hub, odds_store, poller):
+    """
+    Fetch the tiers of one job that are due and update its sheet with the latest odds of all its events.
+
+    Args:
+        sheet (excel.LiveSheet): Sheet of the job.
+        saver (excel.ThrottledSaver): Saver of the workbook shared by all jobs.
+        lock (threading.Lock): Lock serializing writes to the workbook.
+        detector (changes.ChangeDetector): Change detector of the job.
+        odds_hub (hub.Hub): Hub receiving every poll, or None.
+        odds_store (sqlite_store.OddsStore): Database receiving every poll, or None.
+        poller (cadence.AdaptivePoller): Poller of the job.
+    """
+    polled = poller.poll()
+    if polled:
+        events = sorted(poller.events.values(), key=lambda event: (event["commence_time"], event["id"]))
+        feed = record_changes(detector, lock, events, odds_hub, odds_store)
+        data = {"metaData": poller.limiter.meta_data(), "eventData": format_events(events)}
+        cells = write_sheet(sheet, saver, lock, data)
+        print(f"Updated {poller.sport_key} odds ({', '.join(polled)}): {len(feed)} changes, {cells} cells written to "
+              f"{SPREADSHEET_FILE}")
 
-        # Clear the spreadsheet content
-        ws.delete_rows(1, ws.max_row)
 
-        # Write metadata
-        for row in data["metaData"]:
-            ws.append(row)
+def main():
+    """
+    Main function to poll odds data and save them to an Excel file.
+
+    Every job in `JOBS` is polled `UPDATES_PER_MINUTE` times a minute on a drift-free schedule, concurrently with
+    the others, until `RUN_SECONDS` elapse or the script is interrupted. With `CREDITS_PER_HOUR` set, every job is
+    polled adaptively instead: live games and games starting soon often, games further out rarely, and all jobs
+    together within the hourly credit budget.
 
-        # Write an empty row as spacing
-        ws.append([])
+    Writes:
+        An Excel file with metaData and eventData of every job saved to `SPREADSHEET_FILE`; only changed cells are
+        updated between polls.
+    """
+    # Initialize the Excel workbook with one sheet per job
+    wb = openpyxl.Workbook()
+    wb.active.title = SHEET_NAME
+    saver = excel.ThrottledSaver(wb, SPREADSHEET_FILE, SAVE_INTERVAL_SECONDS)
+    lock = threading.Lock()
 
-        # Write event data
-        for row in data["eventData"]:
-            ws.append(row)
+    # Consumers subscribe to the hub instead of polling the API themselves
+    odds_hub = hub.Hub() if HUB_PORT else None
+    server = hub.serve(odds_hub, port=HUB_PORT) if HUB_PORT else None
+    odds_store = sqlite_store.OddsStore(DATABASE_FILE) if DATABASE_FILE else None
 
-        # Save the workbook to a file
-        wb.save(SPREADSHEET_FILE)
-        print(f"Updated data saved to {SPREADSHEET_FILE}")
+    polling = scheduler.Scheduler()
+    for index, (sport_key, markets, regions) in enumerate(JOBS):
+        sheet_name = SHEET_NAME if index == 0 else f"{SHEET_NAME} {index + 1}"
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.create_sheet(sheet_name)
+        sheet = excel.LiveSheet(ws, excel.ODDS_KEY_COLUMNS)
+        name = f"{sport_key} {markets} {regions}"
+        if CREDITS_PER_HOUR is None:
+            polling.add(name, 60 / UPDATES_PER_MINUTE, update_sheet, sheet, saver, lock, changes.ChangeDetector(),
+                        odds_hub, odds_store, sport_key, markets, regions)
+        else:
+            # Split the budget evenly across jobs
+            poller = cadence.AdaptivePoller(API_KEY, sport_key, regions, "", markets, ODDS_FORMAT,
+                                            credits_per_hour=CREDITS_PER_HOUR / len(JOBS))
+            polling.add(name, POLL_TICK_SECONDS, update_sheet_adaptive, sheet, saver, lock, changes.ChangeDetector(),
+                        odds_hub, odds_store, poller)
 
-        # Pause before the next update
-        time.sleep(60 / UPDATES_PER_MINUTE)
+    polling.run(RUN_SECONDS)
+    # Save the changes held back by the throttle
+    saver.flush()
+    print(polling.report())
+    if server is not None:
+        server.shutdown()
+    if odds_store is not None:
+        odds_store.close()
 
 
 if __name__ == "__main__":
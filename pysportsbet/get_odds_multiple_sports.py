@@ -1,5 +1,6 @@
 import requests
-import openpyxl
+
+from pysportsbet import sinks
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -99,7 +100,8 @@ def format_response_meta_data(headers):
 
 def main():
     """
-    Main function to fetch odds data for multiple sports and save them to an Excel file.
+    Main function to fetch odds data for multiple sports and save them to an Excel file, or the file or format given
+    by --sink.
 
     This function clears the spreadsheet, fetches data for all sports in `SPORT_KEYS`,
     and aggregates them into a single spreadsheet.
@@ -107,6 +109,8 @@ def main():
     Writes:
         An Excel file with metaData and eventData saved to `SPREADSHEET_FILE`.
     """
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+
     # Fetch odds data for all sports
     responses = [fetch_odds(API_KEY, sport_key, MARKETS, REGIONS, ODDS_FORMAT, DATE_FORMAT) for sport_key in SPORT_KEYS]
 
@@ -115,32 +119,14 @@ def main():
         "sport_key", "id", "commence_time", "bookmaker", "last_update", "market",
         "home_team", "home_odd", "home_point", "away_team", "away_odd", "away_point", "draw_odd"
     ]
-    aggregated_events = [headers]
-    for response in responses:
-        aggregated_events.extend(response["eventData"])
+    aggregated_events = (row for response in responses for row in response["eventData"])
 
     # Use the metadata from the last response
     meta_data = responses[-1]["metaData"]
 
-    # Initialize the Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write metadata
-    for row in meta_data:
-        ws.append(row)
-
-    # Add an empty row for spacing
-    ws.append([])
-
-    # Write aggregated event data
-    for row in aggregated_events:
-        ws.append(row)
-
-    # Save the workbook to a file
-    wb.save(SPREADSHEET_FILE)
-    print(f"Data saved to {SPREADSHEET_FILE}")
+    # Write metadata and aggregated event data
+    sinks.save_rows(output_file, headers, aggregated_events, meta=meta_data, sheet_name=SHEET_NAME)
+    print(f"Data saved to {output_file}")
 
 
 if __name__ == "__main__":
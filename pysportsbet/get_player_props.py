@@ -1,5 +1,6 @@
 import requests
-import openpyxl
+
+from pysportsbet import sinks
 
 # Configuration constants
 SPREADSHEET_FILE = "odds_data.xlsx"  # Path to the output Excel file
@@ -117,7 +118,7 @@ def format_response_meta_data(headers):
 
 def main():
     """
-    Main function to fetch player props and save them to an Excel file.
+    Main function to fetch player props and save them to an Excel file, or the file or format given by --sink.
 
     This function fetches events, queries markets for each event, and writes the aggregated
     data into a single spreadsheet.
@@ -125,6 +126,8 @@ def main():
     Writes:
         An Excel file with metadata and event data saved to `SPREADSHEET_FILE`.
     """
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+
     # Fetch events
     events = fetch_events(API_KEY, SPORT_KEY, "h2h", REGIONS, BOOKMAKERS, ODDS_FORMAT, DATE_FORMAT)
 
@@ -142,32 +145,14 @@ def main():
         output.extend(market_response["eventData"])
         meta_data = market_response["metaData"]
 
-    # Add headers to the output
     headers = [
         "id", "commence_time", "bookmaker", "last_update", "home_team",
         "away_team", "market", "label", "description", "price", "point"
     ]
-    output.insert(0, headers)
-
-    # Initialize the Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write metadata
-    for row in meta_data:
-        ws.append(row)
-
-    # Add an empty row for spacing
-    ws.append([])
-
-    # Write event data
-    for row in output:
-        ws.append(row)
 
-    # Save the workbook to a file
-    wb.save(SPREADSHEET_FILE)
-    print(f"Data saved to {SPREADSHEET_FILE}")
+    # Write metadata and event data
+    sinks.save_rows(output_file, headers, output, meta=meta_data, sheet_name=SHEET_NAME)
+    print(f"Data saved to {output_file}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import requests
-import openpyxl
+
+from pysportsbet import scores, sinks
 
 # Configuration constants
 SPREADSHEET_FILE = "scores_data.xlsx"  # Path to the output Excel file
@@ -52,14 +53,9 @@ def format_events_scores(events):
         ]
     ]
     for event in events:
-        home_score = next(
-            (score["score"] for score in event.get("scores", []) if score["name"] == event["home_team"]),
-            None
-        )
-        away_score = next(
-            (score["score"] for score in event.get("scores", []) if score["name"] == event["away_team"]),
-            None
-        )
+        team_scores = scores.team_scores(event)
+        home_score = team_scores.get(event["home_team"])
+        away_score = team_scores.get(event["away_team"])
         rows.append([
             event["id"],
             event["commence_time"],
@@ -91,35 +87,22 @@ def format_response_meta_data_scores(headers):
 
 def main():
     """
-    Main function to fetch scores and save them to an Excel file.
+    Main function to fetch scores and save them to an Excel file, or the file or format given by --sink.
 
     This function fetches scores data and writes the aggregated data into a spreadsheet.
 
     Writes:
         An Excel file with metadata and scores data saved to `SPREADSHEET_FILE`.
     """
+    output_file = sinks.parse_sink(SPREADSHEET_FILE)
+
     # Fetch scores data
     data = fetch_scores(API_KEY, SPORT_KEY, DAYS_FROM, DATE_FORMAT)
 
-    # Initialize the Excel workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    # Write metadata
-    for row in data["metaData"]:
-        ws.append(row)
-
-    # Add an empty row for spacing
-    ws.append([])
-
-    # Write scores data
-    for row in data["eventData"]:
-        ws.append(row)
-
-    # Save the workbook to a file
-    wb.save(SPREADSHEET_FILE)
-    print(f"Scores data saved to {SPREADSHEET_FILE}")
+    # Write metadata and scores data; the first row of eventData is the header
+    header, *rows = data["eventData"]
+    sinks.save_rows(output_file, header, rows, meta=data["metaData"], sheet_name=SHEET_NAME)
+    print(f"Scores data saved to {output_file}")
 
 
 if __name__ == "__main__":
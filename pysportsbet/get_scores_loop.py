@@ -1,6 +1,8 @@
-import requests
+import threading
+
 import openpyxl
-import time
+
+from pysportsbet import excel, scheduler, scores, sqlite_store
 
 # Configuration constants
 SPREADSHEET_FILE = "scores_data.xlsx"  # Path to the output Excel file
@@ -10,12 +12,23 @@ SPORT_KEY = "americanfootball_nfl"  # Sport key for querying scores
 DAYS_FROM = 1  # Number of days in the past to fetch scores (0 for live games only)
 DATE_FORMAT = "iso"  # Date format: 'iso' or 'unix'
 UPDATES_PER_MINUTE = 2  # Number of updates per minute (e.g., 2 updates = every 30 seconds)
+SPORT_KEYS = [SPORT_KEY]  # Sports polled concurrently, each into its own sheet
+RUN_SECONDS = None  # Stop after this many seconds; run until interrupted if None
+SAVE_INTERVAL_SECONDS = 5  # Minimum seconds between saves of the spreadsheet
+DATABASE_FILE = None  # If set, upsert every poll into this SQLite database (see sqlite_store)
+CACHE_FILE = "scores_cache.ndjson"  # Completed games, fetched once and kept across runs
+
+# Scores trackers keyed by (api_key, sport_key, days_from, date_format)
+_trackers = {}
 
 
 def fetch_scores(api_key, sport_key, days_from, date_format):
     """
     Fetch scores data from The Odds API.
 
+    Completed games are fetched once and cached in `CACHE_FILE`; after the first call of a run, only the games in
+    play are polled (see scores.ScoresTracker), and not at all while no game is in play.
+
     Args:
         api_key (str): The Odds API key.
         sport_key (str): Sport key (e.g., 'americanfootball_nfl').
@@ -23,17 +36,18 @@ def fetch_scores(api_key, sport_key, days_from, date_format):
         date_format (str): Format of the date ('iso' or 'unix').
 
     Returns:
-        dict: A dictionary containing metadata and event data.
+        dict: A dictionary containing metadata and event data for spreadsheet output, and the 'events' that were new
+            or changed since the previous call.
     """
-    url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/scores?apiKey={api_key}&dateFormat={date_format}"
-    if days_from != 0:
-        url += f"&daysFrom={days_from}"
-
-    response = requests.get(url, headers={"content-type": "application/json"})
-    response.raise_for_status()
+    key = (api_key, sport_key, days_from, date_format)
+    if key not in _trackers:
+        _trackers[key] = scores.ScoresTracker(api_key, sport_key, days_from, date_format, cache_file=CACHE_FILE)
+    tracker = _trackers[key]
+    changed = tracker.poll()
     return {
-        "metaData": format_response_meta_data_scores(response.headers),
-        "eventData": format_events_scores(response.json()),
+        "metaData": tracker.limiter.meta_data(),
+        "eventData": format_events_scores(tracker.events()),
+        "events": changed,
     }
 
 
@@ -54,14 +68,9 @@ def format_events_scores(events):
         ]
     ]
     for event in events:
-        home_score = next(
-            (score["score"] for score in event.get("scores", []) if score["name"] == event["home_team"]),
-            None
-        )
-        away_score = next(
-            (score["score"] for score in event.get("scores", []) if score["name"] == event["away_team"]),
-            None
-        )
+        team_scores = scores.team_scores(event)
+        home_score = team_scores.get(event["home_team"])
+        away_score = team_scores.get(event["away_team"])
         rows.append([
             event["id"],
             event["commence_time"],
@@ -75,61 +84,62 @@ def format_events_scores(events):
     return rows
 
 
-def format_response_meta_data_scores(headers):
+def update_sheet(sheet, saver, lock, odds_store, sport_key):
     """
-    Extract metadata from the response headers.
+    Fetch the scores of one sport and update the changed cells of its sheet.
 
     Args:
-        headers (dict): Response headers from the API request.
-
-    Returns:
-        list: A list of metadata rows for spreadsheet output.
+        sheet (excel.LiveSheet): Sheet of the sport.
+        saver (excel.ThrottledSaver): Saver of the workbook shared by all sports, saving at most once per
+            `SAVE_INTERVAL_SECONDS`.
+        lock (threading.Lock): Lock serializing writes to the workbook.
+        odds_store (sqlite_store.OddsStore): Database receiving every poll, or None.
+        sport_key (str): Sport key.
     """
-    return [
-        ["Requests Used", headers.get("x-requests-used")],
-        ["Requests Remaining", headers.get("x-requests-remaining")],
-    ]
+    # Fetch scores data outside the lock so sports are fetched concurrently
+    data = fetch_scores(API_KEY, sport_key, DAYS_FROM, DATE_FORMAT)
+    if odds_store is not None:
+        odds_store.add_scores(data["events"])
+
+    with lock:
+        cells = sheet.update(data["metaData"], data["eventData"])
+        # Changes held back by the throttle are saved by a later poll, even one without changes
+        if cells or saver.pending:
+            saver.request()
+    print(f"{sport_key} scores updated: {cells} cells written to {SPREADSHEET_FILE}")
 
 
 def main():
     """
-    Main function to fetch scores periodically and save them to an Excel file.
+    Main function to poll scores and save them to an Excel file.
 
-    This function fetches scores data, updates the spreadsheet, and spaces out
-    requests based on `UPDATES_PER_MINUTE`.
+    Every sport in `SPORT_KEYS` is polled `UPDATES_PER_MINUTE` times a minute on a drift-free schedule, concurrently
+    with the others, until `RUN_SECONDS` elapse or the script is interrupted.
 
     Writes:
-        An Excel file with metadata and scores data saved to `SPREADSHEET_FILE`.
+        An Excel file with metadata and scores data of every sport saved to `SPREADSHEET_FILE`; only changed cells
+        are updated between polls.
     """
-    # Initialize the Excel workbook
+    # Initialize the Excel workbook with one sheet per sport
     wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = SHEET_NAME
-
-    for _ in range(UPDATES_PER_MINUTE):
-        # Fetch scores data
-        data = fetch_scores(API_KEY, SPORT_KEY, DAYS_FROM, DATE_FORMAT)
-
-        # Clear existing content
-        ws.delete_rows(1, ws.max_row)
-
-        # Write metadata
-        for row in data["metaData"]:
-            ws.append(row)
-
-        # Add an empty row for spacing
-        ws.append([])
-
-        # Write scores data
-        for row in data["eventData"]:
-            ws.append(row)
-
-        # Save the workbook to a file
-        wb.save(SPREADSHEET_FILE)
-        print(f"Scores data updated and saved to {SPREADSHEET_FILE}")
-
-        # Pause before the next update
-        time.sleep(60 / UPDATES_PER_MINUTE)
+    wb.active.title = SHEET_NAME
+    saver = excel.ThrottledSaver(wb, SPREADSHEET_FILE, SAVE_INTERVAL_SECONDS)
+    lock = threading.Lock()
+    odds_store = sqlite_store.OddsStore(DATABASE_FILE) if DATABASE_FILE else None
+
+    polling = scheduler.Scheduler()
+    for index, sport_key in enumerate(SPORT_KEYS):
+        sheet_name = SHEET_NAME if index == 0 else f"{SHEET_NAME} {index + 1}"
+        ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.create_sheet(sheet_name)
+        sheet = excel.LiveSheet(ws, excel.SCORES_KEY_COLUMNS)
+        polling.add(sport_key, 60 / UPDATES_PER_MINUTE, update_sheet, sheet, saver, lock, odds_store, sport_key)
+
+    polling.run(RUN_SECONDS)
+    # Save the changes held back by the throttle
+    saver.flush()
+    print(polling.report())
+    if odds_store is not None:
+        odds_store.close()
 
 
 if __name__ == "__main__":
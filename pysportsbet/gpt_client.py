@@ -1,8 +1,8 @@
 import requests
-import openpyxl
-import time
 from datetime import datetime, timedelta
 
+from pysportsbet import scheduler, scores, sinks
+
 
 class TheOddsAPIClient:
     """
@@ -10,16 +10,21 @@ class TheOddsAPIClient:
     and historical data, and saving it to Excel files.
     """
 
-    def __init__(self, api_key, spreadsheet_file):
+    def __init__(self, api_key, spreadsheet_file, sink=None):
         """
         Initialize the Odds API client.
 
         Args:
             api_key (str): Your API key for The Odds API.
             spreadsheet_file (str): Path to the Excel file for saving data.
+            sink (str): Output format ('excel', 'csv', 'parquet', 'sqlite' or 'arrow') or output path used instead
+                of the Excel file, see sinks.sink_target.
         """
         self.api_key = api_key
         self.spreadsheet_file = spreadsheet_file
+        self.sink = sink
+        # Scores trackers keyed by (sport_key, days_from, date_format)
+        self._trackers = {}
 
     def fetch_data(self, url, params):
         """
@@ -40,17 +45,23 @@ class TheOddsAPIClient:
         """
         Fetch scores data from The Odds API.
 
+        The first call fetches every game of the window; later calls only poll the games in play and reuse the
+        completed results (see scores.ScoresTracker).
+
         Args:
             sport_key (str): Sport key (e.g., 'americanfootball_nfl').
             days_from (int): Number of days in the past to fetch scores.
             date_format (str): Format of the date ('iso' or 'unix').
 
         Returns:
-            dict: Metadata and formatted event data.
+            list: Events of the window with their latest scores.
         """
-        url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/scores"
-        params = {"apiKey": self.api_key, "daysFrom": days_from, "dateFormat": date_format}
-        return self.fetch_data(url, params)
+        key = (sport_key, days_from, date_format)
+        if key not in self._trackers:
+            self._trackers[key] = scores.ScoresTracker(self.api_key, sport_key, days_from, date_format)
+        tracker = self._trackers[key]
+        tracker.poll()
+        return tracker.events()
 
     def fetch_player_props(self, sport_key, markets, regions, odds_format, date_format):
         """
@@ -90,57 +101,60 @@ class TheOddsAPIClient:
             ["id", "commence_time", "completed", "last_update", "home_team", "home_score", "away_team", "away_score"]
         ]
         for event in events:
-            home_score = next(
-                (score["score"] for score in event.get("scores", []) if score["name"] == event["home_team"]), None)
-            away_score = next(
-                (score["score"] for score in event.get("scores", []) if score["name"] == event["away_team"]), None)
+            team_scores = scores.team_scores(event)
             rows.append([
                 event["id"], event["commence_time"], event.get("completed", False),
-                event.get("last_update"), event["home_team"], home_score,
-                event["away_team"], away_score,
+                event.get("last_update"), event["home_team"], team_scores.get(event["home_team"]),
+                event["away_team"], team_scores.get(event["away_team"]),
             ])
         return rows
 
-    def save_to_excel(self, data, headers, sheet_name="Sheet1"):
+    def save_to_excel(self, data, headers, sheet_name="Sheet1", sink=None):
         """
-        Save data to an Excel file.
+        Save data to an Excel file, or to the sink of the client or call.
 
         Args:
-            data (list): List of rows to save.
+            data (iterable): Rows to save.
             headers (list): List of column headers.
             sheet_name (str): Name of the sheet in the Excel file.
-        """
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = sheet_name
+            sink (str): Output format or path overriding the client's sink, see sinks.sink_target.
 
-        # Write headers
-        ws.append(headers)
-
-        # Write data rows
-        for row in data:
-            ws.append(row)
-
-        # Save workbook
-        wb.save(self.spreadsheet_file)
+        Returns:
+            str: Path of the file written.
+        """
+        path = sinks.sink_target(sink or self.sink, self.spreadsheet_file)
+        sinks.save_rows(path, headers, data, sheet_name=sheet_name)
+        return path
 
-    def run_scores_loop(self, sport_key, days_from, date_format, updates_per_minute):
+    def run_scores_loop(self, sport_key, days_from, date_format, updates_per_minute, duration=60):
         """
         Periodically fetch and save scores data to an Excel file.
 
+        Updates run on a drift-free schedule: ticks are measured from the start of the loop, and a tick that finds
+        the previous update still running is skipped.
+
         Args:
             sport_key (str): Sport key for querying scores.
             days_from (int): Number of days in the past to fetch scores.
             date_format (str): Date format ('iso' or 'unix').
             updates_per_minute (int): Number of updates per minute.
+            duration (float): Seconds to run for. Runs until interrupted if None.
+
+        Returns:
+            dict: Run statistics of the loop, see scheduler.Job.stats().
         """
         headers = ["id", "commence_time", "completed", "last_update", "home_team", "home_score", "away_team",
                    "away_score"]
-        for _ in range(updates_per_minute):
+
+        def update():
             scores_data = self.fetch_scores(sport_key, days_from, date_format)
-            formatted_scores = self.format_scores(scores_data)
+            # format_scores returns the header as its first row
+            formatted_scores = self.format_scores(scores_data)[1:]
             self.save_to_excel(formatted_scores, headers, sheet_name="Scores")
-            time.sleep(60 / updates_per_minute)
+
+        polling = scheduler.Scheduler()
+        polling.add(sport_key, 60 / updates_per_minute, update)
+        return polling.run(duration)[sport_key]
 
     def fetch_and_save_player_props(self, sport_key, markets, regions, odds_format, date_format):
         """
@@ -14,9 +14,12 @@ import json
 
 import requests
 
+from pysportsbet import archive
+
 # Obtain the api key that was passed in from the command line
 parser = argparse.ArgumentParser(description='Historical odds sample code')
 parser.add_argument('--api-key', type=str, default='')
+parser.add_argument('--archive', type=str, default='', help='Append the snapshot to this .ndjson.zst archive')
 args = parser.parse_args()
 
 # An api key is emailed to you when you sign up to a plan
@@ -73,7 +76,12 @@ if odds_response.status_code != 200:
 else:
     odds_json = odds_response.json()
 
-    print(json.dumps(odds_json['data'], indent=4))
+    if args.archive:
+        # Compressed, with every event in its own frame for random access
+        frames = archive.Archive(args.archive).append(SPORT, odds_json, split_events=True)
+        print(f'Archived {frames} events to {args.archive}')
+    else:
+        print(json.dumps(odds_json['data'], indent=4))
 
     print(f"Timestamp: {odds_json['timestamp']}")
     print(f"Previous available timestamp: {odds_json['previous_timestamp']}")
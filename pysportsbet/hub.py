@@ -0,0 +1,304 @@
+"""
+In-process publish/subscribe of live odds and scores.
+
+A live loop publishes every poll once to the hub, and any number of consumers (pricing models, alerting, dashboards)
+subscribe with filters by channel, sport, bookmaker and market. Each subscriber reads from its own bounded queue, so
+a slow consumer never holds up the poll: when its queue is full the oldest message is dropped (or the newest, or the
+publisher waits up to a timeout, depending on the subscriber's policy) and the drop is counted.
+
+serve() exposes the hub as a local Server-Sent Events endpoint built on http.server, so many processes or browsers
+can share one upstream poll:
+
+    GET /events?channel=changes&sport=basketball_nba&book=fanduel,draftkings&market=h2h
+"""
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Channels of published messages
+ODDS = "odds"
+SCORES = "scores"
+CHANGES = "changes"
+
+# Backpressure policies of a full subscriber queue
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+# Seconds between keep-alive comments on idle event streams
+HEARTBEAT_SECS = 15
+
+
+def _as_set(values):
+    if values is None:
+        return None
+    return set(values.split(",")) if isinstance(values, str) else set(values)
+
+
+class Subscription(object):
+    """
+    A subscriber's filters and bounded queue of matching messages.
+
+    Filters left as None match everything. Odds messages carry whole events; their bookmakers and markets are
+    trimmed to the filters, and events left without any are not delivered.
+
+    Args:
+        channels (iterable): Channels to receive ('odds', 'scores', 'changes').
+        sports (iterable): Sport keys to receive.
+        books (iterable): Bookmaker keys to receive.
+        markets (iterable): Market keys to receive.
+        maxsize (int): Capacity of the queue.
+        policy (str): What to do when the queue is full: DROP_OLDEST, DROP_NEWEST or BLOCK.
+        timeout (float): Seconds a BLOCK publisher waits before dropping the message.
+    """
+
+    def __init__(self, channels=None, sports=None, books=None, markets=None, maxsize=1000, policy=DROP_OLDEST,
+                 timeout=1.0):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.channels = _as_set(channels)
+        self.sports = _as_set(sports)
+        self.books = _as_set(books)
+        self.markets = _as_set(markets)
+        self.policy = policy
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+    def view(self, message):
+        """
+        Return the message as seen through the filters, or None if it does not match.
+        """
+        if self.channels is not None and message["channel"] not in self.channels:
+            return None
+        if self.sports is not None and message.get("sport_key") not in self.sports:
+            return None
+        if message["channel"] != ODDS:
+            if self.books is not None and message.get("book") is not None and message["book"] not in self.books:
+                return None
+            if self.markets is not None and message.get("market") is not None and message["market"] not in self.markets:
+                return None
+            return message
+        if self.books is None and self.markets is None:
+            return message
+
+        event = message["data"]
+        bookmakers = []
+        for bookmaker in event.get("bookmakers", []):
+            if self.books is not None and bookmaker["key"] not in self.books:
+                continue
+            markets = [market for market in bookmaker.get("markets", [])
+                       if self.markets is None or market["key"] in self.markets]
+            if markets:
+                bookmakers.append(dict(bookmaker, markets=markets))
+        if not bookmakers:
+            return None
+        return dict(message, data=dict(event, bookmakers=bookmakers))
+
+    def put(self, message):
+        """
+        Queue a message, applying the backpressure policy if the queue is full.
+
+        Returns:
+            bool: Whether the message was queued.
+        """
+        try:
+            if self.policy == BLOCK:
+                self.queue.put(message, timeout=self.timeout)
+            else:
+                self.queue.put_nowait(message)
+        except queue.Full:
+            if self.policy != DROP_OLDEST:
+                self.dropped += 1
+                return False
+            # Make room by discarding the oldest message; a concurrent reader may have made room already
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.delivered += 1
+        return True
+
+    def get(self, timeout=None):
+        """
+        Wait for the next message.
+
+        Raises:
+            queue.Empty: If no message arrives within the timeout.
+        """
+        return self.queue.get(timeout=timeout)
+
+    def drain(self):
+        """
+        Return every queued message without waiting.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+
+class Hub(object):
+    """
+    Fans published messages out to the subscriptions they match.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self.published = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, **filters):
+        """
+        Add a subscription; see Subscription for the filters and backpressure options.
+
+        Returns:
+            Subscription: The new subscription.
+        """
+        subscription = Subscription(**filters)
+        with self._lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            self.subscriptions = [other for other in self.subscriptions if other is not subscription]
+
+    def publish(self, message):
+        """
+        Deliver a message to every matching subscription.
+
+        Args:
+            message (dict): Message with a 'channel', and the 'sport_key', 'book' and 'market' it concerns if any.
+
+        Returns:
+            int: Number of subscriptions the message was queued for.
+        """
+        self.published += 1
+        queued = 0
+        for subscription in self.subscriptions:
+            view = subscription.view(message)
+            if view is not None:
+                queued += subscription.put(view)
+        return queued
+
+    def publish_odds(self, events):
+        """
+        Publish the events of an odds poll, one message per event.
+        """
+        for event in events:
+            self.publish({"channel": ODDS, "sport_key": event.get("sport_key"), "id": event["id"], "data": event})
+
+    def publish_scores(self, scores):
+        """
+        Publish the events of a scores poll, one message per event.
+        """
+        for event in scores:
+            self.publish({"channel": SCORES, "sport_key": event.get("sport_key"), "id": event["id"], "data": event})
+
+    def publish_changes(self, changes):
+        """
+        Publish change records of changes.ChangeDetector, one message per change.
+        """
+        for change in changes:
+            self.publish(dict(change, channel=CHANGES))
+
+    def stats(self):
+        """
+        Return the number of published messages and the delivered and dropped messages of every subscription.
+        """
+        return {
+            "published": self.published,
+            "subscriptions": [{"delivered": subscription.delivered, "dropped": subscription.dropped,
+                               "queued": subscription.queue.qsize()} for subscription in self.subscriptions],
+        }
+
+
+class EventStreamHandler(BaseHTTPRequestHandler):
+    """
+    Streams the messages of a subscription as Server-Sent Events.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/events":
+            self.send_error(404)
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        subscription = self.server.hub.subscribe(channels=query.get("channel"), sports=query.get("sport"),
+                                                 books=query.get("book"), markets=query.get("market"))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not self.server.stopping.is_set():
+                try:
+                    message = subscription.get(timeout=HEARTBEAT_SECS)
+                    payload = f"event: {message['channel']}\ndata: {json.dumps(message)}\n\n"
+                except queue.Empty:
+                    payload = ": keep-alive\n\n"
+                self.wfile.write(payload.encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.hub.unsubscribe(subscription)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EventStreamServer(ThreadingHTTPServer):
+    """
+    HTTP server streaming a hub as Server-Sent Events at /events.
+
+    Args:
+        address (tuple): (host, port) to listen on; port 0 picks a free port.
+        hub (Hub): Hub to stream from.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, hub):
+        self.hub = hub
+        self.stopping = threading.Event()
+        super().__init__(address, EventStreamHandler)
+
+    def shutdown(self):
+        """
+        Stop serving and end every open stream.
+        """
+        self.stopping.set()
+        super().shutdown()
+        self.server_close()
+
+
+def serve(hub, host="127.0.0.1", port=8765):
+    """
+    Serve a hub as Server-Sent Events on a background thread.
+
+    Args:
+        hub (Hub): Hub to stream from.
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free port.
+
+    Returns:
+        EventStreamServer: The running server; server_address holds the bound port and shutdown() stops it.
+    """
+    server = EventStreamServer((host, port), hub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,165 @@
+"""
+Live game state joining scores to odds for in-play EV.
+
+Odds and scores are polled separately; LiveState merges both into one record per event id, holding the latest odds
+event and the latest scores of the game. Odds updates go through a changes.ChangeDetector, so an event is only marked
+dirty when one of its prices or points moved (or an outcome appeared or disappeared), and scores updates mark an event
+dirty when its score, completion or last_update changed. recompute() then runs ev.json_to_ev over the dirty events
+only and keeps the result per event: EV in this library is computed within each event (averages and Pinnacle prices
+are matched by event id), so the EV of the other events stays valid and a score tick costs one event's pipeline
+instead of the whole board's.
+
+Completed games leave the live state. Messages of a hub.Subscription (odds and scores channels) can be applied as
+they arrive with apply().
+"""
+import pandas
+
+from pysportsbet import changes, ev, hub, scores
+
+# Score columns added to the EV rows of every event
+SCORE_COLUMNS = ["home_score", "away_score", "completed", "score_last_update"]
+
+
+def _score_state(event):
+    return event.get("scores"), event.get("completed"), event.get("last_update")
+
+
+class LiveState(object):
+    """
+    Latest odds and scores of every live event, and their EV, recomputed for changed events only.
+
+    Args:
+        ev_type (str): 'avg', 'pinnacle' or 'both', see ev.json_to_ev.
+        devig_method (str): Devig method, see ev.json_to_ev.
+    """
+
+    def __init__(self, ev_type="both", devig_method="multiplicative"):
+        self.ev_type = ev_type
+        self.devig_method = devig_method
+        self.detector = changes.ChangeDetector()
+        # Latest odds event, scores event and EV rows keyed by event id
+        self.odds = {}
+        self.scores = {}
+        self.ev = {}
+        self.completed = set()
+        self.dirty = set()
+        self.recomputed = 0
+
+    def update_odds(self, events, scope=None):
+        """
+        Merge the events of an odds poll.
+
+        Args:
+            events (list): Events of an odds response.
+            scope (iterable): Ids of the events the poll requested; those missing from it are removed. All known
+                events if None, see changes.ChangeDetector.update.
+
+        Returns:
+            set: Ids of the events whose prices changed.
+        """
+        events = [event for event in events if event["id"] not in self.completed]
+        changed = {change["id"] for change in self.detector.update(events, scope=scope)}
+        self.odds.update((event["id"], event) for event in events)
+        for event_id in [event_id for event_id in self.odds if event_id not in self.detector.state]:
+            self._remove(event_id)
+        self.dirty |= changed & set(self.odds)
+        return changed
+
+    def update_scores(self, events):
+        """
+        Merge the events of a scores poll; completed games leave the live state.
+
+        Args:
+            events (list): Events of a scores response.
+
+        Returns:
+            set: Ids of the events whose scores changed.
+        """
+        changed = set()
+        for event in events:
+            event_id = event["id"]
+            previous = self.scores.get(event_id)
+            if previous is not None and _score_state(previous) == _score_state(event):
+                continue
+            changed.add(event_id)
+            if event.get("completed"):
+                self.completed.add(event_id)
+                self.scores.pop(event_id, None)
+                self._remove(event_id)
+                self.detector.update([], scope=[event_id])
+            else:
+                self.scores[event_id] = event
+                if event_id in self.odds:
+                    self.dirty.add(event_id)
+        return changed
+
+    def apply(self, message):
+        """
+        Merge a hub message of the odds or scores channel.
+
+        Returns:
+            set: Ids of the events that changed.
+        """
+        if message["channel"] == hub.ODDS:
+            return self.update_odds([message["data"]], scope=[message["id"]])
+        if message["channel"] == hub.SCORES:
+            return self.update_scores([message["data"]])
+        return set()
+
+    def _remove(self, event_id):
+        self.odds.pop(event_id, None)
+        self.ev.pop(event_id, None)
+        self.dirty.discard(event_id)
+
+    def get(self, event_id):
+        """
+        Return the merged state of an event: its odds event with 'scores' (by team name), 'completed' and
+        'score_last_update' from its latest scores, or None if the event is not live.
+        """
+        event = self.odds.get(event_id)
+        if event is None:
+            return None
+        score = self.scores.get(event_id, {})
+        return dict(event, scores=scores.team_scores(score), completed=score.get("completed", False),
+                    score_last_update=score.get("last_update"))
+
+    def recompute(self):
+        """
+        Recompute the EV of the dirty events.
+
+        Returns:
+            list: Ids of the events recomputed.
+        """
+        dirty = sorted(self.dirty)
+        self.dirty = set()
+        priced = [self.odds[event_id] for event_id in dirty if self.odds[event_id].get("bookmakers")]
+        for event_id in dirty:
+            self.ev.pop(event_id, None)
+        if priced:
+            frame = ev.json_to_ev(priced, ev_type=self.ev_type, devig_method=self.devig_method)
+            for event_id, rows in frame.groupby("id", sort=False):
+                self.ev[event_id] = self._with_scores(event_id, rows.reset_index(drop=True))
+        self.recomputed += len(dirty)
+        return dirty
+
+    def _with_scores(self, event_id, rows):
+        state = self.get(event_id)
+        rows = rows.copy()
+        rows["home_score"] = state["scores"].get(state["home_team"])
+        rows["away_score"] = state["scores"].get(state["away_team"])
+        rows["completed"] = state["completed"]
+        rows["score_last_update"] = state["score_last_update"]
+        return rows
+
+    def ev_table(self):
+        """
+        Recompute the dirty events and return the EV rows of every live event with their score columns.
+
+        Returns:
+            pandas.DataFrame: Rows of ev.json_to_ev with SCORE_COLUMNS, by commence time and event.
+        """
+        self.recompute()
+        if not self.ev:
+            return pandas.DataFrame(columns=["id"] + SCORE_COLUMNS)
+        frames = sorted(self.ev.values(), key=lambda rows: (rows["commence_time"].iloc[0], rows["id"].iloc[0]))
+        return pandas.concat(frames, ignore_index=True)
@@ -0,0 +1,148 @@
+"""
+Out-of-core EV over odds archives larger than memory.
+
+The archive is streamed in chunks of whole events sized to a memory budget. Every chunk goes through the same
+processing, consensus and EV steps as ev.file_to_ev, its result is spilled to a Parquet part file and dropped, and
+the parts are finally stitched into one Parquet dataset one part at a time. Peak memory is bounded by the budget, not
+by the size of the archive.
+"""
+import os
+import shutil
+import tempfile
+
+from pysportsbet import parallel, readers
+
+# Peak bytes held per flattened outcome row while a chunk runs through the EV pipeline, with headroom
+BYTES_PER_ROW = 4096
+
+
+def budget_rows(memory_budget_mb, workers=None):
+    """
+    Translate a memory budget into the maximum number of outcome rows per chunk.
+
+    Args:
+        memory_budget_mb (int): Memory budget in megabytes.
+        workers (int): Number of worker processes sharing the budget.
+
+    Returns:
+        int: Maximum rows per chunk.
+    """
+    chunks_in_memory = 1 if not workers or workers == 1 else workers * (parallel.CHUNKS_IN_FLIGHT_PER_WORKER + 1)
+    return max(1, int(memory_budget_mb * 2 ** 20 / BYTES_PER_ROW / chunks_in_memory))
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Out-of-core EV requires the 'pyarrow' package: pip install pyarrow")
+    return pyarrow
+
+
+def spill_ev(filename, spill_dir, ev_type="both", devig_method="multiplicative", memory_budget_mb=512, workers=None,
+             filter_kwargs=None):
+    """
+    Compute EV for an archive chunk by chunk, writing every chunk's rows to its own Parquet part file.
+
+    Args:
+        filename (str): File or directory of odds readable by pysportsbet.readers.
+        spill_dir (str): Directory receiving the part files. Part files already in it are removed first.
+        ev_type (str): 'avg', 'pinnacle' or 'both'.
+        devig_method (str): Devig method feeding fair_win_dec.
+        memory_budget_mb (int): Memory budget for the chunks being processed.
+        workers (int): Number of worker processes. Chunks are processed in this process if None or 1.
+        filter_kwargs (dict): Keyword arguments for ev.filter_ev, including pref_ev_filter. Not filtered if None.
+
+    Returns:
+        list: Paths of the part files written, in archive order.
+    """
+    pyarrow = _pyarrow()
+    os.makedirs(spill_dir, exist_ok=True)
+    # Parts of an earlier run would be read back as part of this one
+    for name in os.listdir(spill_dir):
+        if name.startswith("part-") and name.endswith(".parquet"):
+            os.remove(os.path.join(spill_dir, name))
+    chunks = readers.iter_event_chunks(filename, chunk_size=float("inf"),
+                                       max_rows=budget_rows(memory_budget_mb, workers))
+
+    parts = []
+    for frame in parallel.iter_ev(chunks, ev_type=ev_type, devig_method=devig_method, workers=workers,
+                                  filter_kwargs=filter_kwargs):
+        if len(frame) == 0:
+            continue
+        part = os.path.join(spill_dir, f"part-{len(parts):05d}.parquet")
+        pyarrow.parquet.write_table(pyarrow.Table.from_pandas(frame, preserve_index=False), part)
+        parts.append(part)
+    return parts
+
+
+def unified_schema(parts):
+    """
+    Build one schema covering the columns of every part file, reading only their footers.
+
+    Columns that are entirely null in one part and typed in another take the typed schema.
+    """
+    pyarrow = _pyarrow()
+    schemas = [pyarrow.parquet.read_schema(part).remove_metadata() for part in parts]
+    return pyarrow.unify_schemas(schemas, promote_options="permissive")
+
+
+def merge_parts(parts, output):
+    """
+    Concatenate Parquet part files into a single Parquet file, holding one part in memory at a time.
+
+    Args:
+        parts (list): Paths of the part files.
+        output (str): Path of the Parquet file to write.
+
+    Returns:
+        str: The output path.
+    """
+    pyarrow = _pyarrow()
+    schema = unified_schema(parts)
+    with pyarrow.parquet.ParquetWriter(output, schema) as writer:
+        for part in parts:
+            table = pyarrow.parquet.read_table(part)
+            columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                       else pyarrow.nulls(len(table), field.type) for field in schema]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+    return output
+
+
+def file_to_ev_parquet(filename, output, ev_type="both", devig_method="multiplicative", memory_budget_mb=512,
+                       workers=None, filter_kwargs=None, spill_dir=None):
+    """
+    Compute EV for an archive of any size without holding more than a memory budget, writing the result to Parquet.
+
+    Args:
+        filename (str): File or directory of odds readable by pysportsbet.readers.
+        output (str): Path of a '.parquet' file, or of a directory that receives the part files as a dataset,
+            replacing the parts of an earlier run.
+        ev_type (str): 'avg', 'pinnacle' or 'both'.
+        devig_method (str): Devig method feeding fair_win_dec.
+        memory_budget_mb (int): Memory budget for the chunks being processed.
+        workers (int): Number of worker processes. Chunks are processed in this process if None or 1.
+        filter_kwargs (dict): Keyword arguments for ev.filter_ev, including pref_ev_filter. Not filtered if None.
+        spill_dir (str): Directory for intermediate part files when writing a single file. Defaults to a temporary
+            directory next to output, removed once the parts are merged.
+
+    Returns:
+        str: The output path.
+    """
+    if not output.endswith(".parquet"):
+        spill_ev(filename, output, ev_type=ev_type, devig_method=devig_method, memory_budget_mb=memory_budget_mb,
+                 workers=workers, filter_kwargs=filter_kwargs)
+        return output
+
+    cleanup = spill_dir is None
+    spill_dir = spill_dir or tempfile.mkdtemp(prefix=".spill-", dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        parts = spill_ev(filename, spill_dir, ev_type=ev_type, devig_method=devig_method,
+                         memory_budget_mb=memory_budget_mb, workers=workers, filter_kwargs=filter_kwargs)
+        if not parts:
+            raise ValueError(f"No EV rows computed from {filename}")
+        return merge_parts(parts, output)
+    finally:
+        if cleanup:
+            shutil.rmtree(spill_dir, ignore_errors=True)
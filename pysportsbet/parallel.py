@@ -0,0 +1,157 @@
+"""
+Process-pool sharded EV computation.
+
+EV math only ever compares outcomes of the same event, so an odds payload can be split into shards of whole events
+and every shard run through processing, consensus, Pinnacle EV and filtering on its own core. Shards are built from
+the raw event JSON rather than the flattened Dataframe: a shard of nested events pickles to a fraction of the size
+of its flattened rows, so handing work to the pool stays cheap even for full-market pulls.
+"""
+import heapq
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas
+
+from pysportsbet import ev, readers
+
+# Shards per worker, so a few large events do not leave the rest of the pool idle
+SHARDS_PER_WORKER = 4
+
+# Chunks submitted per worker ahead of the one being collected, bounding the memory held by a streamed input
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def book_keys(odds_json):
+    """
+    List the bookmakers present in an odds payload.
+
+    Args:
+        odds_json (list): Events from an Odds API odds response.
+
+    Returns:
+        list: Unique bookmaker keys.
+    """
+    return list({bookmaker["key"] for event in odds_json for bookmaker in event.get("bookmakers", [])})
+
+
+def shard_events(odds_json, num_shards, by="id"):
+    """
+    Split an odds payload into shards of roughly equal size without splitting any event (or sport).
+
+    Groups are assigned largest first to the currently smallest shard.
+
+    Args:
+        odds_json (list): Events from an Odds API odds response.
+        num_shards (int): Maximum number of shards.
+        by (str): Event field keeping events together, 'id' or 'sport_key'.
+
+    Returns:
+        list: Non-empty lists of events.
+    """
+    groups = {}
+    for event in odds_json:
+        groups.setdefault(event[by], []).append(event)
+
+    sizes = {key: sum(readers.event_size(event) for event in events) for key, events in groups.items()}
+    sized = sorted(((size, key) for key, size in sizes.items()), reverse=True)
+    heap = [(0, i) for i in range(max(1, min(num_shards, len(groups))))]
+    shards = [[] for _ in heap]
+    for size, key in sized:
+        total, i = heapq.heappop(heap)
+        shards[i].extend(groups[key])
+        heapq.heappush(heap, (total + size, i))
+    return [shard for shard in shards if shard]
+
+
+def shard_to_ev(events, ev_type="both", devig_method="multiplicative", pinnacle_events=None, filter_kwargs=None):
+    """
+    Run one shard of events through the EV pipeline.
+
+    Args:
+        events (list): Events of the shard.
+        ev_type (str): 'avg', 'pinnacle' or 'both'.
+        devig_method (str): Devig method feeding fair_win_dec.
+        pinnacle_events (list): EU odds for the same events when Pinnacle is not part of events.
+        filter_kwargs (dict): Keyword arguments for ev.filter_ev, including pref_ev_filter. Not filtered if None.
+
+    Returns:
+        pandas.DataFrame: EV rows of the shard.
+    """
+    odds = ev.json_to_ev(events, ev_type=ev_type, devig_method=devig_method, pinnacle_json=pinnacle_events)
+    if filter_kwargs is not None:
+        odds = ev.filter_ev(odds, **filter_kwargs)
+    return odds
+
+
+def iter_ev(chunks, ev_type="both", devig_method="multiplicative", workers=None, pinnacle_json=None,
+            filter_kwargs=None, books_seen=None):
+    """
+    Compute EV for a stream of event chunks, yielding one Dataframe per chunk in input order.
+
+    Only a few chunks per worker are in flight at any time, so an input streamed from disk is never fully held in
+    memory.
+
+    Args:
+        chunks (iterable): Non-empty lists of whole events.
+        ev_type (str): 'avg', 'pinnacle' or 'both'.
+        devig_method (str): Devig method feeding fair_win_dec.
+        workers (int): Number of worker processes. Chunks are processed in this process if None or 1.
+        pinnacle_json (list): EU odds used for Pinnacle EV when the chunks do not include Pinnacle.
+        filter_kwargs (dict): Keyword arguments for ev.filter_ev applied to every chunk.
+        books_seen (set): If given, updated with the bookmaker keys of every chunk before it is filtered.
+
+    Yields:
+        pandas.DataFrame: EV rows of every chunk.
+    """
+    pinnacle_by_id = {event["id"]: event for event in pinnacle_json or []}
+
+    def tasks():
+        for chunk in chunks:
+            if books_seen is not None:
+                books_seen.update(book_keys(chunk))
+            pinnacle_chunk = None
+            if pinnacle_json is not None:
+                pinnacle_chunk = [pinnacle_by_id[event["id"]] for event in chunk if event["id"] in pinnacle_by_id]
+            yield chunk, ev_type, devig_method, pinnacle_chunk, filter_kwargs
+
+    if workers is None or workers == 1:
+        for task in tasks():
+            yield shard_to_ev(*task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks():
+            pending.append(executor.submit(shard_to_ev, *task))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def sharded_ev(odds_json, ev_type="both", devig_method="multiplicative", workers=None, by="id", pinnacle_json=None,
+               filter_kwargs=None):
+    """
+    Compute EV for an odds payload on a pool of processes, one shard of events at a time.
+
+    Args:
+        odds_json (list): Events from an Odds API odds response.
+        ev_type (str): 'avg', 'pinnacle' or 'both'.
+        devig_method (str): Devig method feeding fair_win_dec.
+        workers (int): Number of worker processes. Defaults to the number of CPUs.
+        by (str): Event field to shard on, 'id' or 'sport_key'.
+        pinnacle_json (list): EU odds used for Pinnacle EV when odds_json does not include Pinnacle.
+        filter_kwargs (dict): Keyword arguments for ev.filter_ev applied to every shard.
+
+    Returns:
+        pandas.DataFrame: Concatenated EV rows of all shards.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shard_events(odds_json, workers * SHARDS_PER_WORKER, by=by)
+    if not shards:
+        return ev.json_to_ev(odds_json, ev_type=ev_type, devig_method=devig_method, pinnacle_json=pinnacle_json)
+
+    results = iter_ev(shards, ev_type=ev_type, devig_method=devig_method, workers=min(workers, len(shards)),
+                      pinnacle_json=pinnacle_json, filter_kwargs=filter_kwargs)
+    return pandas.concat(list(results), ignore_index=True)
@@ -0,0 +1,208 @@
+"""
+Streaming readers for archived odds.
+
+Odds can be stored as a JSON array of events, as NDJSON with one event, event list or historical snapshot per line,
+optionally compressed with gzip (.gz) or zstd (.zst), or as a directory of such files. Every format is read
+incrementally and handed to the EV pipeline in bounded chunks of whole events, so memory stays flat regardless of
+the size of the archive.
+"""
+import gzip
+import io
+import json
+import os
+
+JSON_SUFFIXES = (".json",)
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+# Size of the text blocks read while streaming a JSON array
+READ_SIZE = 1 << 20
+
+
+def strip_compression(path):
+    """
+    Return the path without a compression suffix.
+    """
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def is_supported(path):
+    """
+    Check whether a file holds odds in a format these readers understand.
+    """
+    return strip_compression(path).endswith(JSON_SUFFIXES + NDJSON_SUFFIXES)
+
+
+def open_text(path):
+    """
+    Open a plain, gzip or zstd compressed file as a text stream.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        io.TextIOBase: Text stream that closes the underlying file when closed.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst files requires the 'zstandard' package: pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_json(stream):
+    """
+    Decode a JSON document from a text stream, yielding the elements of a top-level array one at a time.
+
+    Args:
+        stream (io.TextIOBase): Text stream holding one JSON document.
+
+    Yields:
+        object: Every element of a top-level array, or the whole document if it is not an array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        yield json.loads(buffer + stream.read())
+        return
+
+    pos = 1
+    while True:
+        # Skip separators, reading more text whenever the buffer runs dry
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                break
+            buffer, pos = stream.read(READ_SIZE), 0
+            if not buffer:
+                raise ValueError("Unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                more = stream.read(READ_SIZE)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+        yield element
+        pos = end
+
+
+def iter_records(path):
+    """
+    Read the top-level records of a file or directory of files.
+
+    Args:
+        path (str): File or directory. Directories are read recursively in file name order.
+
+    Yields:
+        object: Elements of JSON arrays and lines of NDJSON files.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            child = os.path.join(path, name)
+            if os.path.isdir(child) or is_supported(child):
+                yield from iter_records(child)
+        return
+
+    with open_text(path) as stream:
+        if strip_compression(path).endswith(NDJSON_SUFFIXES):
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from iter_json(stream)
+
+
+def event_size(event):
+    """
+    Count the outcome rows an event flattens into.
+
+    Args:
+        event (dict): Event from an Odds API odds response.
+
+    Returns:
+        int: Number of outcomes across all bookmakers and markets.
+    """
+    return sum(len(market.get("outcomes", []))
+               for bookmaker in event.get("bookmakers", []) for market in bookmaker.get("markets", []))
+
+
+def record_events(record):
+    """
+    Extract the events with odds from a record.
+
+    Records may be events, lists of events, historical snapshots ({'timestamp': ..., 'data': [...]}) or historical
+    event odds responses ({'timestamp': ..., 'data': {...}}).
+
+    Args:
+        record (object): Decoded JSON record.
+
+    Yields:
+        dict: Events that have at least one bookmaker.
+    """
+    if isinstance(record, list):
+        for item in record:
+            yield from record_events(item)
+    elif isinstance(record, dict):
+        if record.get("bookmakers"):
+            yield record
+        elif "data" in record:
+            yield from record_events(record["data"])
+
+
+def iter_events(path):
+    """
+    Stream the events with odds stored in a file or directory.
+
+    Args:
+        path (str): File or directory.
+
+    Yields:
+        dict: Events from an Odds API odds response.
+    """
+    for record in iter_records(path):
+        yield from record_events(record)
+
+
+def iter_event_chunks(path, chunk_size=1000, max_rows=None):
+    """
+    Stream the events stored in a file or directory in chunks of whole events.
+
+    A chunk never holds the same event twice: when an event id repeats (a later snapshot of the same game) the chunk
+    is closed first, so per-event consensus is never mixed across snapshots.
+
+    Args:
+        path (str): File or directory.
+        chunk_size (int): Maximum number of events per chunk.
+        max_rows (int): Maximum number of outcome rows per chunk. A single event larger than this gets its own chunk.
+
+    Yields:
+        list: Non-empty lists of events.
+    """
+    chunk, ids, rows = [], set(), 0
+    for event in iter_events(path):
+        size = event_size(event)
+        if chunk and (len(chunk) >= chunk_size or event["id"] in ids
+                      or (max_rows is not None and rows + size > max_rows)):
+            yield chunk
+            chunk, ids, rows = [], set(), 0
+        chunk.append(event)
+        ids.add(event["id"])
+        rows += size
+    if chunk:
+        yield chunk
@@ -0,0 +1,184 @@
+"""
+Drift-free scheduler for polling jobs.
+
+Every job runs on a fixed cadence measured from the start of the schedule, not from the end of its previous run, so
+the time a fetch and save takes never shifts later ticks. Jobs run concurrently on a thread pool; a tick that finds
+its job still running, or that has already passed by the time it is reached, is skipped instead of being run late,
+so a slow job never bunches requests up. Actual cadence, lag and skipped ticks are tracked per job.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job(object):
+    """
+    A function polled on a fixed cadence, with its run statistics.
+
+    Args:
+        name (str): Name of the job in statistics.
+        interval (float): Seconds between ticks.
+        func (callable): Function run at every tick.
+        args (tuple): Positional arguments of func.
+        kwargs (dict): Keyword arguments of func.
+    """
+
+    def __init__(self, name, interval, func, args=(), kwargs=None):
+        if interval <= 0:
+            raise ValueError("The interval of a job must be positive")
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.start = None
+        self.tick = 0
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error = None
+        self.first_start = None
+        self.last_start = None
+        self.total_duration = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def due(self):
+        """
+        Time of the next tick, on the grid measured from the start of the schedule.
+        """
+        return self.start + self.tick * self.interval
+
+    def stats(self):
+        """
+        Return the run statistics of the job.
+
+        Returns:
+            dict: Target and actual seconds between runs, runs, skipped ticks, errors, mean run duration and the
+                largest delay between a tick and the start of its run.
+        """
+        actual = (self.last_start - self.first_start) / (self.runs - 1) if self.runs > 1 else None
+        return {
+            "target_interval": self.interval,
+            "actual_interval": actual,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "mean_duration": self.total_duration / self.runs if self.runs else None,
+            "max_lag": self.max_lag,
+        }
+
+
+class Scheduler(object):
+    """
+    Runs any number of jobs concurrently, each on its own fixed cadence.
+
+    Args:
+        max_workers (int): Maximum number of jobs running at once. Defaults to the number of jobs.
+    """
+
+    def __init__(self, max_workers=None):
+        self.jobs = []
+        self.max_workers = max_workers
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add(self, name, interval, func, *args, **kwargs):
+        """
+        Add a job polling func every interval seconds.
+
+        Returns:
+            Job: The added job.
+        """
+        job = Job(name, interval, func, args, kwargs)
+        self.jobs.append(job)
+        return job
+
+    def stop(self):
+        """
+        Stop the schedule after the runs in progress.
+        """
+        self._stop.set()
+
+    def _execute(self, job, due):
+        started = time.monotonic()
+        job.max_lag = max(job.max_lag, started - due)
+        if job.first_start is None:
+            job.first_start = started
+        job.last_start = started
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as error:
+            job.errors += 1
+            job.last_error = error
+            print(f"Job {job.name} failed: {error}")
+        finally:
+            with self._lock:
+                job.runs += 1
+                job.total_duration += time.monotonic() - started
+                job.running = False
+
+    def run(self, duration=None):
+        """
+        Run the jobs until the duration elapses, stop() is called or the process is interrupted.
+
+        Every job ticks at once when the schedule starts, then every interval after that start.
+
+        Args:
+            duration (float): Seconds to run for. Runs until stopped if None.
+
+        Returns:
+            dict: Statistics of every job keyed by name, see Job.stats().
+        """
+        if not self.jobs:
+            return {}
+        self._stop.clear()
+        start = time.monotonic()
+        deadline = start + duration if duration is not None else None
+        for job in self.jobs:
+            job.start, job.tick = start, 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self.jobs)) as executor:
+            try:
+                while not self._stop.is_set():
+                    job = min(self.jobs, key=lambda candidate: candidate.due)
+                    if deadline is not None and job.due >= deadline:
+                        break
+                    now = time.monotonic()
+                    if job.due > now:
+                        self._stop.wait(job.due - now)
+                        continue
+
+                    with self._lock:
+                        busy = job.running
+                        job.running = True
+                    if busy:
+                        job.skipped += 1
+                    else:
+                        executor.submit(self._execute, job, job.due)
+                    # The next tick stays on the grid measured from the start; ticks already passed are skipped
+                    missed = int((now - job.due) // job.interval)
+                    job.skipped += missed
+                    job.tick += missed + 1
+            except KeyboardInterrupt:
+                print("Stopping after the runs in progress")
+        return self.stats()
+
+    def stats(self):
+        """
+        Return the statistics of every job keyed by name.
+        """
+        return {job.name: job.stats() for job in self.jobs}
+
+    def report(self):
+        """
+        Describe the actual cadence of every job against its target, one line per job.
+        """
+        lines = []
+        for name, stats in self.stats().items():
+            actual = f"{stats['actual_interval']:.2f}s" if stats["actual_interval"] is not None else "n/a"
+            lines.append(f"{name}: {stats['runs']} runs every {actual} (target {stats['target_interval']:.2f}s), "
+                         f"{stats['skipped']} ticks skipped, {stats['errors']} errors, "
+                         f"max lag {stats['max_lag']:.3f}s")
+        return "\n".join(lines)
@@ -0,0 +1,210 @@
+"""
+Scores tracking that only polls games still in play.
+
+A scores request with daysFrom returns every game of the window, including games that went final days ago, so
+polling it repeatedly downloads and rescans the same results over and over. A ScoresTracker fetches the whole window
+once, then only re-polls the games that have commenced (or are about to) and are not completed yet, by eventIds;
+with no game in play it does not send a request at all. The window is refreshed at a slow interval to discover newly
+listed games.
+
+Completed games never change again, so they are kept permanently, in memory and, if a cache file is given, in an
+append-only NDJSON file that later runs start from. Scores are indexed by team name, both within a game (team_scores)
+and across games (ScoresTracker.team_games).
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from pysportsbet import backfill, cadence, timestamps
+
+# Seconds between fetches of the whole daysFrom window, discovering new games
+REFRESH_SECS = 3600
+
+# Games commencing within this many seconds are polled with the live ones, so their first score is not missed
+START_WINDOW_SECS = 300
+
+# Serializes appends of trackers sharing a cache file
+_cache_lock = threading.Lock()
+
+
+def team_scores(event):
+    """
+    Index the scores of a game by team name.
+
+    Args:
+        event (dict): Event of a scores response.
+
+    Returns:
+        dict: Scores keyed by team name; empty before the game starts.
+    """
+    return {score["name"]: score["score"] for score in event.get("scores") or []}
+
+
+class ScoresTracker(object):
+    """
+    Latest scores of the games of one sport, polling only the games still in play.
+
+    Args:
+        api_key (str): The Odds API key.
+        sport_key (str): Sport key.
+        days_from (int): Days in the past to track completed games from (1-3).
+        date_format (str): Format of the dates ('iso' or 'unix'). Live polling needs 'iso' to know which games
+            have commenced; with 'unix' every incomplete game is polled.
+        cache_file (str): NDJSON file keeping completed games across runs, or None to keep them in memory only.
+        limiter (backfill.QuotaLimiter): Limiter pacing requests and tracking the usage quota.
+        refresh_secs (float): Seconds between fetches of the whole window.
+    """
+
+    def __init__(self, api_key, sport_key, days_from=1, date_format="iso", cache_file=None, limiter=None,
+                 refresh_secs=REFRESH_SECS):
+        self.api_key = api_key
+        self.sport_key = sport_key
+        self.days_from = days_from
+        self.date_format = date_format
+        self.cache_file = cache_file
+        self.limiter = limiter or backfill.QuotaLimiter()
+        self.refresh_secs = refresh_secs
+        self.last_refresh = None
+        # Completed games, never polled again, and games not completed yet, keyed by event id
+        self.completed = {}
+        self.games = {}
+        # Event ids of every team's games
+        self.teams = {}
+        self.requests = 0
+        if cache_file is not None and os.path.exists(cache_file):
+            with open(cache_file, encoding="utf-8") as f:
+                for line in f:
+                    # A crash mid-write can leave a truncated last line; that game is simply fetched again
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if event.get("sport_key", sport_key) == sport_key:
+                        self._index(event)
+                        self.completed[event["id"]] = event
+
+    def _index(self, event):
+        for team in (event.get("home_team"), event.get("away_team")):
+            if team is not None:
+                self.teams.setdefault(team, set()).add(event["id"])
+
+    def _commence(self, event):
+        # None if missing or not ISO (dateFormat=unix)
+        commence_time = event.get("commence_time")
+        if not isinstance(commence_time, str):
+            return None
+        try:
+            return timestamps.parse(commence_time)
+        except ValueError:
+            return None
+
+    def live_ids(self, now):
+        """
+        Return the ids of the games to poll at a time: commenced or about to, and not completed.
+        """
+        ids = []
+        for event_id, event in self.games.items():
+            commence_time = self._commence(event)
+            if commence_time is None or commence_time <= now + timedelta(seconds=START_WINDOW_SECS):
+                ids.append(event_id)
+        return sorted(ids)
+
+    def request(self, params, days_from):
+        endpoint = f"/v4/sports/{self.sport_key}/scores"
+        params = dict(params, dateFormat=self.date_format)
+        # Without daysFrom only live and upcoming games are returned, at half the cost
+        if days_from:
+            params["daysFrom"] = days_from
+        cost = cadence.SCORES_COST if days_from else cadence.SCORES_COST // 2
+        self.limiter.acquire(cost)
+        response = backfill.fetch(self.api_key, backfill.BackfillRequest("scores", endpoint, params, cost))
+        self.limiter.update(response.headers)
+        self.requests += 1
+        return response.json()
+
+    def update(self, events, requested=None, now=None):
+        """
+        Merge the events of a scores response; completed games move to the permanent cache.
+
+        Args:
+            events (list): Events of a scores response.
+            requested (iterable): Ids the response was asked for. Those missing from it are dropped once they
+                commenced more than cadence.MAX_GAME_HOURS ago.
+            now (datetime.datetime): Current time.
+
+        Returns:
+            list: The events that were new or changed.
+        """
+        changed = []
+        finished = []
+        for event in events:
+            event_id = event["id"]
+            if event_id in self.completed:
+                continue
+            if self.games.get(event_id) != event:
+                changed.append(event)
+            self._index(event)
+            if event.get("completed"):
+                self.games.pop(event_id, None)
+                self.completed[event_id] = event
+                finished.append(event)
+            else:
+                self.games[event_id] = event
+        if finished and self.cache_file is not None:
+            with _cache_lock, open(self.cache_file, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(event) + "\n" for event in finished)
+
+        if requested is not None and now is not None:
+            returned = {event["id"] for event in events}
+            for event_id in set(requested) - returned:
+                commence_time = self._commence(self.games.get(event_id, {}))
+                if commence_time is not None and commence_time < now - timedelta(hours=cadence.MAX_GAME_HOURS):
+                    self.games.pop(event_id, None)
+        return changed
+
+    def poll(self, now=None):
+        """
+        Fetch the whole window if a refresh is due, otherwise only the games in play.
+
+        Args:
+            now (datetime.datetime): Current time. Defaults to the current UTC time.
+
+        Returns:
+            list: The events that were new or changed.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        if self.last_refresh is None or (now - self.last_refresh).total_seconds() >= self.refresh_secs:
+            self.last_refresh = now
+            return self.update(self.request({}, self.days_from), now=now)
+        ids = self.live_ids(now)
+        if not ids:
+            return []
+        # daysFrom keeps games that went final since the last poll in the response
+        return self.update(self.request({"eventIds": ",".join(ids)}, 1), requested=ids, now=now)
+
+    def events(self, now=None):
+        """
+        Return the tracked games of the window: completed in the last days_from days, and not completed.
+
+        Args:
+            now (datetime.datetime): Current time. Defaults to the current UTC time.
+
+        Returns:
+            list: Events of the scores responses, by commence time.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        games = list(self.games.values())
+        if self.days_from:
+            cutoff = now - timedelta(days=self.days_from)
+            games.extend(event for event in self.completed.values()
+                         if self._commence(event) is None or self._commence(event) >= cutoff)
+        return sorted(games, key=lambda event: (str(event.get("commence_time")), event["id"]))
+
+    def team_games(self, team):
+        """
+        Return the tracked games of a team, by commence time.
+        """
+        games = [self.completed.get(event_id) or self.games.get(event_id) for event_id in self.teams.get(team, ())]
+        return sorted((event for event in games if event is not None),
+                      key=lambda event: (str(event.get("commence_time")), event["id"]))
@@ -0,0 +1,392 @@
+"""
+Pluggable output sinks for tabular rows.
+
+The format_* functions of the scripts produce lists of rows; a sink writes them in batches to Excel, CSV, Parquet,
+SQLite or Arrow IPC. The format is picked from the file extension (open_sink) or from a --sink option naming either a
+format or a path (sink_target). Columnar sinks infer one type per column before writing the first batch: numbers are
+stored as float64, booleans as bool and everything else as strings, so later batches always fit the file's schema.
+Batches are held back while a column has no value yet (e.g. points of h2h rows before the first spread), up to
+SCHEMA_BATCHES batches; columns still empty then are typed by name, odds and points as float64.
+
+Excel output streams through openpyxl's write-only mode and spills across sheets past Excel's row limit. Metadata rows
+(e.g. the usage quota) go above the table in Excel, into a 'meta' table in SQLite and into a '<path>.meta.json' sidecar
+for the other formats.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+
+import openpyxl
+
+# Rows buffered before a batch is written by the columnar and SQLite sinks
+BATCH_ROWS = 50000
+
+# Batches the columnar sinks hold back while a column has no value to infer its type from
+SCHEMA_BATCHES = 10
+
+# Names of the numeric columns (price, point, odd_1, home_odd, ...), typed float64 while they hold no value
+NUMERIC_COLUMN = re.compile(r"(^|_)(price|point|odds?)(_|$)")
+
+# Rows of an Excel sheet
+EXCEL_MAX_ROWS = 1048576
+
+# Sink formats keyed by name, with their file extensions
+FORMATS = {
+    "excel": (".xlsx",),
+    "csv": (".csv",),
+    "parquet": (".parquet",),
+    "sqlite": (".sqlite", ".db"),
+    "arrow": (".arrow", ".feather", ".ipc"),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet and Arrow sinks require the 'pyarrow' package: pip install pyarrow")
+    return pyarrow
+
+
+class Sink(object):
+    """
+    Writes rows under a header to a file.
+
+    Args:
+        path (str): Output file, replaced if it exists.
+        header (list): Column names.
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = list(header)
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_meta(self, meta):
+        """
+        Record metadata rows ([name, value] pairs). Call before writing rows.
+        """
+        with open(self.path + ".meta.json", "w", encoding="utf-8") as f:
+            json.dump({str(row[0]): row[1] for row in meta if row}, f)
+
+    def write(self, rows):
+        """
+        Write a batch of rows.
+
+        Args:
+            rows (iterable): Rows as lists, in header order.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flush buffered rows and close the file.
+        """
+
+
+class ExcelSink(Sink):
+    """
+    Excel sink streaming rows through a write-only workbook: metadata rows, a blank row, the header and the rows.
+
+    Rows are written to disk as they arrive instead of being kept as cell objects, so memory stays flat however large
+    the dump. A sheet full at `max_rows` spills into the next one ('Sheet1 (2)', ...), which repeats the header.
+
+    Args:
+        sheet_name (str): Name of the first sheet.
+        max_rows (int): Rows per sheet, metadata and header included.
+    """
+
+    def __init__(self, path, header, sheet_name="Sheet1", max_rows=EXCEL_MAX_ROWS):
+        super().__init__(path, header)
+        self.sheet_name = sheet_name
+        self.max_rows = max_rows
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.sheets = 0
+        self.ws = self._add_sheet()
+        self.started = False
+
+    def _add_sheet(self):
+        self.sheets += 1
+        self.sheet_rows = 0
+        title = self.sheet_name if self.sheets == 1 else f"{self.sheet_name} ({self.sheets})"
+        return self.wb.create_sheet(title)
+
+    def _append(self, row):
+        self.ws.append(row)
+        self.sheet_rows += 1
+
+    def write_meta(self, meta):
+        if self.started:
+            raise ValueError("Metadata must be written before the rows")
+        for row in meta:
+            self._append(row)
+        self._append([])
+
+    def write(self, rows):
+        if not self.started:
+            self._append(self.header)
+            self.started = True
+        for row in rows:
+            if self.sheet_rows >= self.max_rows:
+                self.ws = self._add_sheet()
+                self._append(self.header)
+            self._append(row)
+            self.rows_written += 1
+
+    def close(self):
+        if not self.started:
+            self.write([])
+        self.wb.save(self.path)
+
+
+class CSVSink(Sink):
+    """
+    CSV sink with the header on the first line.
+    """
+
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.header)
+
+    def write(self, rows):
+        for row in rows:
+            self.writer.writerow(row)
+            self.rows_written += 1
+
+    def close(self):
+        self.file.close()
+
+
+class SQLiteSink(Sink):
+    """
+    SQLite sink writing the rows to a table, replaced if it exists, and metadata to a 'meta' table.
+    """
+
+    def __init__(self, path, header, table="rows"):
+        super().__init__(path, header)
+        self.table = table
+        self.connection = sqlite3.connect(path)
+        columns = ", ".join(f'"{name}"' for name in self.header)
+        self.connection.execute(f'DROP TABLE IF EXISTS "{table}"')
+        self.connection.execute(f'CREATE TABLE "{table}" ({columns})')
+        self.insert = f'INSERT INTO "{table}" VALUES ({", ".join("?" * len(self.header))})'
+
+    def write_meta(self, meta):
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+            self.connection.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                        [(str(row[0]), row[1]) for row in meta if row])
+
+    def write(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_ROWS:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+
+    def _flush(self, batch):
+        if batch:
+            with self.connection:
+                self.connection.executemany(self.insert, batch)
+            self.rows_written += len(batch)
+
+    def close(self):
+        self.connection.close()
+
+
+class ArrowSink(Sink):
+    """
+    Columnar sink writing record batches; the base of the Parquet and Arrow IPC sinks.
+    """
+
+    def __init__(self, path, header):
+        super().__init__(path, header)
+        self.pyarrow = _pyarrow()
+        self.schema = None
+        self.writer = None
+        self.buffer = []
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _column_type(self, name, values):
+        pyarrow = self.pyarrow
+        present = [value for value in values if value is not None]
+        if not present:
+            return pyarrow.float64() if NUMERIC_COLUMN.search(name) else pyarrow.string()
+        if all(isinstance(value, bool) for value in present):
+            return pyarrow.bool_()
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return pyarrow.float64()
+        return pyarrow.string()
+
+    def _coerce(self, value, type_):
+        if value is None:
+            return None
+        if type_ == self.pyarrow.string():
+            return value if isinstance(value, str) else str(value)
+        if type_ == self.pyarrow.float64():
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        return bool(value)
+
+    def _flush(self, final=False):
+        if not self.buffer:
+            return
+        columns = list(zip(*self.buffer))
+        if self.schema is None:
+            # Hold the rows back until every column has a value, so an empty column is not typed by its first batch
+            typed = all(any(value is not None for value in values) for values in columns)
+            if not (typed or final or len(self.buffer) >= BATCH_ROWS * SCHEMA_BATCHES):
+                return
+            self.schema = self.pyarrow.schema([(name, self._column_type(name, values))
+                                               for name, values in zip(self.header, columns)])
+            self.writer = self._open(self.schema)
+        arrays = [self.pyarrow.array([self._coerce(value, field.type) for value in values], type=field.type)
+                  for field, values in zip(self.schema, columns)]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def write(self, rows):
+        for row in rows:
+            self.buffer.append(list(row) + [None] * (len(self.header) - len(row)))
+            if len(self.buffer) % BATCH_ROWS == 0:
+                self._flush()
+
+    def close(self):
+        self._flush(final=True)
+        if self.writer is None:
+            # No rows: an empty file with columns typed by name
+            self.schema = self.pyarrow.schema([(name, self._column_type(name, [])) for name in self.header])
+            self.writer = self._open(self.schema)
+        self.writer.close()
+
+
+class ParquetSink(ArrowSink):
+    """
+    Parquet sink, one row group per batch.
+    """
+
+    def _open(self, schema):
+        return self.pyarrow.parquet.ParquetWriter(self.path, schema)
+
+
+class ArrowIPCSink(ArrowSink):
+    """
+    Arrow IPC (Feather v2) file sink.
+    """
+
+    def _open(self, schema):
+        return self.pyarrow.ipc.new_file(self.path, schema)
+
+
+SINKS = {"excel": ExcelSink, "csv": CSVSink, "parquet": ParquetSink, "sqlite": SQLiteSink, "arrow": ArrowIPCSink}
+
+
+def sink_format(path):
+    """
+    Return the sink format of a path from its extension.
+
+    Raises:
+        ValueError: If the extension belongs to no sink.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for name, extensions in FORMATS.items():
+        if extension in extensions:
+            return name
+    raise ValueError(f"No sink writes {extension or 'files without extension'}; use one of "
+                     f"{', '.join(extension for extensions in FORMATS.values() for extension in extensions)}")
+
+
+def open_sink(path, header, sheet_name="Sheet1"):
+    """
+    Open the sink matching the extension of a path.
+
+    Args:
+        path (str): Output file.
+        header (list): Column names.
+        sheet_name (str): Sheet name, used by the Excel sink only.
+
+    Returns:
+        Sink: The open sink.
+    """
+    kind = sink_format(path)
+    if kind == "excel":
+        return ExcelSink(path, header, sheet_name=sheet_name)
+    return SINKS[kind](path, header)
+
+
+def sink_target(sink, default_path):
+    """
+    Resolve a sink option to an output path.
+
+    Args:
+        sink (str): A format name ('excel', 'csv', 'parquet', 'sqlite' or 'arrow'), a path, or None.
+        default_path (str): Output path when no sink is given; its stem is reused for a bare format name.
+
+    Returns:
+        str: Output path.
+    """
+    if not sink:
+        return default_path
+    if sink in FORMATS:
+        return os.path.splitext(default_path)[0] + FORMATS[sink][0]
+    sink_format(sink)
+    return sink
+
+
+def parse_sink(default_path, argv=None):
+    """
+    Read the --sink option of a script's command line.
+
+    Args:
+        default_path (str): Output path when --sink is not given.
+        argv (list): Arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        str: Output path.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--sink", default=None,
+                        help=f"Output format ({', '.join(FORMATS)}) or path; the extension picks the format")
+    args, _ = parser.parse_known_args(argv)
+    return sink_target(args.sink, default_path)
+
+
+def save_rows(path, header, rows, meta=None, sheet_name="Sheet1"):
+    """
+    Write metadata and rows to the sink matching a path.
+
+    Args:
+        path (str): Output file.
+        header (list): Column names.
+        rows (iterable): Rows in header order; consumed lazily.
+        meta (list): Metadata rows ([name, value] pairs), if any.
+        sheet_name (str): Sheet name, used by the Excel sink only.
+
+    Returns:
+        int: Number of rows written.
+    """
+    with open_sink(path, header, sheet_name=sheet_name) as sink:
+        if meta:
+            sink.write_meta(meta)
+        sink.write(rows)
+    return sink.rows_written
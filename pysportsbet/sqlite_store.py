@@ -0,0 +1,253 @@
+"""
+Local SQLite database of the odds and scores seen by collectors.
+
+Everything a collector polls is upserted into one SQLite file in WAL mode, so analysts and other tools can query it
+with plain SQL while collectors keep writing. The tables are:
+
+    events    one row per event: sport, commence_time, teams, and completed/last_update once scores are seen
+    markets   one row per (event, book, market): its latest last_update and when it was last seen
+    outcomes  one row per (event, book, market, outcome, point, last_update): the price history of every outcome
+    scores    one row per (event, team): the latest score
+
+Each poll is written in one transaction with executemany, so a collector writes thousands of rows per second, and
+re-writing a poll that was already stored changes nothing. Latest-state rows (markets, scores) only move forward in
+time, so historical snapshots may be written in any order. Outcomes are keyed like in the delta log (name and
+description), with the point part of the key so alternate lines are kept apart; a missing description or point is
+keyed as ''. Timestamps are stored as ISO 8601 text ending in 'Z', which sorts chronologically.
+"""
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from pysportsbet import timestamps
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    sport_key TEXT,
+    sport_title TEXT,
+    commence_time TEXT,
+    home_team TEXT,
+    away_team TEXT,
+    completed INTEGER,
+    last_update TEXT
+);
+CREATE TABLE IF NOT EXISTS markets (
+    event_id TEXT NOT NULL,
+    book TEXT NOT NULL,
+    book_title TEXT,
+    market TEXT NOT NULL,
+    last_update TEXT,
+    seen TEXT,
+    PRIMARY KEY (event_id, book, market)
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    event_id TEXT NOT NULL,
+    book TEXT NOT NULL,
+    market TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    point REAL,
+    last_update TEXT,
+    price REAL,
+    seen TEXT
+);
+CREATE TABLE IF NOT EXISTS scores (
+    event_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score TEXT,
+    last_update TEXT,
+    PRIMARY KEY (event_id, name)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS outcomes_key
+    ON outcomes (event_id, book, market, name, IFNULL(description, ''), IFNULL(point, ''), IFNULL(last_update, ''));
+CREATE INDEX IF NOT EXISTS outcomes_book ON outcomes (book, last_update);
+CREATE INDEX IF NOT EXISTS events_commence_time ON events (commence_time);
+CREATE INDEX IF NOT EXISTS events_sport ON events (sport_key, commence_time);
+CREATE INDEX IF NOT EXISTS markets_book ON markets (book, market);
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (id, sport_key, sport_title, commence_time, home_team, away_team) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    sport_key = IFNULL(excluded.sport_key, sport_key), sport_title = IFNULL(excluded.sport_title, sport_title),
+    commence_time = excluded.commence_time, home_team = excluded.home_team, away_team = excluded.away_team
+"""
+
+UPSERT_MARKET = """
+INSERT INTO markets (event_id, book, book_title, market, last_update, seen) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (event_id, book, market) DO UPDATE SET
+    book_title = excluded.book_title, last_update = excluded.last_update, seen = excluded.seen
+WHERE IFNULL(excluded.last_update, '') >= IFNULL(markets.last_update, '')
+"""
+
+UPSERT_OUTCOME = """
+INSERT INTO outcomes (event_id, book, market, name, description, point, last_update, price, seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (event_id, book, market, name, IFNULL(description, ''), IFNULL(point, ''), IFNULL(last_update, ''))
+DO UPDATE SET price = excluded.price
+"""
+
+UPSERT_SCORES_EVENT = """
+INSERT INTO events (id, sport_key, sport_title, commence_time, home_team, away_team, completed, last_update)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET completed = excluded.completed, last_update = excluded.last_update
+WHERE IFNULL(excluded.last_update, '') >= IFNULL(events.last_update, '')
+"""
+
+UPSERT_SCORE = """
+INSERT INTO scores (event_id, name, score, last_update) VALUES (?, ?, ?, ?)
+ON CONFLICT (event_id, name) DO UPDATE SET score = excluded.score, last_update = excluded.last_update
+WHERE IFNULL(excluded.last_update, '') >= IFNULL(scores.last_update, '')
+"""
+
+
+def _where(conditions):
+    clauses = [clause for clause, value in conditions if value is not None]
+    values = [value for _, value in conditions if value is not None]
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), values
+
+
+class OddsStore(object):
+    """
+    SQLite store of events, bookmaker markets, outcomes and scores.
+
+    One store may be shared by the threads of a collector; writes are serialized. Other processes open their own
+    store on the same file to read or write concurrently.
+
+    Args:
+        path (str): SQLite database file, created if missing.
+        timeout (float): Seconds to wait for a lock held by another process.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL stays durable across application crashes without syncing every commit
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, batches):
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for statement, rows in batches:
+                    if rows:
+                        self.connection.executemany(statement, rows)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def add_odds(self, events, seen=None):
+        """
+        Upsert the events of an odds response with their markets and outcomes, in one transaction.
+
+        Args:
+            events (list): Events of an odds (or historical odds) response.
+            seen (str): Time of the poll or snapshot in ISO 8601 format ending in 'Z'. Defaults to the current time.
+
+        Returns:
+            int: Number of outcome rows written.
+        """
+        seen = seen or timestamps.format_timestamp(datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0))
+        event_rows, market_rows, outcome_rows = [], [], []
+        for event in events:
+            event_rows.append((event["id"], event.get("sport_key"), event.get("sport_title"),
+                               event.get("commence_time"), event.get("home_team"), event.get("away_team")))
+            for bookmaker in event.get("bookmakers", []):
+                for market in bookmaker.get("markets", []):
+                    last_update = market.get("last_update", bookmaker.get("last_update"))
+                    market_rows.append((event["id"], bookmaker["key"], bookmaker.get("title"), market["key"],
+                                        last_update, seen))
+                    for outcome in market.get("outcomes", []):
+                        outcome_rows.append((event["id"], bookmaker["key"], market["key"], outcome["name"],
+                                             outcome.get("description"), outcome.get("point"), last_update,
+                                             outcome.get("price"), seen))
+        self._write([(UPSERT_EVENT, event_rows), (UPSERT_MARKET, market_rows), (UPSERT_OUTCOME, outcome_rows)])
+        return len(outcome_rows)
+
+    def add_scores(self, events):
+        """
+        Upsert the events of a scores response and their scores, in one transaction.
+
+        Args:
+            events (list): Events of a scores response.
+
+        Returns:
+            int: Number of score rows written.
+        """
+        event_rows, score_rows = [], []
+        for event in events:
+            event_rows.append((event["id"], event.get("sport_key"), event.get("sport_title"),
+                               event.get("commence_time"), event.get("home_team"), event.get("away_team"),
+                               int(bool(event.get("completed"))), event.get("last_update")))
+            for score in event.get("scores") or []:
+                score_rows.append((event["id"], score["name"], score.get("score"), event.get("last_update")))
+        self._write([(UPSERT_SCORES_EVENT, event_rows), (UPSERT_SCORE, score_rows)])
+        return len(score_rows)
+
+    def events(self, sport=None, start=None, end=None):
+        """
+        Query events by sport and commence_time range.
+
+        Args:
+            sport (str): Sport key, or None for all sports.
+            start (str): Earliest commence_time in ISO 8601 format ending in 'Z' (inclusive).
+            end (str): Latest commence_time in ISO 8601 format ending in 'Z' (inclusive).
+
+        Returns:
+            list: Events as dicts, by commence_time.
+        """
+        where, values = _where([("sport_key = ?", sport), ("commence_time >= ?", start), ("commence_time <= ?", end)])
+        cursor = self.connection.execute(f"SELECT * FROM events{where} ORDER BY commence_time, id", values)
+        return [dict(row) for row in cursor]
+
+    def odds(self, event_id=None, book=None, market=None, start=None, end=None, latest=False):
+        """
+        Query outcome prices by event, book, market and last_update range.
+
+        Args:
+            event_id (str): Event id, or None for all events.
+            book (str): Bookmaker key, or None for all books.
+            market (str): Market key, or None for all markets.
+            start (str): Earliest last_update in ISO 8601 format ending in 'Z' (inclusive).
+            end (str): Latest last_update in ISO 8601 format ending in 'Z' (inclusive).
+            latest (bool): Only return the prices of the latest last_update of every market.
+
+        Returns:
+            list: Outcome rows as dicts, by event, book, market and last_update.
+        """
+        where, values = _where([("o.event_id = ?", event_id), ("o.book = ?", book), ("o.market = ?", market),
+                                ("o.last_update >= ?", start), ("o.last_update <= ?", end)])
+        join = ""
+        if latest:
+            join = (" JOIN markets m ON m.event_id = o.event_id AND m.book = o.book AND m.market = o.market"
+                    " AND m.last_update IS o.last_update")
+        cursor = self.connection.execute(
+            f"SELECT o.* FROM outcomes o{join}{where} ORDER BY o.event_id, o.book, o.market, o.last_update, o.rowid",
+            values)
+        return [dict(row) for row in cursor]
+
+    def scores(self, event_id=None):
+        """
+        Query the latest scores, of one event or of all events.
+
+        Returns:
+            list: Score rows as dicts, by event and team.
+        """
+        where, values = _where([("event_id = ?", event_id)])
+        cursor = self.connection.execute(f"SELECT * FROM scores{where} ORDER BY event_id, name", values)
+        return [dict(row) for row in cursor]
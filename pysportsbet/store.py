@@ -0,0 +1,354 @@
+"""
+Local Parquet store of historical odds snapshots.
+
+Snapshots are flattened to one row per outcome and written to a Parquet dataset partitioned by sport and snapshot
+date (root/sport=<sport>/date=<YYYY-MM-DD>/...). An append-only manifest records which (sport, markets, regions or
+bookmakers, timestamp) snapshots are held, so backfills can fetch only the gaps, and queries over a sport and time
+range read only the matching partitions and row groups. Writers sharing a store over a network filesystem, where
+concurrent appends to one file can interleave, each append to their own manifest; all manifests are merged on read.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+
+import pandas
+
+from pysportsbet import timestamps
+
+MANIFEST_FILE = "manifest.ndjson"
+
+# Manifest of a named writer, e.g. 'manifest-host-1234.ndjson'
+WRITER_MANIFEST_FILE = "manifest-{}.ndjson"
+
+COLUMNS = [
+    "snapshot", "id", "sport_key", "sport_title", "commence_time", "home_team", "away_team", "book_key", "book_title",
+    "book_last_update", "market", "market_last_update", "name", "description", "price", "point",
+]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The historical store requires the 'pyarrow' package: pip install pyarrow")
+    return pyarrow
+
+
+def schema(pyarrow):
+    """
+    Return the Arrow schema of the stored rows, fixed so files with all-null columns stay compatible.
+    """
+    types = {
+        "snapshot": pyarrow.timestamp("ns"), "commence_time": pyarrow.timestamp("ns"),
+        "book_last_update": pyarrow.timestamp("ns"), "market_last_update": pyarrow.timestamp("ns"),
+        "price": pyarrow.float64(), "point": pyarrow.float64(),
+    }
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in COLUMNS])
+
+
+def scope(regions, bookmakers):
+    """
+    Describe the bookmakers a request covered, e.g. 'regions=us' or 'bookmakers=fanduel,pinnacle'.
+    """
+    if bookmakers:
+        return "bookmakers=" + ",".join(sorted(bookmakers.split(",")))
+    return "regions=" + ",".join(sorted(regions.split(",")))
+
+
+def flatten(events, snapshot):
+    """
+    Flatten events into one row per outcome.
+
+    Args:
+        events (list): Events from an Odds API odds response.
+        snapshot (str): Timestamp of the snapshot the events belong to.
+
+    Returns:
+        pandas.DataFrame: Rows with the columns in COLUMNS.
+    """
+    rows = []
+    for event in events:
+        for bookmaker in event.get("bookmakers", []):
+            for market in bookmaker.get("markets", []):
+                for outcome in market.get("outcomes", []):
+                    rows.append((
+                        snapshot, event["id"], event.get("sport_key"), event.get("sport_title"),
+                        event.get("commence_time"), event.get("home_team"), event.get("away_team"), bookmaker["key"],
+                        bookmaker.get("title"), bookmaker.get("last_update"), market["key"],
+                        market.get("last_update"), outcome["name"], outcome.get("description"),
+                        float(outcome["price"]), outcome.get("point"),
+                    ))
+    df = pandas.DataFrame(rows, columns=COLUMNS)
+    for column in ["snapshot", "commence_time", "book_last_update", "market_last_update"]:
+        df[column] = pandas.to_datetime(df[column].str.rstrip("Z"))
+    df["point"] = df["point"].astype(float)
+    return df
+
+
+def unflatten(df):
+    """
+    Rebuild events from flattened outcome rows, the inverse of flatten().
+
+    Args:
+        df (pandas.DataFrame): Rows with the columns in COLUMNS.
+
+    Returns:
+        list: Events with their bookmakers, markets and outcomes, in the order of the rows.
+    """
+    def iso(value):
+        return None if pandas.isna(value) else timestamps.format_timestamp(value.to_pydatetime())
+
+    events = {}
+    for row in df.itertuples(index=False):
+        event = events.setdefault(row.id, {
+            "id": row.id, "sport_key": row.sport_key, "sport_title": row.sport_title,
+            "commence_time": iso(row.commence_time), "home_team": row.home_team, "away_team": row.away_team,
+            "bookmakers": {},
+        })
+        book = event["bookmakers"].setdefault(row.book_key, {
+            "key": row.book_key, "title": row.book_title, "last_update": iso(row.book_last_update), "markets": {},
+        })
+        market = book["markets"].setdefault(row.market, {
+            "key": row.market, "last_update": iso(row.market_last_update), "outcomes": [],
+        })
+        # Prices are stored as floats; American odds were integers in the response
+        outcome = {"name": row.name, "price": int(row.price) if float(row.price).is_integer() else row.price}
+        if not pandas.isna(row.description):
+            outcome["description"] = row.description
+        if not pandas.isna(row.point):
+            outcome["point"] = row.point
+        market["outcomes"].append(outcome)
+
+    for event in events.values():
+        for book in event["bookmakers"].values():
+            book["markets"] = list(book["markets"].values())
+        event["bookmakers"] = list(event["bookmakers"].values())
+    return list(events.values())
+
+
+class HistoricalStore(object):
+    """
+    Partitioned Parquet store of historical odds snapshots with a manifest of held snapshots.
+
+    Args:
+        root (str): Directory of the store. Created if missing.
+        writer (str): Name of this writer when several processes or machines write to the store; its snapshots are
+            recorded in a manifest of its own. The shared MANIFEST_FILE if None.
+    """
+
+    def __init__(self, root, writer=None):
+        self.root = root
+        manifest = MANIFEST_FILE if writer is None else WRITER_MANIFEST_FILE.format(re.sub(r"[^\w.-]", "-", writer))
+        self.manifest_path = os.path.join(root, manifest)
+        # Held markets keyed by (sport, scope, timestamp, event id); event id is None for whole-sport snapshots
+        self.entries = {}
+        # Parquet files relative to root, keyed like entries
+        self.paths = {}
+        os.makedirs(root, exist_ok=True)
+        writers = sorted(glob.glob(os.path.join(root, WRITER_MANIFEST_FILE.format("*"))))
+        for path in [os.path.join(root, MANIFEST_FILE)] + writers:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._remember(entry)
+
+    def _remember(self, entry):
+        key = (entry["sport"], entry["scope"], entry["timestamp"], entry.get("event_id"))
+        self.entries.setdefault(key, set()).update(entry["markets"])
+        if entry.get("path"):
+            self.paths.setdefault(key, []).append(entry["path"])
+
+    def has(self, sport, markets, regions, bookmakers, timestamp, event_id=None):
+        """
+        Check whether a snapshot covering all the markets is held.
+
+        Args:
+            sport (str): Sport key.
+            markets (str): Comma-separated list of markets.
+            regions (str): Comma-separated list of regions, used if bookmakers is empty.
+            bookmakers (str): Comma-separated list of bookmakers.
+            timestamp (str): Snapshot timestamp in ISO 8601 format ending in 'Z'.
+            event_id (str): Event of a per-event snapshot, None for a whole-sport snapshot.
+
+        Returns:
+            bool: Whether the snapshot is held.
+        """
+        held = self.entries.get((sport, scope(regions, bookmakers), timestamp, event_id), set())
+        return set(markets.split(",")) <= held
+
+    def held(self, sport, markets, regions, bookmakers):
+        """
+        Return the timestamps of the whole-sport snapshots held for a request.
+        """
+        wanted = set(markets.split(","))
+        request_scope = scope(regions, bookmakers)
+        return {
+            timestamp for (entry_sport, entry_scope, timestamp, event_id), held in self.entries.items()
+            if entry_sport == sport and entry_scope == request_scope and event_id is None and wanted <= held
+        }
+
+    def held_events(self, sport, markets, regions, bookmakers):
+        """
+        Return the (timestamp, event id) pairs of the per-event snapshots held for a request.
+        """
+        wanted = set(markets.split(","))
+        request_scope = scope(regions, bookmakers)
+        return {
+            (timestamp, event_id) for (entry_sport, entry_scope, timestamp, event_id), held in self.entries.items()
+            if entry_sport == sport and entry_scope == request_scope and event_id is not None and wanted <= held
+        }
+
+    def responses(self, sport, markets, regions, bookmakers, start=None, end=None, per_event=False, reverse=False):
+        """
+        Rebuild the held snapshots of a request as historical odds responses, e.g. to export every snapshot of a range
+        whether it was fetched by this run or an earlier one.
+
+        Args:
+            sport (str): Sport key.
+            markets (str): Comma-separated list of markets.
+            regions (str): Comma-separated list of regions, used if bookmakers is empty.
+            bookmakers (str): Comma-separated list of bookmakers.
+            start (str): Timestamp in ISO 8601 format ending in 'Z'; only later snapshots are yielded.
+            end (str): Latest snapshot timestamp in ISO 8601 format ending in 'Z' (inclusive).
+            per_event (bool): Yield the per-event snapshots, whose 'data' is a single event, instead of the
+                whole-sport snapshots.
+            reverse (bool): Yield the latest snapshot first.
+
+        Yields:
+            dict: Responses with 'timestamp' and 'data', holding only the requested markets. Snapshots without odds
+                are skipped.
+        """
+        pyarrow = _pyarrow()
+        wanted = markets.split(",")
+        request_scope = scope(regions, bookmakers)
+        if per_event:
+            held = self.held_events(sport, markets, regions, bookmakers)
+        else:
+            held = {(timestamp, None) for timestamp in self.held(sport, markets, regions, bookmakers)}
+        held = sorted(
+            ((timestamps.parse(timestamp), timestamp, event_id) for timestamp, event_id in held
+             if (not start or timestamps.parse(timestamp) > timestamps.parse(start))
+             and (not end or timestamps.parse(timestamp) <= timestamps.parse(end))),
+            key=lambda item: (item[0], item[2] or ""), reverse=reverse,
+        )
+        for _, timestamp, event_id in held:
+            paths = self.paths.get((sport, request_scope, timestamp, event_id), [])
+            tables = [pyarrow.parquet.read_table(os.path.join(self.root, path), schema=schema(pyarrow))
+                      for path in paths]
+            if not tables:
+                continue
+            df = pyarrow.concat_tables(tables).to_pandas()
+            df = df[df["market"].isin(wanted)].drop_duplicates(["id", "book_key", "market", "name", "description"])
+            events = unflatten(df)
+            if events:
+                yield {"timestamp": timestamp, "data": events[0] if per_event else events}
+
+    def missing(self, sport, markets, regions, bookmakers, snapshots):
+        """
+        List the snapshots of a request that are not held yet.
+
+        Args:
+            snapshots (list): Snapshot timestamps wanted, e.g. from timestamps.SnapshotPlanner.plan.
+
+        Returns:
+            list: Timestamps of the gaps, in the order given.
+        """
+        held = self.held(sport, markets, regions, bookmakers)
+        return [timestamp for timestamp in snapshots if timestamp not in held]
+
+    def add(self, sport, markets, regions, bookmakers, response, event_id=None):
+        """
+        Write a historical snapshot to the store and record it in the manifest.
+
+        Args:
+            sport (str): Sport key.
+            markets (str): Comma-separated list of markets requested.
+            regions (str): Comma-separated list of regions requested.
+            bookmakers (str): Comma-separated list of bookmakers requested.
+            response (dict): Historical odds or event odds response with 'timestamp' and 'data'.
+            event_id (str): Event of a historical event odds response.
+
+        Returns:
+            str: Path of the Parquet file written, or None if the snapshot held no odds.
+        """
+        pyarrow = _pyarrow()
+        timestamp = response["timestamp"]
+        data = response.get("data") or []
+        events = [data] if isinstance(data, dict) else data
+        df = flatten(events, timestamp)
+
+        path = None
+        if len(df):
+            request_scope = scope(regions, bookmakers)
+            digest = hashlib.sha1(f"{request_scope}|{markets}|{event_id}".encode()).hexdigest()[:12]
+            directory = os.path.join(self.root, f"sport={sport}", f"date={timestamp[:10]}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{timestamp.replace(':', '').replace('-', '')}-{digest}.parquet")
+            table = pyarrow.Table.from_pandas(df, schema=schema(pyarrow), preserve_index=False)
+            pyarrow.parquet.write_table(table, path)
+
+        entry = {
+            "sport": sport, "scope": scope(regions, bookmakers), "markets": sorted(markets.split(",")),
+            "timestamp": timestamp, "event_id": event_id, "rows": len(df),
+            "path": os.path.relpath(path, self.root) if path else None,
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._remember(entry)
+        return path
+
+    def query(self, sport, start=None, end=None, markets=None, bookmakers=None, columns=None):
+        """
+        Read the held odds of a sport over a time range.
+
+        Filters are pushed down to the dataset scan: partitions outside the sport and dates are never opened and row
+        groups outside the range are skipped.
+
+        Args:
+            sport (str): Sport key.
+            start (str): Earliest snapshot timestamp in ISO 8601 format ending in 'Z' (inclusive).
+            end (str): Latest snapshot timestamp in ISO 8601 format ending in 'Z' (exclusive).
+            markets (list): Markets to keep. All if None.
+            bookmakers (list): Bookmaker keys to keep. All if None.
+            columns (list): Columns to read. Defaults to COLUMNS.
+
+        Returns:
+            pandas.DataFrame: Flattened outcome rows sorted by snapshot.
+        """
+        pyarrow = _pyarrow()
+        ds = pyarrow.dataset
+        sport_dir = os.path.join(self.root, f"sport={sport}")
+        if not os.path.isdir(sport_dir):
+            return pandas.DataFrame(columns=columns or COLUMNS)
+
+        date_field = pyarrow.field("date", pyarrow.string())
+        dataset = ds.dataset(sport_dir, format="parquet", schema=schema(pyarrow).append(date_field),
+                             partitioning=ds.partitioning(pyarrow.schema([date_field]), flavor="hive"))
+        condition = ds.field("snapshot").is_valid()
+        if start:
+            condition &= ds.field("date") >= start[:10]
+            condition &= ds.field("snapshot") >= pyarrow.scalar(timestamps.parse(start), pyarrow.timestamp("ns"))
+        if end:
+            condition &= ds.field("date") <= end[:10]
+            condition &= ds.field("snapshot") < pyarrow.scalar(timestamps.parse(end), pyarrow.timestamp("ns"))
+        if markets:
+            condition &= ds.field("market").isin(list(markets))
+        if bookmakers:
+            condition &= ds.field("book_key").isin(list(bookmakers))
+
+        table = dataset.to_table(columns=columns or COLUMNS, filter=condition)
+        df = table.to_pandas()
+        if "snapshot" in df.columns:
+            df = df.sort_values("snapshot", kind="stable").reset_index(drop=True)
+        return df
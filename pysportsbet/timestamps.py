@@ -0,0 +1,135 @@
+"""
+Snapshot-aware planning of historical request times.
+
+Historical odds are stored as snapshots on a fixed grid (every 10 minutes before September 2022, every 5 minutes
+since), and a historical request returns the latest snapshot at or before the requested date. Stepping back by a
+fixed interval therefore requests the same snapshot repeatedly when the interval is shorter than the cadence, and
+lands between snapshots when it is not a multiple of it. The planner learns the real grid from the timestamp,
+previous_timestamp and next_timestamp fields of historical responses and plans one request per distinct snapshot,
+aligned to the snapshot boundaries.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+
+def parse(timestamp):
+    """
+    Parse an ISO 8601 timestamp ending in 'Z' into a naive UTC datetime.
+    """
+    return datetime.fromisoformat(timestamp[:-1] if timestamp.endswith("Z") else timestamp)
+
+
+def format_timestamp(value):
+    """
+    Format a naive UTC datetime as an ISO 8601 timestamp ending in 'Z'.
+    """
+    return value.isoformat() + "Z"
+
+
+class SnapshotPlanner(object):
+    """
+    Learns the snapshot grid from historical responses and plans requests on it.
+
+    Until a response has been observed the grid is unknown and requested times are used as given.
+    """
+
+    def __init__(self):
+        # Sorted datetimes of every snapshot known to exist
+        self.times = []
+        # Gap to the next snapshot, keyed by snapshot datetime
+        self.gaps = {}
+
+    def add(self, value):
+        """
+        Record a snapshot time.
+        """
+        i = bisect_left(self.times, value)
+        if i == len(self.times) or self.times[i] != value:
+            self.times.insert(i, value)
+
+    def observe(self, response):
+        """
+        Learn from a historical response (odds, events or event odds).
+
+        Args:
+            response (dict): Response with 'timestamp' and optionally 'previous_timestamp' and 'next_timestamp'.
+        """
+        if not response.get("timestamp"):
+            return
+        current = parse(response["timestamp"])
+        self.add(current)
+        if response.get("previous_timestamp"):
+            previous = parse(response["previous_timestamp"])
+            self.add(previous)
+            self.gaps[previous] = current - previous
+        if response.get("next_timestamp"):
+            following = parse(response["next_timestamp"])
+            self.add(following)
+            self.gaps[current] = following - current
+
+    def cadence_at(self, value):
+        """
+        Return the snapshot cadence nearest to a time, or None if no gap has been observed.
+        """
+        if not self.gaps:
+            return None
+        starts = sorted(self.gaps)
+        i = bisect_right(starts, value)
+        candidates = starts[max(0, i - 1):i + 1]
+        return self.gaps[min(candidates, key=lambda start: abs(start - value))]
+
+    def snapshot_at(self, value):
+        """
+        Return the time of the latest snapshot at or before a time.
+
+        Known snapshots are used as anchors and the grid is extended from the nearest one by the local cadence.
+
+        Args:
+            value (datetime.datetime): Requested time.
+
+        Returns:
+            datetime.datetime: Snapshot time, or the requested time itself if the grid is unknown.
+        """
+        if not self.times:
+            return value
+        i = bisect_right(self.times, value)
+        anchor = self.times[i - 1] if i else self.times[0]
+        if anchor == value:
+            return value
+        cadence = self.cadence_at(anchor)
+        if cadence is None:
+            return value
+        return anchor + cadence * ((value - anchor) // cadence)
+
+    def plan(self, from_date, to_date, interval_mins, held=()):
+        """
+        Plan the snapshots to request between two dates, latest first.
+
+        Each planned time is a snapshot boundary, no snapshot is planned twice and snapshots in held are skipped. An
+        interval shorter than the cadence requests every snapshot; a longer one requests the latest snapshot at or
+        before every interval step.
+
+        Args:
+            from_date (str): Start of the range in ISO 8601 format ending in 'Z' (exclusive).
+            to_date (str): End of the range in ISO 8601 format ending in 'Z'.
+            interval_mins (int): Minutes between requested snapshots.
+            held (iterable): ISO 8601 timestamps of snapshots already held.
+
+        Returns:
+            list: ISO 8601 timestamps of the snapshots to request.
+        """
+        from_datetime = parse(from_date)
+        # A non-positive interval would otherwise request the same snapshot forever
+        interval = max(timedelta(minutes=interval_mins), timedelta(seconds=1))
+        seen = {parse(timestamp) for timestamp in held}
+        planned = []
+        current = parse(to_date)
+        while current > from_datetime:
+            snapshot = self.snapshot_at(current)
+            if snapshot <= from_datetime:
+                break
+            if snapshot not in seen:
+                seen.add(snapshot)
+                planned.append(format_timestamp(snapshot))
+            current = snapshot - interval
+        return planned
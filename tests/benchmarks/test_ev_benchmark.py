@@ -0,0 +1,114 @@
+"""
+Benchmarks of the EV pipeline on synthetic payloads.
+
+Scales are outcome rows and are read from PYSPORTSBET_BENCH_ROWS (comma separated, default 10000). Run the full
+suite with:
+
+    PYSPORTSBET_BENCH_ROWS=10000,100000,1000000 pytest tests/benchmarks --benchmark-only
+
+Peak memory of every stage is measured with tracemalloc in a separate untimed run and reported in the benchmark's
+extra_info.
+"""
+import json
+import os
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pysportsbet import ev  # noqa: E402
+from tests.payloads import generate_odds_rows  # noqa: E402
+
+SCALES = [int(rows) for rows in os.environ.get("PYSPORTSBET_BENCH_ROWS", "10000").split(",")]
+
+
+def run(benchmark, func, *args, **kwargs):
+    tracemalloc.start()
+    func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_memory_mb"] = round(peak / 2 ** 20, 1)
+    return benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=3, iterations=1)
+
+
+def write_odds(tmp_path_factory, rows, pinnacle):
+    filename = tmp_path_factory.mktemp("odds") / "odds.json"
+    with open(filename, "w") as f:
+        json.dump(generate_odds_rows(rows, pinnacle=pinnacle, seed=rows), f)
+    return str(filename)
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda rows: f"{rows}_rows")
+def odds_file(request, tmp_path_factory):
+    return write_odds(tmp_path_factory, request.param, pinnacle=True)
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda rows: f"{rows}_rows")
+def odds_file_without_pinnacle(request, tmp_path_factory):
+    return write_odds(tmp_path_factory, request.param, pinnacle=False)
+
+
+@pytest.fixture(scope="module")
+def stages(odds_file):
+    raw = ev.file_to_df(odds_file)
+    unpacked = ev.unpacked_data(raw.copy())
+    processed = ev.processed_data(unpacked.copy())
+    pinnacle = ev.extract_pinnacle(processed)
+    average = ev.avg_ev(processed)
+    pinnacle_merge = ev.pinnacle_ev(processed, pinnacle)
+    return {"raw": raw, "unpacked": unpacked, "processed": processed, "pinnacle": pinnacle, "average": average,
+            "pinnacle_merge": pinnacle_merge}
+
+
+@pytest.mark.benchmark(group="ev-data")
+def test_data(benchmark, odds_file):
+    result = run(benchmark, ev.data, filename=odds_file)
+    assert len(result)
+
+
+@pytest.mark.benchmark(group="ev-data")
+def test_data_pinnacle_only(benchmark, odds_file):
+    run(benchmark, ev.data, filename=odds_file, ev_type="pinnacle")
+
+
+@pytest.mark.benchmark(group="ev-data")
+def test_data_without_pinnacle(benchmark, odds_file_without_pinnacle):
+    run(benchmark, ev.data, filename=odds_file_without_pinnacle)
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_file_to_df(benchmark, odds_file):
+    run(benchmark, ev.file_to_df, odds_file)
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_unpacked_data(benchmark, stages):
+    run(benchmark, lambda: ev.unpacked_data(stages["raw"].copy()))
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_processed_data(benchmark, stages):
+    run(benchmark, lambda: ev.processed_data(stages["unpacked"].copy()))
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_avg_ev(benchmark, stages):
+    run(benchmark, ev.avg_ev, stages["processed"])
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_pinnacle_ev(benchmark, stages):
+    run(benchmark, ev.pinnacle_ev, stages["processed"], stages["pinnacle"])
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_merge_ev(benchmark, stages):
+    run(benchmark, ev.merge_ev, stages["average"], stages["pinnacle_merge"])
+
+
+@pytest.mark.benchmark(group="ev-stages")
+def test_filter_ev(benchmark, stages):
+    merged = ev.merge_ev(stages["average"], stages["pinnacle_merge"])
+    run(benchmark, lambda: ev.filter_ev(merged.copy(), "both", min_odds=-200, max_odds=200, max_width=45,
+                                        min_ev_pct=1, min_num_books=4))
@@ -1,6 +1,11 @@
 import sys
+from datetime import timedelta
+
 import pytest
 
+from pysportsbet import backfill, timestamps
+from tests.payloads import generate_odds
+
 
 # each test runs on cwd to its temp dir
 @pytest.fixture(autouse=True)
@@ -12,3 +17,38 @@ def go_to_tmpdir(request):
     # Chdir only for the duration of the test.
     with tmpdir.as_cwd():
         yield
+
+
+class FakeResponse(object):
+    def __init__(self, payload, remaining):
+        self.payload = payload
+        self.headers = {"x-requests-remaining": str(remaining), "x-requests-used": "0"}
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    calls = []
+
+    def fetch(api_key, request, retries=3, backoff=2.0):
+        # Snapshots every 5 minutes; a request returns the latest snapshot at or before its date
+        calls.append(request.key)
+        requested = timestamps.parse(request.params["date"])
+        snapshot = requested - timedelta(minutes=requested.minute % 5, seconds=requested.second)
+        response = {
+            "timestamp": timestamps.format_timestamp(snapshot),
+            "previous_timestamp": timestamps.format_timestamp(snapshot - timedelta(minutes=5)),
+            "next_timestamp": timestamps.format_timestamp(snapshot + timedelta(minutes=5)),
+            "data": generate_odds(2, num_books=1, seed=len(calls)),
+        }
+        if request.endpoint.endswith("/events"):
+            for event in response["data"]:
+                del event["bookmakers"]
+        elif "/events/" in request.endpoint:
+            response["data"] = dict(response["data"][0], id=request.endpoint.split("/")[-2])
+        return FakeResponse(response, remaining=1000 - 10 * len(calls))
+
+    monkeypatch.setattr(backfill, "fetch", fetch)
+    return calls
@@ -0,0 +1,131 @@
+"""
+Deterministic generator of synthetic Odds API payloads.
+
+Payloads mirror the /v4/sports/{sport}/odds response: a list of events, each with bookmakers, markets and outcomes.
+The same seed always produces the same payload, so benchmark runs are comparable across commits.
+"""
+import random
+from datetime import datetime, timedelta
+
+# Two-way sports have no draw, three-way sports add a 'Draw' outcome to h2h
+SPORTS = [
+    ("basketball_nba", "NBA", 2),
+    ("americanfootball_nfl", "NFL", 2),
+    ("icehockey_nhl", "NHL", 2),
+    ("soccer_epl", "EPL", 3),
+]
+
+BOOKMAKERS = [
+    "draftkings", "fanduel", "betmgm", "williamhill_us", "betrivers", "bovada", "betonlineag", "mybookieag",
+    "lowvig", "betus", "unibet_eu", "betfair_ex_eu", "matchbook", "williamhill", "sport888", "onexbet",
+]
+
+MARKETS = ["h2h", "spreads", "totals"]
+
+START = datetime(2030, 1, 1)
+
+
+def american(probability, margin):
+    """
+    Convert a fair win probability into an American price carrying a bookmaker margin.
+    """
+    implied = min(probability * (1 + margin), 0.99)
+    if implied >= 0.5:
+        return -round(100 * implied / (1 - implied))
+    return round(100 * (1 - implied) / implied)
+
+
+def make_outcomes(market, event, num_way, rng, margin):
+    """
+    Build the outcomes of one market of one event.
+    """
+    if market == "h2h":
+        weights = [rng.uniform(0.2, 1.0) for _ in range(num_way)]
+        names = [event["home_team"], event["away_team"], "Draw"][:num_way]
+        total = sum(weights)
+        return [{"name": name, "price": american(w / total, margin)} for name, w in zip(names, weights)]
+
+    probability = rng.uniform(0.44, 0.56)
+    if market == "spreads":
+        point = rng.choice([0.5, 1.5, 2.5, 3.5, 6.5, 7.5])
+        return [
+            {"name": event["home_team"], "price": american(probability, margin), "point": -point},
+            {"name": event["away_team"], "price": american(1 - probability, margin), "point": point},
+        ]
+    point = rng.choice([2.5, 5.5, 6.5, 44.5, 47.5, 220.5, 225.5])
+    return [
+        {"name": "Over", "price": american(probability, margin), "point": point},
+        {"name": "Under", "price": american(1 - probability, margin), "point": point},
+    ]
+
+
+def generate_odds(num_events, num_books=8, markets=None, pinnacle=True, seed=0):
+    """
+    Generate a list of events in the shape of an Odds API odds response.
+
+    Args:
+        num_events (int): Number of events.
+        num_books (int): Number of bookmakers quoting each event, besides Pinnacle.
+        markets (list): Markets quoted by every bookmaker. Defaults to h2h, spreads and totals.
+        pinnacle (bool): Whether Pinnacle quotes every event.
+        seed (int): Random seed.
+
+    Returns:
+        list: Events, each with nested bookmakers, markets and outcomes.
+    """
+    rng = random.Random(seed)
+    markets = markets or MARKETS
+    books = BOOKMAKERS[:num_books] + (["pinnacle"] if pinnacle else [])
+    events = []
+    for i in range(num_events):
+        sport_key, sport_title, num_way = SPORTS[i % len(SPORTS)]
+        commence_time = START + timedelta(minutes=30 * (i // 10))
+        event = {
+            "id": f"{rng.getrandbits(128):032x}",
+            "sport_key": sport_key,
+            "sport_title": sport_title,
+            "commence_time": commence_time.isoformat() + "Z",
+            "home_team": f"Home {i}",
+            "away_team": f"Away {i}",
+        }
+        last_update = (commence_time - timedelta(hours=2)).isoformat() + "Z"
+        event["bookmakers"] = [
+            {
+                "key": book,
+                "title": book.replace("_", " ").title(),
+                "last_update": last_update,
+                "markets": [
+                    {
+                        "key": market,
+                        "last_update": last_update,
+                        "outcomes": make_outcomes(market, event, num_way, rng,
+                                                  0.02 if book == "pinnacle" else rng.uniform(0.03, 0.07)),
+                    }
+                    for market in markets
+                ],
+            }
+            for book in books
+        ]
+        events.append(event)
+    return events
+
+
+def count_outcomes(events):
+    """
+    Count the outcome rows an odds payload flattens into.
+    """
+    return sum(
+        len(market["outcomes"])
+        for event in events for bookmaker in event["bookmakers"] for market in bookmaker["markets"]
+    )
+
+
+def generate_odds_rows(num_rows, num_books=8, markets=None, pinnacle=True, seed=0):
+    """
+    Generate a payload that flattens into approximately num_rows outcome rows.
+    """
+    markets = markets or MARKETS
+    sample = generate_odds(len(SPORTS), num_books=num_books, markets=markets, pinnacle=pinnacle, seed=seed)
+    rows_per_event = count_outcomes(sample) / len(sample)
+    return generate_odds(max(1, round(num_rows / rows_per_event)), num_books=num_books, markets=markets,
+                         pinnacle=pinnacle, seed=seed)
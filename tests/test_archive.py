@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from pysportsbet import archive, readers
+
+pytest.importorskip("zstandard")
+
+
+def snapshot(timestamp, ids):
+    data = [{"id": event_id, "commence_time": "2023-09-11T00:00:00Z", "home_team": "A", "away_team": "B",
+             "bookmakers": [{"key": "fanduel", "markets": [{"key": "h2h", "outcomes": [
+                 {"name": "A", "price": -110}, {"name": "B", "price": 100}]}]}]} for event_id in ids]
+    return {"timestamp": timestamp, "previous_timestamp": None, "next_timestamp": None, "data": data}
+
+
+def test_random_access_and_scans():
+    store = archive.Archive("odds.ndjson.zst")
+    assert store.append("baseball_mlb", snapshot("2023-09-10T01:00:00Z", ["e1", "e2"])) == 1
+    assert store.append("baseball_mlb", snapshot("2023-09-10T00:00:00Z", ["e1"]), split_events=True) == 1
+    assert store.append("baseball_mlb", snapshot("2023-09-10T01:00:00Z", ["e1"])) == 0
+    assert store.append("basketball_nba", snapshot("2023-09-10T00:30:00Z", ["n1"])) == 1
+
+    reopened = archive.Archive("odds.ndjson.zst")
+    assert len(reopened) == 3
+    assert reopened.get("baseball_mlb", "2023-09-10T00:00:00Z", "e1")["data"]["id"] == "e1"
+    assert reopened.keys("baseball_mlb", end="2023-09-10T00:59:00Z") == [("baseball_mlb", "2023-09-10T00:00:00Z", "e1")]
+    assert [record["timestamp"] for record in reopened.iter_records()] == [
+        "2023-09-10T01:00:00Z", "2023-09-10T00:00:00Z", "2023-09-10T00:30:00Z"]
+    assert len(list(reopened.iter_events("baseball_mlb"))) == 3
+    # The archive is a plain multi-frame zstd NDJSON file for the streaming readers
+    assert len(list(readers.iter_events("odds.ndjson.zst"))) == 4
+
+
+def test_unindexed_tail_is_truncated():
+    store = archive.Archive("odds.ndjson.zst")
+    store.append("baseball_mlb", snapshot("2023-09-10T00:00:00Z", ["e1"]))
+    size = os.path.getsize("odds.ndjson.zst")
+    with open("odds.ndjson.zst", "ab") as f:
+        f.write(b"partial frame")
+
+    reopened = archive.Archive("odds.ndjson.zst")
+    reopened.append("baseball_mlb", snapshot("2023-09-10T00:05:00Z", ["e1"]))
+    assert reopened.frames[("baseball_mlb", "2023-09-10T00:05:00Z", None)][0] == size
+    assert [record["timestamp"] for record in readers.iter_records("odds.ndjson.zst")] == [
+        "2023-09-10T00:00:00Z", "2023-09-10T00:05:00Z"]
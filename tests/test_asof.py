@@ -0,0 +1,85 @@
+import numpy
+import pandas
+import pytest
+
+from pysportsbet import asof
+
+
+@pytest.fixture
+def quotes():
+    return pandas.DataFrame({
+        "id": ["a", "a", "a", "b"],
+        "book_key": ["fanduel"] * 4,
+        "market": ["h2h"] * 4,
+        "name": ["Home", "Home", "Home", "Home"],
+        "snapshot": ["2023-09-10T00:10:00Z", "2023-09-10T00:00:00Z", "2023-09-10T00:20:00Z", "2023-09-10T00:05:00Z"],
+        "price": [-110, -105, -120, 150],
+        "point": numpy.nan,
+    })
+
+
+def test_point_lookup(quotes):
+    index = asof.AsOfIndex.from_frame(quotes)
+    assert index.lookup(("a", "fanduel", "h2h", "Home"), "2023-09-10T00:15:00Z")["price"] == -110
+    assert index.lookup(("a", "fanduel", "h2h", "Home"), "2023-09-10T00:20:00Z")["price"] == -120
+    assert index.lookup(("a", "fanduel", "h2h", "Home"), "2023-09-09T23:59:59Z") is None
+    assert index.lookup(("c", "fanduel", "h2h", "Home"), "2023-09-10T00:15:00Z") is None
+
+
+def test_batched_lookup_matches_merge_asof(quotes):
+    index = asof.AsOfIndex.from_frame(quotes)
+    queries = pandas.DataFrame({
+        "id": ["b", "a", "a", "c", "a"],
+        "book_key": "fanduel", "market": "h2h", "name": "Home",
+        "time": ["2023-09-10T01:00:00Z", "2023-09-10T00:12:00Z", "2023-09-09T00:00:00Z", "2023-09-10T00:12:00Z",
+                 "2023-09-10T00:00:00Z"],
+    }, index=[10, 11, 12, 13, 14])
+    result = index.lookup_many(queries)
+    assert result["price"].tolist()[:2] == [150, -110] and result["price"].isna().tolist()[2:4] == [True, True]
+    assert result.loc[14, "price"] == -105
+
+    stale = index.lookup_many(queries, tolerance=pandas.Timedelta("30min"))
+    assert stale["price"].isna().tolist() == [True, False, True, True, False]
+
+
+def test_save_and_load(quotes, tmp_path):
+    index = asof.AsOfIndex.from_frame(quotes)
+    index.save(tmp_path / "index.npz")
+    loaded = asof.AsOfIndex.load(tmp_path / "index.npz")
+    assert len(loaded) == len(index)
+    assert loaded.lookup(("b", "fanduel", "h2h", "Home"), "2023-09-10T02:00:00Z")["price"] == 150
+
+
+def test_batched_lookup_keeps_sub_second_order(quotes):
+    quotes.loc[len(quotes)] = ["a", "fanduel", "h2h", "Home", "2023-09-10T00:10:00.700Z", -130, numpy.nan]
+    index = asof.AsOfIndex.from_frame(quotes)
+    times = ["2023-09-10T00:10:00.200Z", "2023-09-10T00:10:00.700Z", "2023-09-10T00:10:00.999Z"]
+    queries = pandas.DataFrame({"id": "a", "book_key": "fanduel", "market": "h2h", "name": "Home", "time": times})
+    result = index.lookup_many(queries)
+    assert result["price"].tolist() == [-110, -130, -130]
+    for row, when in zip(result.itertuples(), times):
+        expected = index.lookup(("a", "fanduel", "h2h", "Home"), when)
+        assert row.price == expected["price"] and row.as_of == expected["as_of"]
+        assert row.as_of <= pandas.Timestamp(when).tz_localize(None)
+
+
+def test_alternate_lines_are_keyed_by_point():
+    quotes = pandas.DataFrame({
+        "id": "a", "book_key": "fanduel",
+        "market": ["spreads", "spreads", "alternate_spreads", "alternate_spreads", "player_points", "player_points"],
+        "name": ["Home", "Home", "Home", "Home", "Over", "Over"],
+        "description": [None, None, None, None, "Player A", "Player B"],
+        "snapshot": ["2023-09-10T00:00:00Z", "2023-09-10T00:10:00Z"] + ["2023-09-10T00:00:00Z"] * 4,
+        "price": [-110, -115, 150, -200, -120, 105],
+        "point": [-3.5, -4.0, -7.5, 1.5, 20.5, 9.5],
+    })
+    index = asof.AsOfIndex.from_frame(quotes)
+    # A moved spread still matches its previous price; alternate lines and players do not mix
+    assert index.lookup(("a", "fanduel", "spreads", "Home", None, -4), "2023-09-10T00:05:00Z")["price"] == -110
+    alternate = ("a", "fanduel", "alternate_spreads", "Home", None)
+    assert index.lookup(alternate + (1.5,), "2023-09-10T01:00:00Z")["price"] == -200
+    assert index.lookup(alternate + (2.5,), "2023-09-10T01:00:00Z") is None
+    assert index.lookup(("a", "fanduel", "player_points", "Over", "Player B"), "2023-09-10T01:00:00Z")["price"] == 105
+
+    queries = quotes.drop(columns=["snapshot", "price"]).assign(time="2023-09-10T01:00:00Z")
+    assert index.lookup_many(queries)["price"].tolist() == [-115, -115, 150, -200, -120, 105]
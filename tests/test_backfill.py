@@ -0,0 +1,64 @@
+from pysportsbet import backfill, readers
+
+
+def test_plan_timestamps():
+    timestamps = backfill.plan_timestamps("2023-09-10T00:00:00Z", "2023-09-10T03:00:00Z", 60)
+    assert timestamps == ["2023-09-10T03:00:00Z", "2023-09-10T02:00:00Z", "2023-09-10T01:00:00Z"]
+
+
+def test_odds_params_and_cost():
+    assert backfill.odds_params("us", "", "h2h", "decimal", "t")["regions"] == "us"
+    assert "regions" not in backfill.odds_params("us", "pinnacle", "h2h", "decimal", "t")
+    assert backfill.odds_cost("us,eu", "", "h2h,totals") == 40
+
+
+def test_backfill_resumes_from_checkpoint(fake_api):
+    args = ("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z", "2023-09-10T06:02:00Z", 60)
+    stats = backfill.backfill_odds(*args, backfill.Checkpoint("odds.ndjson"), workers=3)
+    # One events request probes the snapshot grid, then one odds request per hour aligned to it
+    assert stats["fetched"] == 6 and len(fake_api) == 7
+    assert "odds|baseball_mlb|regions=us;markets=h2h|2023-09-10T06:00:00Z" in fake_api
+
+    stats = backfill.backfill_odds(*args, backfill.Checkpoint("odds.ndjson"), workers=3)
+    assert stats == {"fetched": 0, "skipped": 0, "failed": 0, "exhausted": False}
+    assert len(fake_api) == 7
+    assert len(list(readers.iter_events("odds.ndjson"))) == 12
+
+
+def test_backfill_refetches_other_markets(fake_api):
+    args = ("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z", "2023-09-10T03:00:00Z", 60)
+    backfill.backfill_odds(*args, backfill.Checkpoint("odds.ndjson"))
+    args = args[:4] + ("totals,h2h",) + args[5:]
+    stats = backfill.backfill_odds(*args, backfill.Checkpoint("odds.ndjson"))
+    assert stats["fetched"] == 3
+    assert "odds|baseball_mlb|regions=us;markets=h2h,totals|2023-09-10T03:00:00Z" in fake_api
+    assert backfill.request_scope("us", "pinnacle,betfair", "h2h") == "bookmakers=betfair,pinnacle;markets=h2h"
+
+
+def test_quota_floor_stops_backfill(fake_api):
+    limiter = backfill.QuotaLimiter(1000, min_remaining=975)
+    stats = backfill.backfill_odds("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z",
+                                   "2023-09-10T12:00:00Z", 60, backfill.Checkpoint("odds.ndjson"), limiter=limiter,
+                                   workers=1)
+    assert stats["exhausted"]
+    assert limiter.requests_remaining >= 975
+    assert stats["fetched"] < 12
+
+
+def test_event_odds_fetch_each_snapshot_once(fake_api):
+    # A 2 minute interval on a 5 minute grid resolves to every snapshot exactly once
+    stats = backfill.backfill_event_odds("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z",
+                                         "2023-09-10T00:20:00Z", 2, backfill.Checkpoint("odds.ndjson"), workers=2)
+    events = [key for key in fake_api if key.startswith("events|")]
+    assert sorted(events) == [f"events|baseball_mlb|2023-09-10T00:{m:02d}:00Z" for m in (5, 10, 15, 20)]
+    assert stats["fetched"] == 8
+
+
+def test_checkpoint_iter_sorted():
+    checkpoint = backfill.Checkpoint("odds.ndjson")
+    for key in ["odds|nfl|2", "events|nfl|1", "odds|nfl|3", "odds|nfl|1"]:
+        checkpoint.record(key, {"data": key})
+    with open("odds.ndjson", "a") as f:
+        f.write('{"key":"odds|nfl|4","da')
+    records = checkpoint.iter_sorted(prefix="odds|nfl|", reverse=True)
+    assert [record["data"] for record in records] == ["odds|nfl|3", "odds|nfl|2", "odds|nfl|1"]
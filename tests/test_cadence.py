@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from tests.conftest import FakeResponse
+from pysportsbet import backfill, cadence, timestamps
+
+NOW = datetime(2023, 9, 10, 18, 0, 0)
+
+
+def event(event_id, hours):
+    return {"id": event_id, "commence_time": timestamps.format_timestamp(NOW + timedelta(hours=hours)),
+            "home_team": "A", "away_team": "B", "bookmakers": []}
+
+
+def test_tiers_and_budget():
+    policy = cadence.CadencePolicy(cost=2)
+    policy.observe_odds([event("live", -1), event("soon", 0.5), event("over", -8)])
+    assert policy.live(NOW) == ["live"]
+    assert policy.params("live", NOW) == {"eventIds": "live"}
+    assert policy.params("today", NOW) == {"commenceTimeFrom": "2023-09-10T19:00:00Z",
+                                           "commenceTimeTo": "2023-09-11T18:00:00Z"}
+    intervals = policy.intervals(NOW)
+    assert intervals["live"] == 20 and intervals["scores"] == 20
+
+    policy.observe_scores([{"id": "live", "completed": True}])
+    assert "live" not in policy.intervals(NOW)
+
+    budget = cadence.CadencePolicy(cost=2, credits_per_hour=100)
+    fitted = budget.intervals(NOW)
+    assert abs(budget.hourly_cost(fitted) - 100) < 1e-6
+    assert fitted["next_hour"] < fitted["today"] < fitted["later"]
+
+
+def test_poller_requests_due_tiers_only(monkeypatch):
+    calls = []
+    board = [event("live", -1), event("soon", 0.5), event("friday", 100)]
+
+    def fetch(api_key, request, retries=3, backoff=2.0):
+        calls.append((request.key, request.params))
+        if request.key == "scores":
+            return FakeResponse([{"id": "live", "completed": False}], remaining=500)
+        if "eventIds" in request.params:
+            return FakeResponse([e for e in board if e["id"] in request.params["eventIds"].split(",")], remaining=500)
+        start, end = request.params["commenceTimeFrom"], request.params.get("commenceTimeTo", "~")
+        return FakeResponse([e for e in board if start <= e["commence_time"] < end], remaining=500)
+
+    monkeypatch.setattr(backfill, "fetch", fetch)
+    poller = cadence.AdaptivePoller("key", "baseball_mlb", "us", "", "h2h", "american",
+                                    limiter=backfill.QuotaLimiter(1000))
+    assert poller.poll(NOW) == ["next_hour", "today", "this_week", "later"]
+    # The nearest window reaches back over games in play, so a cold start finds them
+    assert sorted(poller.events) == ["friday", "live", "soon"]
+    assert calls[0][1]["regions"] == "us" and calls[0][1]["commenceTimeFrom"] == "2023-09-10T12:00:00Z"
+    assert "commenceTimeTo" not in calls[-1][1]
+
+    # The game in progress is now known, so the live tier starts; nothing else is due yet
+    assert poller.poll(NOW + timedelta(seconds=30)) == ["live", "scores"]
+    assert calls[-2][1]["eventIds"] == "live" and calls[-1][1]["daysFrom"] == 1
+    assert poller.poll(NOW + timedelta(seconds=60)) == ["live", "next_hour", "scores"]
+
+    # An event no longer offered in its window is dropped
+    board.remove(board[1])
+    poller.poll(NOW + timedelta(seconds=120))
+    assert "soon" not in poller.events
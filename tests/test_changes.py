@@ -0,0 +1,46 @@
+import copy
+
+from pysportsbet import changes
+
+
+def board():
+    return [{"id": "e1", "sport_key": "basketball_nba", "commence_time": "2023-09-10T00:00:00Z", "bookmakers": [
+        {"key": "fanduel", "last_update": "t0", "markets": [
+            {"key": "h2h", "last_update": "t0", "outcomes": [
+                {"name": "A", "price": -110}, {"name": "B", "price": 100}]},
+            {"key": "spreads", "last_update": "t0", "outcomes": [
+                {"name": "A", "price": -110, "point": -3.5}, {"name": "B", "price": -110, "point": 3.5}]},
+        ]}]}]
+
+
+def test_changes_between_polls():
+    detector = changes.ChangeDetector()
+    first = detector.update(board(), timestamp="2023-09-10T00:00:00Z")
+    assert [change["type"] for change in first] == ["new"] * 4
+    assert len(detector) == 4
+    assert detector.update(board()) == []
+
+    moved = board()
+    h2h, spreads = moved[0]["bookmakers"][0]["markets"]
+    h2h.update(last_update="t1", outcomes=[{"name": "A", "price": -120}, {"name": "B", "price": 100}])
+    spreads.update(last_update="t1", outcomes=[{"name": "A", "price": -110, "point": -4.5}])
+    feed = detector.update(moved, timestamp="2023-09-10T00:01:00Z")
+    assert [(change["type"], change["market"], change["name"]) for change in feed] == [
+        ("price", "h2h", "A"), ("point", "spreads", "A"), ("removed", "spreads", "B")]
+    assert feed[0]["previous_price"] == -110 and feed[0]["price"] == -120
+    assert feed[1]["previous_point"] == -3.5 and feed[1]["point"] == -4.5
+
+    # An unchanged last_update is trusted without comparing outcomes
+    stale = copy.deepcopy(moved)
+    stale[0]["bookmakers"][0]["markets"][0]["outcomes"][0]["price"] = 500
+    assert detector.update(stale) == []
+
+
+def test_scope_limits_removals():
+    detector = changes.ChangeDetector()
+    detector.update(board())
+    assert detector.update([], scope=["other"]) == []
+    removed = detector.update([], scope=["e1"])
+    assert [change["type"] for change in removed] == ["removed"] * 4 and detector.state == {}
+    changes.write_changes(removed, "changes.ndjson")
+    assert len(open("changes.ndjson").readlines()) == 4
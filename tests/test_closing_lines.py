@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from pysportsbet import backfill, closing_lines
+
+pytest.importorskip("pyarrow")
+
+ARGS = ("key", "icehockey_nhl", "us", "", "h2h", "american", "2030-01-01T00:00:00Z", "2030-01-01T01:00:00Z", 30)
+
+
+def test_group_by_commence():
+    groups = closing_lines.group_by_commence({"a": "t1", "b": "t2", "c": "t1"})
+    assert groups == {"t1": ["a", "c"], "t2": ["b"]}
+
+
+def test_any_market_collects_each_event_once(fake_api):
+    stats = closing_lines.collect(*ARGS, backfill.Checkpoint("closing.ndjson"), output_dir="closing")
+    event_odds = [key for key in fake_api if key.startswith("closing-event-odds|")]
+    # Three listings of two events each, all commencing at midnight
+    assert stats["fetched"] == len(event_odds) == 6
+    assert all(key.split("|")[3] == "2030-01-01T00:00:00Z" for key in event_odds)
+    assert os.listdir("closing") == ["part-00000.parquet"]
+
+    stats = closing_lines.collect(*ARGS, backfill.Checkpoint("closing.ndjson"), output_dir="closing")
+    assert stats["fetched"] == 0 and len(fake_api) == 9
+    assert os.listdir("closing") == ["part-00000.parquet"]
+
+
+def test_featured_markets_fetch_per_commence_time(fake_api):
+    stats = closing_lines.collect(*ARGS, backfill.Checkpoint("closing.ndjson"), featured=True)
+    assert stats["fetched"] == 1
+    assert len([key for key in fake_api if key.startswith("closing-odds|")][0].split("|")[4].split(",")) == 6
+
+
+def test_changed_markets_are_collected_again(fake_api):
+    checkpoint = backfill.Checkpoint("closing.ndjson")
+    closing_lines.collect(*ARGS, checkpoint, featured=True)
+    args = ARGS[:4] + ("h2h,totals",) + ARGS[5:]
+    stats = closing_lines.collect(*args, checkpoint, featured=True, output_dir="closing")
+    assert stats["fetched"] == 1
+    assert os.listdir("closing") == ["part-00000.parquet"]
+    # Event odds of the same events are a different request, whatever the featured run collected
+    assert closing_lines.collect(*args, checkpoint)["fetched"] == 6
+
+
+def test_featured_plan_only_requests_uncovered_events():
+    groups = {"t1": ["a", "b", "c"], "t2": ["d"]}
+    prefix = "closing-odds|icehockey_nhl|regions=us;markets=h2h|"
+    done = {prefix + "t1|a,b", "closing-odds|baseball_mlb|regions=us;markets=h2h|t2|d",
+            "closing-odds|icehockey_nhl|regions=us;markets=totals|t2|d"}
+    planned = closing_lines.plan_featured("icehockey_nhl", "us", "", "h2h", "american", groups, done=done)
+    assert [request.key for request in planned] == [prefix + "t1|c", prefix + "t2|d"]
+    assert planned[0].params["eventIds"] == "c" and planned[0].params["date"] == "t1"
+    done.update(request.key for request in planned)
+    assert closing_lines.plan_featured("icehockey_nhl", "us", "", "h2h", "american", groups, done=done) == []
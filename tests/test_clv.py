@@ -0,0 +1,80 @@
+import numpy
+import pandas
+import pytest
+
+from pysportsbet import clv
+
+
+@pytest.fixture
+def closing():
+    # Two books close a two-way market; fanduel moved from -105 to -110 between snapshots
+    rows = []
+    for snapshot, fanduel_home in [("2030-01-01T18:55:00", -105), ("2030-01-01T19:00:00", -110)]:
+        for book, home, away in [("fanduel", fanduel_home, -110), ("pinnacle", -120, 100)]:
+            for name, price in [("Home", home), ("Away", away)]:
+                rows.append({"snapshot": pandas.Timestamp(snapshot), "id": "a", "sport_key": "nba",
+                             "sport_title": "NBA", "commence_time": pandas.Timestamp("2030-01-01T19:00:00"), "home_team": "Home",
+                             "away_team": "Away", "book_key": book, "market": "h2h", "name": name,
+                             "point": numpy.nan, "price": price})
+    return pandas.DataFrame(rows)
+
+
+@pytest.fixture
+def bets():
+    return pandas.DataFrame({
+        "id": ["a", "a", "a", "b"],
+        "book_key": ["fanduel", "fanduel", "fanduel", "fanduel"],
+        "market": ["h2h"] * 4,
+        "name": ["Home", "Away", "Home", "Home"],
+        "point": numpy.nan,
+        "price": [100, -120, 100, 100],
+        "placed_at": ["2030-01-01T12:00:00Z", "2030-01-01T12:00:00Z", "2030-01-01T20:00:00Z", "2030-01-01T12:00:00Z"],
+    })
+
+
+def test_grade_against_own_book_close(bets, closing):
+    graded = clv.grade_bets(bets, closing)
+    assert graded["close_line"].tolist()[:2] == [-110, -110]
+    # Fair close of a -110/-110 market is 50%, so +100 has zero CLV and -120 is negative
+    numpy.testing.assert_allclose(graded.loc[0, "clv_pct"], 0, atol=1e-9)
+    assert graded.loc[1, "clv_pct"] < 0
+    assert graded.loc[0, "beat_close"] == True  # noqa: E712
+    # Placed after the start, or no closing line
+    assert graded["clv_pct"].isna().tolist() == [False, False, True, True]
+
+
+def test_grade_against_pinnacle_and_summary(bets, closing):
+    graded = clv.grade_bets(bets, closing, close_book="pinnacle")
+    fair_home = (120 / 220) / (120 / 220 + 0.5)
+    numpy.testing.assert_allclose(graded.loc[0, "close_fair_win_dec"], fair_home)
+    numpy.testing.assert_allclose(graded.loc[0, "clv_pct"], (2 * fair_home - 1) * 100)
+
+    summary = clv.summarize(graded)
+    assert summary.loc[0, "bets"] == 4 and summary.loc[0, "graded"] == 2
+    assert summary.loc[0, "beat_close_rate"] == 0.5
+
+
+def test_missing_columns_raise(bets, closing):
+    with pytest.raises(ValueError):
+        clv.grade_bets(bets.drop(columns="placed_at"), closing)
+
+
+def test_player_props_are_graded_per_player():
+    # Two players on the same Over/Under 0.5 line close at very different prices
+    rows = []
+    for player, over, under in [("Player A", -300, 240), ("Player B", 200, -250)]:
+        for name, price in [("Over", over), ("Under", under)]:
+            rows.append({"snapshot": pandas.Timestamp("2030-01-01T19:00:00"), "id": "a", "sport_key": "nba",
+                         "sport_title": "NBA", "commence_time": pandas.Timestamp("2030-01-01T19:00:00"),
+                         "home_team": "Home", "away_team": "Away", "book_key": "fanduel", "market": "player_threes",
+                         "name": name, "description": player, "point": 0.5, "price": price})
+    bets = pandas.DataFrame({
+        "id": ["a", "a"], "book_key": ["fanduel", "fanduel"], "market": ["player_threes"] * 2, "name": ["Over"] * 2,
+        "description": ["Player A", "Player B"], "point": [0.5, 0.5], "price": [-200, 250],
+        "placed_at": ["2030-01-01T12:00:00Z"] * 2,
+    })
+    graded = clv.grade_bets(bets, pandas.DataFrame(rows))
+    assert graded["close_line"].tolist() == [-300, 200]
+    fair_a = (300 / 400) / (300 / 400 + 100 / 340)
+    numpy.testing.assert_allclose(graded.loc[0, "close_fair_win_dec"], fair_a)
+    assert graded["clv_pct"].notna().all()
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from pysportsbet import backfill, collection
+
+
+def test_shards_are_claimed_once_until_lease_expires():
+    queue = collection.WorkQueue("queue.db")
+    assert queue.add_shards("baseball_mlb", "2023-09-10T00:00:00Z", "2023-09-12T12:00:00Z") == 3
+    assert queue.add_shards("baseball_mlb", "2023-09-10T00:00:00Z", "2023-09-12T12:00:00Z") == 0
+
+    first = queue.claim("a")
+    assert first["to_date"] == "2023-09-12T12:00:00Z"
+    second = queue.claim("b", lease_secs=-1)
+    assert second["id"] != first["id"]
+    # The shard whose lease expired is claimed again, after the shards never claimed
+    third = queue.claim("c")
+    assert third["id"] not in (first["id"], second["id"])
+    assert queue.claim("d")["id"] == second["id"]
+    queue.finish(first["id"])
+    assert queue.counts() == {"done": 1, "running": 2}
+
+
+def test_failing_shards_back_off_and_give_up():
+    queue = collection.WorkQueue("queue.db")
+    queue.add_shards("baseball_mlb", "2023-09-10T00:00:00Z", "2023-09-12T00:00:00Z")
+    first = queue.claim("a")
+    assert queue.retry(first["id"]) == "pending"
+    # The failed shard waits for its retry while the other shard is processed
+    second = queue.claim("a")
+    assert second["id"] != first["id"] and queue.claim("a") is None
+    queue.finish(second["id"])
+
+    attempts = 1
+    while queue.retry(first["id"], retry_secs=0) == "pending":
+        assert queue.claim("a")["id"] == first["id"]
+        attempts += 1
+    assert attempts == collection.MAX_ATTEMPTS and queue.claim("a") is None
+    assert queue.counts() == {"done": 1, "failed": 1}
+
+
+def test_running_shards_keep_their_lease():
+    queue = collection.WorkQueue("queue.db")
+    queue.add_shards("baseball_mlb", "2023-09-10T00:00:00Z", "2023-09-11T00:00:00Z")
+    shard = queue.claim("a", lease_secs=-1)
+    assert queue.renew(shard["id"], "a", lease_secs=60)
+    assert not queue.renew(shard["id"], "b")
+    assert queue.claim("b") is None
+
+    # A shard running past its lease stays with its worker while the lease is renewed
+    queue.renew(shard["id"], "a", lease_secs=-1)
+    with collection.LeaseRenewer("queue.db", shard["id"], "a", lease_secs=0.3):
+        time.sleep(0.5)
+        assert queue.claim("b") is None
+    time.sleep(0.4)
+    assert queue.claim("b")["id"] == shard["id"]
+
+
+def test_budget_is_shared_across_limiters():
+    queue = collection.WorkQueue("queue.db")
+    queue.set_budget(25)
+    limiters = [collection.SharedQuotaLimiter(collection.WorkQueue("queue.db"), 1000) for _ in range(2)]
+    limiters[0].acquire(10)
+    limiters[1].acquire(10)
+    with pytest.raises(backfill.QuotaExhausted):
+        limiters[0].acquire(10)
+
+
+def test_workers_fill_one_store(fake_api):
+    pytest.importorskip("pyarrow")
+    queue = collection.WorkQueue("queue.db")
+    queue.add_shards("baseball_mlb", "2023-09-10T00:00:00Z", "2023-09-10T06:00:00Z", shard_hours=2)
+    args = ("queue.db", "key", "us", "", "h2h", "american", 60, "store", "checkpoints")
+    assert collection.work(*args, workers=2, worker="a") == 3
+    assert collection.work(*args, workers=2, worker="b") == 0
+    assert queue.counts() == {"done": 3}
+    assert sorted(name for name in os.listdir("store") if name.startswith("manifest")) == ["manifest-a.ndjson"]
+
+    frame = collection.store.HistoricalStore("store").query("baseball_mlb")
+    assert sorted(frame["snapshot"].dt.hour.unique()) == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+from pysportsbet import delta
+from tests.payloads import generate_odds
+
+
+def normalized(response):
+    events = sorted(response["data"], key=lambda event: event["id"])
+    return [dict(event, bookmakers=sorted(event["bookmakers"], key=lambda book: book["key"])) for event in events]
+
+
+@pytest.fixture
+def snapshots():
+    events = generate_odds(4, num_books=2)
+    second = copy.deepcopy(events)
+    market = second[0]["bookmakers"][0]["markets"][1]
+    market["last_update"] = "2030-01-01T00:05:00Z"
+    market["outcomes"][0]["price"] += 10
+    market["outcomes"][0]["point"] += 1
+    del second[1]["bookmakers"][1]["markets"][2]
+    third = copy.deepcopy(second[1:])
+    return [
+        {"timestamp": "2030-01-01T00:00:00Z", "data": events},
+        {"timestamp": "2030-01-01T00:05:00Z", "data": second},
+        {"timestamp": "2030-01-01T00:10:00Z", "data": third},
+    ]
+
+
+def test_round_trip_stores_only_changes(snapshots):
+    stats = delta.write_deltas(snapshots, "odds.ndjson.gz")
+    assert stats["markets"] == 4 * 3 * 3 + 1
+    assert stats["full_markets"] == 36 + 35 + 26
+
+    rebuilt = list(delta.iter_snapshots("odds.ndjson.gz"))
+    assert [normalized(response) for response in rebuilt] == [normalized(response) for response in snapshots]
+    assert normalized(delta.reconstruct("odds.ndjson.gz", "2030-01-01T00:07:00Z")) == normalized(snapshots[1])
+    assert delta.reconstruct("odds.ndjson.gz", "2029-12-31T00:00:00Z") is None
+
+
+def test_price_change_log(snapshots):
+    delta.write_deltas(snapshots, "odds.ndjson")
+    changes = delta.price_changes("odds.ndjson")
+    moved = changes[changes["previous_price"].notna()]
+    assert len(moved) == 1
+    row = moved.iloc[0]
+    assert row["price"] == row["previous_price"] + 10 and row["point"] == row["previous_point"] + 1
+
+
+def test_outcome_keys_add_point_only_for_alternate_lines():
+    assert delta.outcome_keys([{"name": "Over", "point": 1.5}, {"name": "Under", "point": 1.5}]) == [
+        ("Over", None), ("Under", None)]
+    assert delta.outcome_keys([{"name": "Over", "point": 1.5}, {"name": "Over", "point": 2.5}]) == [
+        ("Over", None, 1.5), ("Over", None, 2.5)]
+
+
+def test_reconstruct_seeks_to_the_nearest_segment(snapshots):
+    for path in ("odds.ndjson", "odds.ndjson.gz"):
+        delta.write_deltas(snapshots, path, keyframe_snapshots=2)
+        assert [normalized(response) for response in delta.iter_snapshots(path)] == [
+            normalized(response) for response in snapshots]
+        assert normalized(delta.reconstruct(path, "2030-01-01T00:12:00Z")) == normalized(snapshots[2])
+
+    # Blanking the first segment leaves later snapshots reconstructable from their own segment
+    second = delta.segment_offset("odds.ndjson", "2030-01-01T00:10:00Z")
+    assert second > 0 and delta.segment_offset("odds.ndjson", "2029-12-31T00:00:00Z") is None
+    with open("odds.ndjson", "r+b") as f:
+        f.write(b" " * second)
+    assert normalized(delta.reconstruct("odds.ndjson", "2030-01-01T00:10:00Z")) == normalized(snapshots[2])
+    assert delta.reconstruct("odds.ndjson", "2030-01-01T00:05:00Z") is None
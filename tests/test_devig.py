@@ -0,0 +1,64 @@
+import numpy
+import pandas
+import pytest
+
+from pysportsbet import devig
+
+
+@pytest.fixture
+def markets():
+    # A two-way market, a three-way market and a single-outcome market
+    return pandas.DataFrame({
+        "id": ["a", "a", "b", "b", "b", "c"],
+        "book_key": ["book"] * 6,
+        "market": ["h2h", "h2h", "h2h", "h2h", "h2h", "outrights"],
+        "vig_win_dec": [0.55, 0.5, 0.5, 0.3, 0.25, 0.8],
+    })
+
+
+def test_devig_methods_sum_to_one(markets):
+    fair = devig.devig(markets, methods=["multiplicative", "additive", "power", "shin"])
+    sums = fair.groupby(markets["id"]).sum()
+    numpy.testing.assert_allclose(sums.loc[["a", "b"]].to_numpy(), 1.0)
+    assert list(fair.columns) == [f"fair_win_dec_{m}" for m in ["multiplicative", "additive", "power", "shin"]]
+
+
+def test_shin_matches_additive_for_two_way_markets(markets):
+    fair = devig.devig(markets, methods=["additive", "shin"])
+    two_way = markets["id"] == "a"
+    numpy.testing.assert_allclose(fair.loc[two_way, "fair_win_dec_shin"], fair.loc[two_way, "fair_win_dec_additive"])
+
+
+def test_power_and_shin_shift_vig_onto_longshots(markets):
+    fair = devig.devig(markets)
+    favourite, longshot = 2, 4
+    for method in ["power", "shin"]:
+        column = f"fair_win_dec_{method}"
+        assert fair.loc[favourite, column] > fair.loc[favourite, "fair_win_dec_multiplicative"]
+        assert fair.loc[longshot, column] < fair.loc[longshot, "fair_win_dec_multiplicative"]
+
+
+def test_worst_case_is_lowest_probability(markets):
+    fair = devig.devig(markets)
+    others = fair.drop(columns="fair_win_dec_worst_case")
+    numpy.testing.assert_allclose(fair["fair_win_dec_worst_case"], others.min(axis=1))
+
+
+def test_worst_case_ignores_negative_longshot_probabilities():
+    longshot = pandas.DataFrame({"id": ["a"] * 3, "book_key": ["book"] * 3, "market": ["h2h"] * 3,
+                                 "vig_win_dec": [0.9, 0.2, 0.02]})
+    fair = devig.devig(longshot)
+    assert fair.loc[2, "fair_win_dec_additive"] < 0
+    assert 0 < fair.loc[2, "fair_win_dec_worst_case"] < 0.02
+    others = fair.drop(columns=["fair_win_dec_worst_case", "fair_win_dec_additive"])
+    numpy.testing.assert_allclose(fair.loc[2, "fair_win_dec_worst_case"], others.loc[2].min())
+
+
+def test_single_outcome_markets_fall_back_to_multiplicative(markets):
+    fair = devig.devig(markets)
+    assert fair.loc[5].drop("fair_win_dec_additive").eq(1.0).all()
+
+
+def test_invalid_method_raises(markets):
+    with pytest.raises(ValueError):
+        devig.devig(markets, methods=["bogus"])
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from pysportsbet import backfill, event_catalog
+
+
+def listing(timestamp, *events):
+    return {"timestamp": timestamp, "data": [{"id": event_id, "commence_time": commence} for event_id, commence in events]}
+
+
+def test_latest_listing_keeps_postponed_commence_time():
+    catalog = event_catalog.EventCatalog()
+    catalog.merge("mlb", listing("2024-04-03T12:00:00Z", ("a", "2024-04-03T18:00:00Z"), ("b", "2024-04-03T20:00:00Z")))
+    catalog.merge("mlb", listing("2024-04-04T00:00:00Z", ("a", "2024-04-04T18:00:00Z")))
+    # An older listing merged later must not undo the postponement
+    catalog.merge("mlb", listing("2024-04-03T00:00:00Z", ("a", "2024-04-03T18:00:00Z"), ("c", "2024-04-03T17:00:00Z")))
+
+    day = catalog.between("mlb", "2024-04-03T00:00:00Z", "2024-04-03T23:59:59Z")
+    assert [event["id"] for event in day] == ["c", "b"]
+    assert [event["id"] for event in catalog.between("mlb", "2024-04-04T18:00:00Z", "2024-04-04T18:00:00Z")] == ["a"]
+    assert catalog.between("nhl", "2024-04-03T00:00:00Z", "2024-04-05T00:00:00Z") == []
+
+
+def test_sweep_lists_each_day_once(fake_api):
+    catalog = event_catalog.EventCatalog("catalog.json")
+    assert catalog.sweep("key", "mlb", "2030-01-01T06:00:00Z", "2030-01-02T06:00:00Z",
+                         backfill.Checkpoint("events.ndjson"), now=datetime(2030, 1, 5)) == 2
+    assert len(fake_api) == 2
+
+    reopened = event_catalog.EventCatalog("catalog.json")
+    assert reopened.sweep("key", "mlb", "2030-01-01T00:00:00Z", "2030-01-03T00:00:00Z",
+                          backfill.Checkpoint("events.ndjson"), now=datetime(2030, 1, 5)) == 1
+    assert fake_api[-1] == "events|mlb|2030-01-03T00:00:00Z"
+    assert len(reopened.between("mlb", "2030-01-01T00:00:00Z", "2030-01-01T23:59:59Z")) == 6
+
+
+def test_sweep_clips_listings_and_keeps_today_open(fake_api):
+    catalog = event_catalog.EventCatalog()
+    checkpoint = backfill.Checkpoint("events.ndjson")
+    assert catalog.sweep("key", "mlb", "2030-01-01T06:10:00Z", "2030-01-01T13:00:00Z", checkpoint, interval_mins=360,
+                         now=datetime(2030, 1, 1, 14)) == 0
+    assert sorted(fake_api) == ["events|mlb|2030-01-01T06:00:00Z", "events|mlb|2030-01-01T12:00:00Z"]
+    assert not catalog.swept("mlb", "2030-01-01")
+
+    # Once the day is over, a sweep of it lists the rest of the day and marks it swept
+    assert catalog.sweep("key", "mlb", "2030-01-01T00:00:00Z", "2030-01-01T23:59:59Z", checkpoint, interval_mins=360,
+                         now=datetime(2030, 1, 2, 1)) == 1
+    assert sorted(fake_api[2:]) == ["events|mlb|2030-01-01T00:00:00Z", "events|mlb|2030-01-01T18:00:00Z"]
+    assert catalog.swept("mlb", "2030-01-01")
@@ -0,0 +1,43 @@
+import openpyxl
+
+from pysportsbet import excel
+
+HEADER = ["id", "commence_time", "bookmaker", "last_update", "market", "home_team", "home_odd"]
+META = [["Requests Used", 1], ["Requests Remaining", 99]]
+
+
+def rows(*odds):
+    return [HEADER] + [[event_id, "t", book, "u", "h2h", "A", price] for event_id, book, price in odds]
+
+
+def values(ws):
+    return [[cell.value for cell in row] for row in ws.iter_rows()]
+
+
+def test_live_sheet_writes_only_changed_cells():
+    wb = openpyxl.Workbook()
+    sheet = excel.LiveSheet(wb.active, excel.ODDS_KEY_COLUMNS)
+    assert sheet.update(META, rows(("e1", "fanduel", -110), ("e1", "draftkings", -115))) == 4 + 7 + 14
+    assert values(wb.active)[4] == ["e1", "t", "fanduel", "u", "h2h", "A", -110]
+
+    # One price moved and one meta value changed
+    moved = rows(("e1", "fanduel", -120), ("e1", "draftkings", -115))
+    assert sheet.update([META[0], ["Requests Remaining", 98]], moved) == 2
+    assert values(wb.active)[4][-1] == -120
+
+    # A removed row is blanked and reused by the next new key
+    assert sheet.update(META, rows(("e1", "draftkings", -115))) == 1 + 7
+    assert values(wb.active)[4] == [None] * 7
+    sheet.update(META, rows(("e1", "draftkings", -115), ("e2", "fanduel", 100)))
+    assert values(wb.active)[4][0] == "e2"
+
+
+def test_throttled_saver_is_atomic():
+    wb = openpyxl.Workbook()
+    saver = excel.ThrottledSaver(wb, "live.xlsx", min_interval=60)
+    assert saver.request()
+    wb.active["A1"] = "changed"
+    assert not saver.request()
+    assert openpyxl.load_workbook("live.xlsx").active["A1"].value is None
+    assert saver.flush() and not saver.flush()
+    assert openpyxl.load_workbook("live.xlsx").active["A1"].value == "changed"
@@ -0,0 +1,48 @@
+import json
+import urllib.request
+
+from pysportsbet import hub
+
+
+def event(sport_key="basketball_nba"):
+    return {"id": "e1", "sport_key": sport_key, "bookmakers": [
+        {"key": "fanduel", "markets": [{"key": "h2h", "outcomes": []}, {"key": "totals", "outcomes": []}]},
+        {"key": "draftkings", "markets": [{"key": "h2h", "outcomes": []}]}]}
+
+
+def test_filters_trim_odds_and_select_changes():
+    odds_hub = hub.Hub()
+    everything = odds_hub.subscribe()
+    totals = odds_hub.subscribe(channels="odds", books="fanduel", markets=["totals"])
+    nfl = odds_hub.subscribe(sports=["americanfootball_nfl"])
+    odds_hub.publish_odds([event()])
+    odds_hub.publish_changes([{"type": "price", "sport_key": "basketball_nba", "book": "fanduel", "market": "h2h"}])
+
+    assert [message["channel"] for message in everything.drain()] == ["odds", "changes"]
+    [message] = totals.drain()
+    assert [(book["key"], [m["key"] for m in book["markets"]]) for book in message["data"]["bookmakers"]] == [
+        ("fanduel", ["totals"])]
+    assert nfl.drain() == []
+
+
+def test_backpressure_policies():
+    odds_hub = hub.Hub()
+    latest = odds_hub.subscribe(channels="scores", maxsize=2)
+    first = odds_hub.subscribe(channels="scores", maxsize=2, policy=hub.DROP_NEWEST)
+    odds_hub.publish_scores([{"id": str(n), "sport_key": "basketball_nba"} for n in range(5)])
+    assert [message["id"] for message in latest.drain()] == ["3", "4"] and latest.dropped == 3
+    assert [message["id"] for message in first.drain()] == ["0", "1"] and first.dropped == 3
+
+
+def test_server_sent_events():
+    odds_hub = hub.Hub()
+    server = hub.serve(odds_hub, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/events?channel=odds&book=draftkings"
+        with urllib.request.urlopen(url, timeout=5) as stream:
+            odds_hub.publish_odds([event()])
+            assert stream.readline() == b"event: odds\n"
+            message = json.loads(stream.readline()[len(b"data: "):])
+            assert [book["key"] for book in message["data"]["bookmakers"]] == ["draftkings"]
+    finally:
+        server.shutdown()
@@ -0,0 +1,72 @@
+import copy
+
+from tests.payloads import generate_odds
+from pysportsbet import ev, hub, live_state
+
+
+def scores_event(event, home_score, away_score, completed=False, last_update="2030-01-01T01:00:00Z"):
+    return {"id": event["id"], "completed": completed, "last_update": last_update,
+            "scores": [{"name": event["home_team"], "score": home_score},
+                       {"name": event["away_team"], "score": away_score}]}
+
+
+def test_recomputes_only_changed_events(monkeypatch):
+    board = generate_odds(3, num_books=4)
+    state = live_state.LiveState()
+    assert state.update_odds(board) == {event["id"] for event in board}
+
+    # Per-event EV matches EV over the whole board
+    table = state.ev_table()
+    full = ev.json_to_ev(board)
+    key = ["id", "book_key", "market", "position", "point"]
+    merged = full.merge(table, on=key, suffixes=("", "_live"))
+    assert len(merged) == len(full) == len(table)
+    assert (merged["ev_pct_avg"] - merged["ev_pct_avg_live"]).abs().max() < 1e-9
+
+    calls = []
+    json_to_ev = ev.json_to_ev
+    monkeypatch.setattr(ev, "json_to_ev", lambda events, **kwargs: calls.append(
+        [event["id"] for event in events]) or json_to_ev(events, **kwargs))
+
+    # Re-polling the same board changes nothing
+    state.update_odds(copy.deepcopy(board))
+    assert state.recompute() == [] and calls == []
+
+    # A score tick only recomputes its event, and joins the score to its rows
+    first, second = board[0], board[1]
+    assert state.update_scores([scores_event(first, "3", "0")]) == {first["id"]}
+    table = state.ev_table()
+    assert calls == [[first["id"]]]
+    rows = table[table["id"] == first["id"]]
+    assert set(rows["home_score"]) == {"3"} and set(rows["away_score"]) == {"0"}
+    assert table[table["id"] == second["id"]]["home_score"].isna().all()
+
+    # A price move only recomputes its event
+    moved = copy.deepcopy(board)
+    market = moved[1]["bookmakers"][0]["markets"][0]
+    market["last_update"] = "2030-01-01T02:00:00Z"
+    market["outcomes"][0]["price"] += 15
+    assert state.update_odds(moved) == {second["id"]}
+    assert state.recompute() == [second["id"]]
+    assert state.get(first["id"])["scores"] == {first["home_team"]: "3", first["away_team"]: "0"}
+
+    # A completed game leaves the live state, even if its odds are polled again
+    state.update_scores([scores_event(first, "10", "7", completed=True, last_update="2030-01-01T03:00:00Z")])
+    state.update_odds(moved)
+    assert state.get(first["id"]) is None
+    assert first["id"] not in set(state.ev_table()["id"])
+
+
+def test_applies_hub_messages():
+    board = generate_odds(2, num_books=3)
+    odds_hub = hub.Hub()
+    subscription = odds_hub.subscribe(channels=[hub.ODDS, hub.SCORES])
+    odds_hub.publish_odds(board)
+    odds_hub.publish_scores([dict(scores_event(board[0], "1", "1"), sport_key=board[0]["sport_key"])])
+
+    state = live_state.LiveState(ev_type="avg")
+    for message in subscription.drain():
+        state.apply(message)
+    assert sorted(state.dirty) == sorted(event["id"] for event in board)
+    assert state.get(board[0]["id"])["scores"][board[0]["home_team"]] == "1"
+    assert len(state.ev_table()) == len(ev.json_to_ev(board, ev_type="avg"))
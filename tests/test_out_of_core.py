@@ -0,0 +1,51 @@
+import json
+import os
+
+import pandas
+import pytest
+
+from pysportsbet import ev, out_of_core
+from tests.payloads import generate_odds
+
+pytest.importorskip("pyarrow")
+
+
+def sort_rows(df):
+    return df.sort_values(["id", "book_key", "market", "position"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def archive():
+    events = generate_odds(22, num_books=8)
+    with open("odds.json", "w") as f:
+        json.dump(events, f)
+    return events
+
+
+def test_parquet_matches_in_memory_ev(archive):
+    # A 1 MB budget holds 256 rows, so the archive spills to several parts
+    parts = out_of_core.spill_ev("odds.json", "parts", memory_budget_mb=1)
+    assert len(parts) > 1
+
+    out_of_core.file_to_ev_parquet("odds.json", "ev.parquet", memory_budget_mb=1)
+    expected = ev.json_to_ev(archive)
+    result = pandas.read_parquet("ev.parquet")
+    assert len(result) == len(expected) > 1200
+    pandas.testing.assert_frame_equal(sort_rows(result)[list(expected.columns)], sort_rows(expected),
+                                      check_dtype=False)
+    assert [name for name in os.listdir(".") if name.startswith(".spill-")] == []
+
+
+def test_dataset_output_replaces_stale_parts(archive):
+    out_of_core.file_to_ev_parquet("odds.json", "dataset", memory_budget_mb=1)
+    with open("small.json", "w") as f:
+        json.dump(archive[:2], f)
+    out_of_core.file_to_ev_parquet("small.json", "dataset", memory_budget_mb=1)
+    assert len(pandas.read_parquet("dataset")) == len(ev.json_to_ev(archive[:2]))
+
+
+def test_empty_input_raises():
+    with open("empty.json", "w") as f:
+        json.dump([], f)
+    with pytest.raises(ValueError):
+        out_of_core.file_to_ev_parquet("empty.json", "ev.parquet")
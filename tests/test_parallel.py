@@ -0,0 +1,36 @@
+import pandas
+
+from pysportsbet import ev, parallel
+from tests.payloads import generate_odds
+
+
+def sort_rows(df):
+    return df.sort_values(["id", "book_key", "market", "position"]).reset_index(drop=True)
+
+
+def test_shard_events_keeps_events_whole():
+    events = generate_odds(20, num_books=3)
+    shards = parallel.shard_events(events, 6)
+    assert len(shards) == 6
+    assert sorted(event["id"] for shard in shards for event in shard) == sorted(event["id"] for event in events)
+
+
+def test_shard_events_by_sport():
+    events = generate_odds(20, num_books=3)
+    shards = parallel.shard_events(events, 10, by="sport_key")
+    assert all(len({event["sport_key"] for event in shard}) == 1 for shard in shards)
+
+
+def test_sharded_ev_matches_single_process():
+    events = generate_odds(12, num_books=4)
+    expected = ev.json_to_ev(events)
+    result = parallel.sharded_ev(events, workers=2)
+    pandas.testing.assert_frame_equal(sort_rows(result), sort_rows(expected))
+
+
+def test_sharded_ev_filters_every_shard():
+    events = generate_odds(12, num_books=4)
+    filter_kwargs = dict(pref_ev_filter="both", min_odds=-150, max_odds=150)
+    expected = ev.filter_ev(ev.json_to_ev(events), **filter_kwargs)
+    result = parallel.sharded_ev(events, workers=1, filter_kwargs=filter_kwargs)
+    pandas.testing.assert_frame_equal(sort_rows(result), sort_rows(expected))
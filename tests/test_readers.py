@@ -0,0 +1,56 @@
+import gzip
+import json
+
+import pytest
+
+from pysportsbet import readers
+from tests.payloads import generate_odds
+
+
+@pytest.fixture
+def events():
+    return generate_odds(30, num_books=2)
+
+
+def write_formats(directory, events):
+    with open(directory / "odds.json", "w") as f:
+        json.dump(events, f)
+    with open(directory / "odds.ndjson", "w") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+    with gzip.open(directory / "snapshots.jsonl.gz", "wt") as f:
+        for i in range(0, len(events), 7):
+            f.write(json.dumps({"timestamp": "2030-01-01T00:00:00Z", "data": events[i:i + 7]}) + "\n")
+    snapshots = directory / "snapshots"
+    snapshots.mkdir()
+    for i in range(0, len(events), 10):
+        with open(snapshots / f"{i:04d}.json", "w") as f:
+            json.dump({"timestamp": "2030-01-01T00:00:00Z", "data": events[i:i + 10]}, f)
+    return ["odds.json", "odds.ndjson", "snapshots.jsonl.gz", "snapshots"]
+
+
+def test_formats_stream_the_same_events(tmp_path, events):
+    for name in write_formats(tmp_path, events):
+        assert list(readers.iter_events(str(tmp_path / name))) == events
+
+
+def test_json_array_is_streamed_across_reads(tmp_path, events, monkeypatch):
+    monkeypatch.setattr(readers, "READ_SIZE", 64)
+    write_formats(tmp_path, events)
+    assert list(readers.iter_events(str(tmp_path / "odds.json"))) == events
+
+
+def test_zstd_files(tmp_path, events):
+    zstandard = pytest.importorskip("zstandard")
+    with open(tmp_path / "odds.ndjson.zst", "wb") as f:
+        f.write(zstandard.ZstdCompressor().compress("\n".join(json.dumps(e) for e in events).encode()))
+    assert list(readers.iter_events(str(tmp_path / "odds.ndjson.zst"))) == events
+
+
+def test_chunks_are_bounded_and_never_repeat_an_event(tmp_path, events):
+    with open(tmp_path / "odds.ndjson", "w") as f:
+        # The same events twice, as two consecutive snapshots
+        f.writelines(json.dumps({"data": events}) + "\n" for _ in range(2))
+    chunks = list(readers.iter_event_chunks(str(tmp_path / "odds.ndjson"), chunk_size=8))
+    assert all(0 < len(chunk) <= 8 for chunk in chunks)
+    assert all(len({event["id"] for event in chunk}) == len(chunk) for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 2 * len(events)
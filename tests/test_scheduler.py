@@ -0,0 +1,24 @@
+import time
+
+from pysportsbet import scheduler
+
+
+def test_ticks_do_not_drift():
+    starts = []
+    polling = scheduler.Scheduler()
+    polling.add("fast", 0.05, lambda: (starts.append(time.monotonic()), time.sleep(0.02)))
+    stats = polling.run(0.5)["fast"]
+    assert stats["runs"] == 10 and stats["skipped"] == 0
+    # Run time does not add up: the tenth run starts nine intervals after the first
+    assert abs((starts[-1] - starts[0]) - 0.45) < 0.08
+
+
+def test_slow_jobs_skip_ticks_and_errors_are_counted():
+    polling = scheduler.Scheduler()
+    polling.add("slow", 0.05, time.sleep, 0.12)
+    polling.add("broken", 0.1, lambda: 1 / 0)
+    stats = polling.run(0.5)
+    assert stats["slow"]["runs"] + stats["slow"]["skipped"] == 10
+    assert stats["slow"]["skipped"] >= 5 and stats["slow"]["actual_interval"] >= 0.12
+    assert stats["broken"]["errors"] == stats["broken"]["runs"] == 5
+    assert "slow: " in polling.report()
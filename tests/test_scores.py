@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from tests.conftest import FakeResponse
+from pysportsbet import backfill, scores, timestamps
+
+NOW = datetime(2023, 9, 10, 18, 0, 0)
+
+
+def game(event_id, hours, home="A", away="B", completed=False, home_score=None, away_score=None):
+    return {
+        "id": event_id, "sport_key": "basketball_nba", "commence_time": timestamps.format_timestamp(
+            NOW + timedelta(hours=hours)),
+        "completed": completed, "home_team": home, "away_team": away,
+        "scores": None if home_score is None else [{"name": home, "score": home_score},
+                                                  {"name": away, "score": away_score}],
+    }
+
+
+def test_team_scores():
+    assert scores.team_scores(game("g", -1, home_score="10", away_score="7")) == {"A": "10", "B": "7"}
+    assert scores.team_scores(game("g", 1)) == {}
+
+
+def test_tracker_polls_only_games_in_play(monkeypatch):
+    calls = []
+    board = {
+        "final": game("final", -30, home="C", completed=True, home_score="99", away_score="90"),
+        "live": game("live", -1, home_score="50", away_score="48"),
+        "tonight": game("tonight", 3, home="C", away="D"),
+    }
+
+    def fetch(api_key, request, retries=3, backoff=2.0):
+        calls.append(request.params)
+        ids = request.params.get("eventIds")
+        return FakeResponse([board[i] for i in (ids.split(",") if ids else board)], remaining=500)
+
+    monkeypatch.setattr(backfill, "fetch", fetch)
+    tracker = scores.ScoresTracker("key", "basketball_nba", days_from=2, cache_file="scores.ndjson",
+                                   limiter=backfill.QuotaLimiter(1000), refresh_secs=6 * 3600)
+    assert len(tracker.poll(NOW)) == 3
+    assert calls[0] == {"dateFormat": "iso", "daysFrom": 2}
+    assert [event["id"] for event in tracker.team_games("C")] == ["final", "tonight"]
+
+    # Only the live game is polled, by id; the final score is not fetched again
+    board["live"] = game("live", -1, home_score="60", away_score="48")
+    assert tracker.poll(NOW + timedelta(minutes=1)) == [board["live"]]
+    assert calls[1]["eventIds"] == "live" and calls[1]["daysFrom"] == 1
+
+    # A game that goes final is cached, and nothing is polled until the next game starts
+    board["live"] = game("live", -1, completed=True, home_score="101", away_score="99")
+    tracker.poll(NOW + timedelta(minutes=2))
+    assert tracker.poll(NOW + timedelta(minutes=3)) == []
+    assert len(calls) == 3
+    tracker.poll(NOW + timedelta(hours=2, minutes=56))
+    assert calls[-1]["eventIds"] == "tonight"
+
+    # A new run starts from the cached results
+    restarted = scores.ScoresTracker("key", "basketball_nba", days_from=2, cache_file="scores.ndjson")
+    assert sorted(restarted.completed) == ["final", "live"]
+    assert scores.team_scores(restarted.completed["live"])["A"] == "101"
+    assert [event["id"] for event in tracker.events(NOW)] == ["final", "live", "tonight"]
+    assert [event["id"] for event in scores.ScoresTracker("key", "basketball_nba", days_from=1).events(NOW)] == []
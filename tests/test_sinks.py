@@ -0,0 +1,90 @@
+import csv
+import json
+import sqlite3
+
+import openpyxl
+import pytest
+
+from pysportsbet import sinks
+
+HEADER = ["id", "bookmaker", "price", "point", "completed"]
+META = [["Requests Used", 1], ["Requests Remaining", 99]]
+ROWS = [
+    ["e1", "fanduel", -110, None, False],
+    ["e1", "draftkings", -105.5, 3.5, True],
+    ["e2", "fanduel", 120, None, None],
+]
+
+
+def test_excel_sink_keeps_the_script_layout():
+    assert sinks.save_rows("out.xlsx", HEADER, iter(ROWS), meta=META, sheet_name="Odds") == 3
+    ws = openpyxl.load_workbook("out.xlsx")["Odds"]
+    values = [[cell.value for cell in row] for row in ws.iter_rows()]
+    assert values[:2] == [META[0] + [None] * 3, META[1] + [None] * 3]
+    assert values[3] == HEADER
+    assert values[4] == ROWS[0]
+
+
+def test_csv_sink_writes_header_and_meta_sidecar():
+    sinks.save_rows("out.csv", HEADER, ROWS, meta=META)
+    with open("out.csv", newline="") as f:
+        lines = list(csv.reader(f))
+    assert lines[0] == HEADER
+    assert lines[2] == ["e1", "draftkings", "-105.5", "3.5", "True"]
+    with open("out.csv.meta.json") as f:
+        assert json.load(f) == {"Requests Used": 1, "Requests Remaining": 99}
+
+
+def test_sqlite_sink_writes_rows_and_meta_table(monkeypatch):
+    monkeypatch.setattr(sinks, "BATCH_ROWS", 2)
+    sinks.save_rows("out.sqlite", HEADER, ROWS, meta=META)
+    sinks.save_rows("out.sqlite", HEADER, ROWS[:1])
+    connection = sqlite3.connect("out.sqlite")
+    assert connection.execute("SELECT id, price FROM rows").fetchall() == [("e1", -110)]
+    assert dict(connection.execute("SELECT name, value FROM meta")) == {"Requests Used": 1, "Requests Remaining": 99}
+
+
+@pytest.mark.parametrize("path, module", [("out.parquet", "pyarrow.parquet"), ("out.arrow", "pyarrow.feather")])
+def test_columnar_sinks_type_empty_columns_from_later_batches(monkeypatch, path, module):
+    read = pytest.importorskip(module).read_table
+    monkeypatch.setattr(sinks, "BATCH_ROWS", 2)
+    # The point column is all null in the first batch; it is typed once a later batch holds a point
+    rows = [ROWS[0], ROWS[2], ROWS[1]]
+    with sinks.open_sink(path, HEADER) as sink:
+        sink.write(rows[:2])
+        sink.write(rows[2:])
+    table = read(path)
+    assert table.num_rows == 3
+    assert str(table.schema.field("price").type) == "double"
+    assert str(table.schema.field("completed").type) == "bool"
+    assert table.column("point").to_pylist() == [None, None, 3.5]
+    assert table.column("price").to_pylist() == [-110.0, 120.0, -105.5]
+
+    # A column that never holds a value is typed by its name
+    with sinks.open_sink(path, HEADER + ["note"]) as sink:
+        sink.write([ROWS[0], ROWS[2]])
+    schema = read(path).schema
+    assert str(schema.field("point").type) == "double" and str(schema.field("note").type) == "string"
+
+
+def test_sink_target_resolves_formats_and_paths():
+    assert sinks.sink_target(None, "odds_data.xlsx") == "odds_data.xlsx"
+    assert sinks.sink_target("parquet", "odds_data.xlsx") == "odds_data.parquet"
+    assert sinks.sink_target("dump.db", "odds_data.xlsx") == "dump.db"
+    assert sinks.parse_sink("odds_data.xlsx", ["--sink", "csv", "--other"]) == "odds_data.csv"
+    with pytest.raises(ValueError):
+        sinks.sink_target("dump.txt", "odds_data.xlsx")
+
+
+def test_excel_sink_spills_across_sheets():
+    with sinks.ExcelSink("big.xlsx", HEADER, sheet_name="Odds", max_rows=4) as sink:
+        sink.write_meta(META[:1])
+        sink.write(iter(ROWS * 2))
+    wb = openpyxl.load_workbook("big.xlsx")
+    assert wb.sheetnames == ["Odds", "Odds (2)", "Odds (3)"]
+    sheets = [[[cell.value for cell in row] for row in wb[name].iter_rows()] for name in wb.sheetnames]
+    assert [len(sheet) for sheet in sheets] == [4, 4, 3]
+    assert sheets[0][2] == HEADER and sheets[1][0] == HEADER and sheets[2][0] == HEADER
+    assert sheets[0][3] == ROWS[0] and sheets[2][2] == ROWS[2]
+    with pytest.raises(ValueError):
+        sink.write_meta(META)
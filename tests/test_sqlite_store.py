@@ -0,0 +1,61 @@
+import sqlite3
+
+from pysportsbet import sqlite_store
+
+
+def event(event_id, commence_time, last_update, home_price, point=None, book="fanduel"):
+    return {
+        "id": event_id, "sport_key": "basketball_nba", "commence_time": commence_time,
+        "home_team": "A", "away_team": "B",
+        "bookmakers": [{"key": book, "title": book.title(), "last_update": last_update, "markets": [
+            {"key": "spreads" if point is not None else "h2h", "last_update": last_update, "outcomes": [
+                {"name": "A", "price": home_price, "point": point},
+                {"name": "B", "price": -home_price, "point": -point if point is not None else None},
+            ]},
+        ]}],
+    }
+
+
+def test_upserts_are_idempotent_and_keep_history():
+    with sqlite_store.OddsStore("odds.sqlite") as store:
+        assert store.add_odds([event("e1", "2030-01-02T00:00:00Z", "2030-01-01T10:00:00Z", 110)]) == 2
+        # The same poll again changes nothing
+        store.add_odds([event("e1", "2030-01-02T00:00:00Z", "2030-01-01T10:00:00Z", 110)])
+        assert len(store.odds()) == 2
+
+        store.add_odds([event("e1", "2030-01-02T00:00:00Z", "2030-01-01T11:00:00Z", 120),
+                        event("e2", "2030-01-03T00:00:00Z", "2030-01-01T11:00:00Z", 100, point=1.5,
+                              book="pinnacle")])
+        # An older snapshot written late does not move the latest state back
+        store.add_odds([event("e1", "2030-01-02T00:00:00Z", "2030-01-01T09:00:00Z", 105)])
+
+        history = store.odds(event_id="e1", market="h2h")
+        assert [(row["last_update"], row["price"]) for row in history if row["name"] == "A"] == [
+            ("2030-01-01T09:00:00Z", 105), ("2030-01-01T10:00:00Z", 110), ("2030-01-01T11:00:00Z", 120)]
+        latest = store.odds(event_id="e1", latest=True)
+        assert [row["price"] for row in latest] == [120, -120]
+        assert [row["point"] for row in store.odds(book="pinnacle")] == [1.5, -1.5]
+        assert len(store.odds(start="2030-01-01T10:30:00Z")) == 4
+        assert [row["id"] for row in store.events(start="2030-01-02T12:00:00Z")] == ["e2"]
+        assert [row["id"] for row in store.events(sport="basketball_nba")] == ["e1", "e2"]
+
+
+def test_scores_and_concurrent_readers():
+    with sqlite_store.OddsStore("odds.sqlite") as store:
+        store.add_odds([event("e1", "2030-01-02T00:00:00Z", "2030-01-01T10:00:00Z", 110)])
+        scores = {"id": "e1", "sport_key": "basketball_nba", "commence_time": "2030-01-02T00:00:00Z",
+                  "home_team": "A", "away_team": "B", "completed": False, "last_update": "2030-01-02T01:00:00Z",
+                  "scores": [{"name": "A", "score": "50"}, {"name": "B", "score": "48"}]}
+        assert store.add_scores([scores]) == 2
+        store.add_scores([dict(scores, completed=True, last_update="2030-01-02T02:30:00Z",
+                               scores=[{"name": "A", "score": "101"}, {"name": "B", "score": "99"}])])
+        store.add_scores([scores])
+
+        assert [(row["name"], row["score"]) for row in store.scores("e1")] == [("A", "101"), ("B", "99")]
+        assert store.events()[0]["completed"] == 1
+
+        # Another connection reads while the store is open
+        reader = sqlite3.connect("odds.sqlite")
+        assert reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert reader.execute("SELECT COUNT(*) FROM outcomes WHERE event_id = 'e1'").fetchone()[0] == 2
+        reader.close()
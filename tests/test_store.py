@@ -0,0 +1,75 @@
+import pytest
+
+from pysportsbet import backfill
+from tests.payloads import count_outcomes, generate_odds
+
+pytest.importorskip("pyarrow")
+
+from pysportsbet import store  # noqa: E402
+
+
+def snapshot(timestamp, seed=0):
+    return {"timestamp": timestamp, "data": generate_odds(3, num_books=2, seed=seed)}
+
+
+def test_manifest_tracks_held_snapshots():
+    historical = store.HistoricalStore("store")
+    historical.add("soccer_epl", "h2h,totals", "us", "", snapshot("2023-09-10T10:00:00Z"))
+    assert historical.has("soccer_epl", "h2h", "us", "", "2023-09-10T10:00:00Z")
+    assert not historical.has("soccer_epl", "spreads", "us", "", "2023-09-10T10:00:00Z")
+    assert not historical.has("soccer_epl", "h2h", "", "pinnacle", "2023-09-10T10:00:00Z")
+
+    reopened = store.HistoricalStore("store")
+    assert reopened.missing("soccer_epl", "h2h", "us", "", ["2023-09-10T10:05:00Z", "2023-09-10T10:00:00Z"]) == [
+        "2023-09-10T10:05:00Z"]
+
+
+def test_writers_keep_their_own_manifest():
+    store.HistoricalStore("store", writer="host:1").add("soccer_epl", "h2h", "us", "", snapshot("2023-09-10T10:00:00Z"))
+    store.HistoricalStore("store", writer="host:2").add("soccer_epl", "h2h", "us", "", snapshot("2023-09-10T10:05:00Z"))
+    store.HistoricalStore("store").add("soccer_epl", "h2h", "us", "", snapshot("2023-09-10T10:10:00Z"))
+
+    assert store.HistoricalStore("store").held("soccer_epl", "h2h", "us", "") == {
+        "2023-09-10T10:00:00Z", "2023-09-10T10:05:00Z", "2023-09-10T10:10:00Z"}
+    assert len(store.HistoricalStore("store", writer="host:1").held("soccer_epl", "h2h", "us", "")) == 3
+
+
+def test_query_filters_sport_range_and_markets():
+    historical = store.HistoricalStore("store")
+    for day in range(3):
+        historical.add("soccer_epl", "h2h,spreads,totals", "us", "", snapshot(f"2023-09-1{day}T10:00:00Z", day))
+    historical.add("basketball_nba", "h2h,spreads,totals", "us", "", snapshot("2023-09-11T10:00:00Z"))
+
+    df = historical.query("soccer_epl", start="2023-09-11T00:00:00Z", end="2023-09-12T10:00:00Z")
+    assert df["snapshot"].astype(str).unique().tolist() == ["2023-09-11 10:00:00"]
+    assert len(df) == count_outcomes(snapshot("", 1)["data"])
+
+    h2h = historical.query("soccer_epl", markets=["h2h"], columns=["snapshot", "market", "price"])
+    assert list(h2h.columns) == ["snapshot", "market", "price"]
+    assert set(h2h["market"]) == {"h2h"} and h2h["snapshot"].nunique() == 3
+
+
+def test_backfill_fetches_only_gaps(fake_api):
+    historical = store.HistoricalStore("store")
+    historical.add("baseball_mlb", "h2h", "us", "", snapshot("2023-09-10T02:00:00Z"))
+    stats = backfill.backfill_odds("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z",
+                                   "2023-09-10T03:00:00Z", 60, backfill.Checkpoint("odds.ndjson"), store=historical)
+    assert stats["fetched"] == 2
+    assert "odds|baseball_mlb|regions=us;markets=h2h|2023-09-10T02:00:00Z" not in fake_api
+    assert historical.held("baseball_mlb", "h2h", "us", "") == {
+        "2023-09-10T01:00:00Z", "2023-09-10T02:00:00Z", "2023-09-10T03:00:00Z"}
+
+
+def test_responses_rebuild_stored_and_fetched_snapshots(fake_api):
+    from pysportsbet import get_historical_odds
+
+    historical = store.HistoricalStore("store")
+    held = {"timestamp": "2023-09-10T02:00:00Z", "data": generate_odds(3, num_books=2, markets=["h2h"])}
+    historical.add("baseball_mlb", "h2h", "us", "", held)
+    backfill.backfill_odds("key", "baseball_mlb", "us", "", "h2h", "american", "2023-09-10T00:00:00Z",
+                           "2023-09-10T03:00:00Z", 60, backfill.Checkpoint("odds.ndjson"), store=historical)
+
+    responses = list(historical.responses("baseball_mlb", "h2h", "us", "", start="2023-09-10T01:00:00Z",
+                                          end="2023-09-10T03:00:00Z", reverse=True))
+    assert [response["timestamp"] for response in responses] == ["2023-09-10T03:00:00Z", "2023-09-10T02:00:00Z"]
+    assert get_historical_odds.format_event_output(responses[1]) == get_historical_odds.format_event_output(held)
@@ -0,0 +1,33 @@
+from pysportsbet import timestamps
+
+
+def snapshot(timestamp, previous, following):
+    return {"timestamp": timestamp, "previous_timestamp": previous, "next_timestamp": following}
+
+
+def test_unknown_grid_steps_by_interval():
+    planner = timestamps.SnapshotPlanner()
+    assert planner.plan("2023-09-10T00:00:00Z", "2023-09-10T00:30:00Z", 10) == [
+        "2023-09-10T00:30:00Z", "2023-09-10T00:20:00Z", "2023-09-10T00:10:00Z"]
+
+
+def test_short_interval_requests_every_snapshot_once():
+    planner = timestamps.SnapshotPlanner()
+    planner.observe(snapshot("2023-09-10T00:25:00Z", "2023-09-10T00:20:00Z", "2023-09-10T00:30:00Z"))
+    assert planner.plan("2023-09-10T00:00:00Z", "2023-09-10T00:17:00Z", 1) == [
+        "2023-09-10T00:15:00Z", "2023-09-10T00:10:00Z", "2023-09-10T00:05:00Z"]
+
+
+def test_long_interval_aligns_to_boundaries_and_skips_held():
+    planner = timestamps.SnapshotPlanner()
+    planner.observe(snapshot("2023-09-10T11:55:00Z", "2023-09-10T11:50:00Z", "2023-09-10T12:00:00Z"))
+    planned = planner.plan("2023-09-10T09:00:00Z", "2023-09-10T11:58:00Z", 45, held=["2023-09-10T11:10:00Z"])
+    assert planned == ["2023-09-10T11:55:00Z", "2023-09-10T10:25:00Z", "2023-09-10T09:40:00Z"]
+
+
+def test_cadence_follows_nearest_observation():
+    planner = timestamps.SnapshotPlanner()
+    planner.observe(snapshot("2022-01-01T00:10:00Z", "2022-01-01T00:00:00Z", "2022-01-01T00:20:00Z"))
+    planner.observe(snapshot("2023-01-01T00:05:00Z", "2023-01-01T00:00:00Z", "2023-01-01T00:10:00Z"))
+    assert planner.snapshot_at(timestamps.parse("2022-01-01T05:07:00Z")) == timestamps.parse("2022-01-01T05:00:00Z")
+    assert planner.snapshot_at(timestamps.parse("2023-01-01T05:07:00Z")) == timestamps.parse("2023-01-01T05:05:00Z")